@@ -0,0 +1,149 @@
+"""
+Rasteryzacja całego lasu na siatkę XY.
+
+Do rastra trafiają tylko node'y korony (z >= z_min + min_height_ratio ·
+wysokość drzewa, jak w CrownAnalysis) – pień i dolne gałęzie są pomijane.
+Każdy node korony jest "rozmazywany" na dysk o promieniu splat_radius,
+więc korona daje ciągły rzut zamiast pojedynczych punktów.
+
+Dla każdej komórki:
+- chm: model wysokości koron – najwyższy node korony nad terenem (NaN = luka),
+- owner: tree_id drzewa, do którego należy ten najwyższy node (-1 = luka),
+- n_trees: liczba różnych drzew, których korona pokrywa komórkę (nakładanie),
+oraz cover_fraction: udział komórek z koroną (chm >= cover_height).
+
+Node'y wszystkich drzew są binowane naraz (forest_node_arrays),
+bez pętli po drzewach i bez convex hulli.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from analysis.forest_metrics import forest_node_arrays
+
+
+@dataclass
+class CanopyRaster:
+    xs: np.ndarray          # (nx,) środki komórek
+    ys: np.ndarray          # (ny,)
+    chm: np.ndarray         # (ny, nx)
+    owner: np.ndarray       # (ny, nx)
+    n_trees: np.ndarray     # (ny, nx)
+    cover: np.ndarray       # (ny, nx) bool
+    cell_size: float
+
+    @property
+    def cover_fraction(self) -> float:
+        return float(self.cover.mean()) if self.cover.size else 0.0
+
+    @property
+    def gap_fraction(self) -> float:
+        return 1.0 - self.cover_fraction
+
+    @property
+    def overlap_fraction(self) -> float:
+        """Udział komórek pokrytych koronami więcej niż jednego drzewa."""
+        return float((self.n_trees > 1).mean()) if self.n_trees.size else 0.0
+
+    def extent(self):
+        h = self.cell_size / 2
+        return [self.xs[0] - h, self.xs[-1] + h, self.ys[0] - h, self.ys[-1] + h]
+
+
+def canopy_mask(positions, tree_index, offsets, min_height_ratio=0.6) -> np.ndarray:
+    """Node'y korony każdego drzewa (próg wysokości jak CrownAnalysis.canopy_3d)."""
+    if not len(offsets):
+        return np.zeros(0, dtype=bool)
+    z = positions[:, 2]
+    z_max = np.maximum.reduceat(z, offsets)
+    z_min = np.minimum.reduceat(z, offsets)
+    threshold = z_min + min_height_ratio * (z_max - z_min)
+    return z >= threshold[tree_index]
+
+
+def disk_offsets(radius, cell_size) -> np.ndarray:
+    """(K, 2) przesunięcia (dx, dy) komórek, których środek leży w dysku o promieniu radius."""
+    r = int(np.ceil(radius / cell_size))
+    dx, dy = np.meshgrid(np.arange(-r, r + 1), np.arange(-r, r + 1))
+    inside = np.hypot(dx, dy) * cell_size <= radius
+    return np.c_[dx[inside], dy[inside]]
+
+
+def rasterize_canopy(
+    forest,
+    terrain,
+    size=20.0,
+    resolution=200,
+    cover_height=2.0,
+    min_height_ratio=0.6,
+    splat_radius=0.5,
+) -> CanopyRaster:
+    """
+    Raster kwadratu [-size, size]² z resolution × resolution komórkami.
+
+    splat_radius: promień rzutu pojedynczego node'a korony (domyślnie
+    step_size, czyli odstęp między kolejnymi node'ami gałęzi).
+    cover_height: minimalna wysokość korony nad terenem liczonej jako pokrycie.
+    Komórki poza kwadratem są pomijane.
+    """
+    positions, tree_index, offsets = forest_node_arrays(forest)
+    tree_ids = np.array([tree.tree_id for tree in forest.trees], dtype=int)
+
+    cell_size = 2 * size / resolution
+    centers = -size + (np.arange(resolution) + 0.5) * cell_size
+    X, Y = np.meshgrid(centers, centers)
+
+    chm = np.full((resolution, resolution), np.nan)
+    owner = np.full((resolution, resolution), -1, dtype=int)
+    n_trees = np.zeros((resolution, resolution), dtype=int)
+
+    # ---- tylko korona ----
+    crown = canopy_mask(positions, tree_index, offsets, min_height_ratio)
+    positions, tree_index = positions[crown], tree_index[crown]
+
+    # ---- binowanie z rozmazaniem na dysk ----
+    ix = np.floor((positions[:, 0] + size) / cell_size).astype(int)
+    iy = np.floor((positions[:, 1] + size) / cell_size).astype(int)
+
+    disk = disk_offsets(splat_radius, cell_size)
+    ix = (ix[:, None] + disk[None, :, 0]).ravel()
+    iy = (iy[:, None] + disk[None, :, 1]).ravel()
+    z = np.repeat(positions[:, 2], len(disk))
+    tree_index = np.repeat(tree_index, len(disk))
+
+    inside = (ix >= 0) & (ix < resolution) & (iy >= 0) & (iy < resolution)
+    cell = (iy * resolution + ix)[inside]
+    z = z[inside]
+    tree_index = tree_index[inside]
+
+    if len(cell):
+        n_cells = resolution * resolution
+
+        # najwyższy node korony nad komórką
+        z_top = np.full(n_cells, -np.inf)
+        np.maximum.at(z_top, cell, z)
+        is_top = z == z_top[cell]
+        top_cells = cell[is_top]
+
+        ground = terrain.height(X.ravel()[top_cells], Y.ravel()[top_cells])
+        chm.ravel()[top_cells] = z[is_top] - ground
+        owner.ravel()[top_cells] = tree_ids[tree_index[is_top]]
+
+        # różne drzewa w komórce: unikalne pary (komórka, drzewo) po sortowaniu
+        pairs = np.sort(cell * len(tree_ids) + tree_index)
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+        n_trees = np.bincount(pairs // len(tree_ids), minlength=n_cells).reshape(resolution, resolution)
+
+    cover = np.zeros_like(owner, dtype=bool)
+    np.greater_equal(chm, cover_height, out=cover, where=~np.isnan(chm))
+
+    return CanopyRaster(
+        xs=centers,
+        ys=centers.copy(),
+        chm=chm,
+        owner=owner,
+        n_trees=n_trees,
+        cover=cover,
+        cell_size=cell_size,
+    )
@@ -1,35 +1,163 @@
 import numpy as np
+from functools import cached_property
 from scipy.spatial import ConvexHull
 
 
 # -------------------------------------------------
-# Pomocnicze: punkty korony (górna część drzewa)
+# Analiza korony: punkty korony liczone raz
 # -------------------------------------------------
 
-def canopy_points_3d(tree, min_height_ratio=0.6):
+class CrownAnalysis:
     """
-    Zwraca punkty (x,y,z) należące do korony drzewa
+    Wszystkie metryki korony jednego drzewa.
+
+    Punkty korony (node'y powyżej min_height_ratio wysokości drzewa)
+    są wyznaczane raz, a każda metryka liczona leniwie i zapamiętywana.
     """
-    zs = np.array([n.z for n in tree.nodes])
-    z_min, z_max = zs.min(), zs.max()
 
-    threshold = z_min + min_height_ratio * (z_max - z_min)
+    def __init__(self, positions, min_height_ratio=0.6):
+        self.positions = np.asarray(positions, dtype=float)
+        self.min_height_ratio = min_height_ratio
+
+    @classmethod
+    def from_tree(cls, tree, min_height_ratio=0.6):
+        return cls(tree.node_positions(), min_height_ratio)
+
+    # ---- punkty korony ----
+
+    @cached_property
+    def canopy_3d(self) -> np.ndarray:
+        zs = self.positions[:, 2]
+        z_min, z_max = zs.min(), zs.max()
+
+        threshold = z_min + self.min_height_ratio * (z_max - z_min)
+        return self.positions[zs >= threshold]
+
+    @cached_property
+    def canopy_2d(self) -> np.ndarray:
+        return self.canopy_3d[:, :2]
+
+    # ---- wysokość / objętość / promień ----
+
+    @cached_property
+    def height(self) -> float:
+        """Wysokość względem korzenia (pierwszy node)."""
+        return self.positions[:, 2].max() - self.positions[0, 2]
+
+    @cached_property
+    def crown_volume(self) -> float:
+        pts = self.canopy_3d
+        if len(pts) < 4:
+            return 0.0
+        return ConvexHull(pts).volume
+
+    @cached_property
+    def hull_2d(self) -> np.ndarray | None:
+        """Wierzchołki 2D convex hull korony (jak canopy_hull)."""
+        pts = self.canopy_2d
+        if len(pts) < 3:
+            return None
+        return pts[ConvexHull(pts).vertices]
+
+    @cached_property
+    def crown_radius(self) -> float:
+        """Średnia odległość wierzchołków hull od ich środka."""
+        hull = self.hull_2d
+        if hull is None:
+            return 0.0
+        center = hull.mean(axis=0)
+        return float(np.linalg.norm(hull - center, axis=1).mean())
+
+    # ---- asymetria ----
+
+    @cached_property
+    def _center_2d(self) -> np.ndarray:
+        return self.canopy_2d.mean(axis=0)
+
+    @cached_property
+    def asymmetry_radius(self) -> float:
+        pts = self.canopy_2d
+        if len(pts) < 3:
+            return 0.0
 
-    pts = np.array([
-        n.position()
-        for n in tree.nodes
-        if n.z >= threshold
-    ])
+        distances = np.linalg.norm(pts - self._center_2d, axis=1)
+        return distances.max() / distances.min()
 
-    return pts
+    @cached_property
+    def asymmetry_pca(self) -> float:
+        pts = self.canopy_2d
+        if len(pts) < 3:
+            return 0.0
+
+        cov = np.cov((pts - self._center_2d).T)
+
+        eigvals, _ = np.linalg.eig(cov)
+        eigvals = np.sort(eigvals)[::-1]
+
+        if eigvals[1] <= 1e-6:
+            return 0.0
+
+        return eigvals[0] / eigvals[1]
+
+    @cached_property
+    def asymmetry_hemispheres(self) -> float:
+        pts = self.canopy_2d
+        if len(pts) < 3:
+            return 0.0
+
+        center_x = pts[:, 0].mean()
+
+        left = np.sum(pts[:, 0] < center_x)
+        right = np.sum(pts[:, 0] > center_x)
+
+        if left + right == 0:
+            return 0.0
+
+        return abs(left - right) / (left + right)
+
+    @cached_property
+    def asymmetry_inertia(self) -> float:
+        pts = self.canopy_2d
+        if len(pts) < 3:
+            return 0.0
+
+        rel = pts - self._center_2d
+
+        Ixx = np.sum(rel[:, 1] ** 2)
+        Iyy = np.sum(rel[:, 0] ** 2)
+
+        if min(Ixx, Iyy) <= 1e-6:
+            return 0.0
+
+        return max(Ixx, Iyy) / min(Ixx, Iyy)
+
+    def metrics(self) -> dict:
+        return {
+            "height": self.height,
+            "crown_volume": self.crown_volume,
+            "asymmetry_radius": self.asymmetry_radius,
+            "asymmetry_pca": self.asymmetry_pca,
+            "asymmetry_hemispheres": self.asymmetry_hemispheres,
+            "asymmetry_inertia": self.asymmetry_inertia,
+        }
+
+
+# -------------------------------------------------
+# Pomocnicze: punkty korony (górna część drzewa)
+# -------------------------------------------------
+
+def canopy_points_3d(tree, min_height_ratio=0.6):
+    """
+    Zwraca punkty (x,y,z) należące do korony drzewa
+    """
+    return CrownAnalysis.from_tree(tree, min_height_ratio).canopy_3d
 
 
 def canopy_points_2d(tree, min_height_ratio=0.6):
     """
     Zwraca punkty (x,y) korony drzewa
     """
-    pts3d = canopy_points_3d(tree, min_height_ratio)
-    return pts3d[:, :2]
+    return CrownAnalysis.from_tree(tree, min_height_ratio).canopy_2d
 
 
 # -------------------------------------------------
@@ -40,13 +168,7 @@ def crown_volume(tree, min_height_ratio=0.6):
     """
     Objętość korony jako 3D convex hull
     """
-    pts = canopy_points_3d(tree, min_height_ratio)
-
-    if len(pts) < 4:
-        return 0.0  
-
-    hull = ConvexHull(pts)
-    return hull.volume
+    return CrownAnalysis.from_tree(tree, min_height_ratio).crown_volume
 
 
 # -------------------------------------------------
@@ -58,78 +180,28 @@ def asymmetry_radius(tree, min_height_ratio=0.6):
     Najprostsza asymetria:
     max_promień / min_promień
     """
-    pts = canopy_points_2d(tree, min_height_ratio)
-
-    if len(pts) < 3:
-        return 0.0
-
-    center = pts.mean(axis=0)
-    distances = np.linalg.norm(pts - center, axis=1)
-
-    return distances.max() / distances.min()
+    return CrownAnalysis.from_tree(tree, min_height_ratio).asymmetry_radius
 
 
 def asymmetry_pca(tree, min_height_ratio=0.6):
     """
     Asymetria przez PCA (elongation)
     """
-    pts = canopy_points_2d(tree, min_height_ratio)
-
-    if len(pts) < 3:
-        return 0.0
-
-    pts_centered = pts - pts.mean(axis=0)
-
-    cov = np.cov(pts_centered.T)
-
-    eigvals, _ = np.linalg.eig(cov)
-    eigvals = np.sort(eigvals)[::-1]
-
-    if eigvals[1] <= 1e-6:
-        return 0.0
-
-    return eigvals[0] / eigvals[1]
+    return CrownAnalysis.from_tree(tree, min_height_ratio).asymmetry_pca
 
 
 def asymmetry_hemispheres(tree, min_height_ratio=0.6):
     """
     Asymetria półkul (lewo/prawo)
     """
-    pts = canopy_points_2d(tree, min_height_ratio)
-
-    if len(pts) < 3:
-        return 0.0
-
-    center_x = pts[:, 0].mean()
-
-    left = np.sum(pts[:, 0] < center_x)
-    right = np.sum(pts[:, 0] > center_x)
-
-    if left + right == 0:
-        return 0.0
-
-    return abs(left - right) / (left + right)
+    return CrownAnalysis.from_tree(tree, min_height_ratio).asymmetry_hemispheres
 
 
 def asymmetry_inertia(tree, min_height_ratio=0.6):
     """
     Asymetria przez moment bezwładności
     """
-    pts = canopy_points_2d(tree, min_height_ratio)
-
-    if len(pts) < 3:
-        return 0.0
-
-    center = pts.mean(axis=0)
-    rel = pts - center
-
-    Ixx = np.sum(rel[:, 1] ** 2)
-    Iyy = np.sum(rel[:, 0] ** 2)
-
-    if min(Ixx, Iyy) <= 1e-6:
-        return 0.0
-
-    return max(Ixx, Iyy) / min(Ixx, Iyy)
+    return CrownAnalysis.from_tree(tree, min_height_ratio).asymmetry_inertia
 
 
 # -------------------------------------------------
@@ -141,15 +213,4 @@ def crown_metrics(tree, min_height_ratio=0.6):
     Zwraca wszystkie metryki korony w jednym słowniku.
     Height jest liczony względem korzenia tylko w tych analizach.
     """
-    root_z = tree.nodes[0].z 
-    height_rel = max(n.z for n in tree.nodes) - root_z
-
-    return {
-        "height": height_rel,
-        "crown_volume": crown_volume(tree, min_height_ratio),
-        "asymmetry_radius": asymmetry_radius(tree, min_height_ratio),
-        "asymmetry_pca": asymmetry_pca(tree, min_height_ratio),
-        "asymmetry_hemispheres": asymmetry_hemispheres(tree, min_height_ratio),
-        "asymmetry_inertia": asymmetry_inertia(tree, min_height_ratio),
-    }
-
+    return CrownAnalysis.from_tree(tree, min_height_ratio).metrics()
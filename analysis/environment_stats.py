@@ -1,51 +1,33 @@
-import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 from scipy.spatial import KDTree
 from scipy.stats import pearsonr, spearmanr
 
-from analysis.canopy import canopy_hull
-from analysis.crown_metrics import crown_metrics
+from analysis.forest_metrics import forest_crown_metrics
 
 
-def crown_radius(tree):
-    hull = canopy_hull(tree)
-    if hull is None:
-        return 0.0
-
-    center = hull.mean(axis=0)
-    radii = np.linalg.norm(hull - center, axis=1)
-    return radii.mean()
-
 def build_tree_dataframe(forest, terrain):
-    records = []
-
-    for tree in forest.trees:
-        metrics = crown_metrics(tree)
-
-        x, y, _ = tree.nodes[0].position()
-
-        record = {
-            "tree_id": tree.tree_id,
-            "x": x,
-            "y": y,
+    crowns = forest_crown_metrics(forest)
 
-            "height": metrics["height"],
-            "crown_volume": metrics["crown_volume"],
-            "crown_radius": crown_radius(tree),
+    x, y = crowns["x"], crowns["y"]
 
-            "asymmetry_pca": metrics["asymmetry_pca"],
-            "asymmetry_inertia": metrics["asymmetry_inertia"],
-            "asymmetry_hemispheres": metrics["asymmetry_hemispheres"],
+    return pd.DataFrame({
+        "tree_id": crowns["tree_id"],
+        "x": x,
+        "y": y,
 
-            "slope": terrain.slope(x, y),
-            "moisture": terrain.moisture(x, y),
-        }
+        "height": crowns["height"],
+        "crown_volume": crowns["crown_volume"],
+        "crown_radius": crowns["crown_radius"],
 
-        records.append(record)
+        "asymmetry_pca": crowns["asymmetry_pca"],
+        "asymmetry_inertia": crowns["asymmetry_inertia"],
+        "asymmetry_hemispheres": crowns["asymmetry_hemispheres"],
 
-    return pd.DataFrame(records)
+        "slope": terrain.slope(x, y),
+        "moisture": terrain.moisture(x, y),
+    })
 
 def add_neighbor_distances(df):
     xy = df[["x", "y"]].values
@@ -0,0 +1,138 @@
+import numpy as np
+from scipy.spatial import ConvexHull
+
+
+# -------------------------------------------------
+# Node'y całego lasu jako jedna tablica
+# -------------------------------------------------
+
+def forest_node_arrays(forest):
+    """
+    Zwraca (positions, tree_index, offsets):
+    - positions: (N, 3) node'y wszystkich drzew, drzewo po drzewie,
+    - tree_index: (N,) indeks drzewa w forest.trees dla każdego node'a,
+    - offsets: (T,) początek segmentu każdego drzewa w positions.
+    """
+    arrays = [tree.node_positions() for tree in forest.trees]
+    counts = np.array([len(a) for a in arrays], dtype=int)
+
+    if not arrays:
+        return np.empty((0, 3)), np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+    positions = np.concatenate(arrays)
+    tree_index = np.repeat(np.arange(len(arrays)), counts)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    return positions, tree_index, offsets
+
+
+# -------------------------------------------------
+# Metryki koron wszystkich drzew naraz
+# -------------------------------------------------
+
+def forest_crown_metrics(forest, min_height_ratio=0.6) -> dict:
+    """
+    Metryki koron (jak CrownAnalysis) dla wszystkich drzew w jednym przebiegu.
+
+    Wysokości, progi korony, środki, PCA, bezwładność i półkule liczone są
+    redukcjami segmentowymi (reduceat / bincount) na złączonej tablicy
+    node'ów. Tylko objętość i promień korony (convex hull) liczone są
+    osobno dla każdego drzewa.
+
+    Zwraca słownik kolumn -> tablice (T,), gotowy do pd.DataFrame(...).
+    """
+    positions, seg, offsets = forest_node_arrays(forest)
+    n_trees = len(offsets)
+
+    x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
+
+    # ---- wysokości i próg korony ----
+    z_max = np.maximum.reduceat(z, offsets) if n_trees else np.empty(0)
+    z_min = np.minimum.reduceat(z, offsets) if n_trees else np.empty(0)
+    root = positions[offsets]
+
+    threshold = z_min + min_height_ratio * (z_max - z_min)
+    in_canopy = z >= threshold[seg]
+
+    # node z z_max zawsze spełnia próg => każdy segment korony jest niepusty
+    cs = seg[in_canopy]
+    cx_all, cy_all = x[in_canopy], y[in_canopy]
+    n_canopy = np.bincount(cs, minlength=n_trees)
+    canopy_offsets = np.concatenate([[0], np.cumsum(n_canopy)[:-1]]).astype(int)
+
+    # ---- środki i momenty 2D ----
+    with np.errstate(invalid="ignore", divide="ignore"):
+        center_x = np.bincount(cs, weights=cx_all, minlength=n_trees) / n_canopy
+        center_y = np.bincount(cs, weights=cy_all, minlength=n_trees) / n_canopy
+
+    dx = cx_all - center_x[cs]
+    dy = cy_all - center_y[cs]
+
+    sxx = np.bincount(cs, weights=dx * dx, minlength=n_trees)
+    syy = np.bincount(cs, weights=dy * dy, minlength=n_trees)
+    sxy = np.bincount(cs, weights=dx * dy, minlength=n_trees)
+
+    enough = n_canopy >= 3
+
+    # ---- asymetria promienia ----
+    dist = np.hypot(dx, dy)
+    asym_radius = np.zeros(n_trees)
+    if n_trees:
+        d_max = np.maximum.reduceat(dist, canopy_offsets)
+        d_min = np.minimum.reduceat(dist, canopy_offsets)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            asym_radius = np.where(enough, d_max / d_min, 0.0)
+
+    # ---- PCA: wartości własne kowariancji 2x2 (ddof=1 jak np.cov) ----
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ddof = np.maximum(n_canopy - 1, 1)
+        a, c, b = sxx / ddof, syy / ddof, sxy / ddof
+        half_trace = 0.5 * (a + c)
+        disc = np.sqrt(0.25 * (a - c) ** 2 + b * b)
+        eig_big = half_trace + disc
+        eig_small = half_trace - disc
+        asym_pca = np.where(enough & (eig_small > 1e-6), eig_big / eig_small, 0.0)
+
+    # ---- moment bezwładności ----
+    ixx, iyy = syy, sxx
+    i_min = np.minimum(ixx, iyy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asym_inertia = np.where(enough & (i_min > 1e-6), np.maximum(ixx, iyy) / i_min, 0.0)
+
+    # ---- półkule (lewo/prawo od środka) ----
+    left = np.bincount(cs, weights=(dx < 0), minlength=n_trees)
+    right = np.bincount(cs, weights=(dx > 0), minlength=n_trees)
+    total = left + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asym_hemi = np.where(enough & (total > 0), np.abs(left - right) / total, 0.0)
+
+    # ---- convex hull: osobno dla każdego drzewa ----
+    crown_volume = np.zeros(n_trees)
+    crown_radius = np.zeros(n_trees)
+    canopy_pts = positions[in_canopy]
+
+    for t in range(n_trees):
+        pts = canopy_pts[canopy_offsets[t]:canopy_offsets[t] + n_canopy[t]]
+
+        if len(pts) >= 4:
+            crown_volume[t] = ConvexHull(pts).volume
+
+        if len(pts) >= 3:
+            pts2d = pts[:, :2]
+            hull = pts2d[ConvexHull(pts2d).vertices]
+            crown_radius[t] = np.linalg.norm(hull - hull.mean(axis=0), axis=1).mean()
+
+    return {
+        "tree_id": np.array([tree.tree_id for tree in forest.trees], dtype=int),
+        "x": root[:, 0],
+        "y": root[:, 1],
+        "n_nodes": np.diff(np.append(offsets, len(positions))),
+        "n_canopy": n_canopy,
+        "height": z_max - root[:, 2],
+        "crown_volume": crown_volume,
+        "crown_radius": crown_radius,
+        "asymmetry_radius": asym_radius,
+        "asymmetry_pca": asym_pca,
+        "asymmetry_hemispheres": asym_hemi,
+        "asymmetry_inertia": asym_inertia,
+    }
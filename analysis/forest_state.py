@@ -1,35 +1,193 @@
+"""
+Tablice opisujące stan lasu, liczone przyrostowo.
+
+Każde drzewo ma licznik version (Tree.add_node) i log zajętych AP
+(Tree.claimed_ap_indices). ForestState pamięta, do jakiej wersji doszedł
+dla każdego drzewa, i przy kolejnym odczycie dopisuje tylko nowe node'y,
+krawędzie i zajęte AP. Drzewa, które nie urosły, nie kosztują nic.
+
+Krawędzie powstają z indeksów rodziców: segment k łączy node k+1 z jego
+rodzicem (Tree.add_node dopisuje krawędzie w kolejności node'ów).
+
+Zakłada się, że claimed_by zmienia się tylko w Tree.grow – zmiany
+wprowadzone z zewnątrz wymagają ForestState.reset().
+"""
+
 import numpy as np
 
+
+def _readonly(arr):
+    arr.setflags(write=False)
+    return arr
+
+
+class _AppendArray:
+    """
+    Tablica tylko do dopisywania z podwajaną pojemnością (jak
+    scene_buffers.GrowableArray), więc wzrost kosztuje O(nowe wiersze),
+    a nie kopię całości. Widoki view() wydane wcześniej (snapshoty)
+    pozostają poprawne: dopisywanie nie zmienia prefiksu, a po powiększeniu
+    stare widoki wskazują na poprzednią tablicę.
+    """
+
+    def __init__(self, row_shape=(), dtype=float, capacity=256):
+        self.data = np.empty((capacity, *row_shape), dtype=dtype)
+        self.size = 0
+
+    def append(self, rows):
+        end = self.size + len(rows)
+        if end > len(self.data):
+            capacity = len(self.data)
+            while capacity < end:
+                capacity *= 2
+            grown = np.empty((capacity, *self.data.shape[1:]), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = rows
+        self.size = end
+
+    def view(self) -> np.ndarray:
+        """Pierwsze size wierszy, tylko do odczytu."""
+        return _readonly(self.data[:self.size])
+
+
+class _TreeCache:
+    def __init__(self):
+        self.version = -1
+        self.n_nodes = 0
+        self._parents = _AppendArray(dtype=int)
+        self._edges = _AppendArray((3,))
+        self.parents = self._parents.view()
+        self.edges = self._edges.view()
+        self.height = -np.inf
+        self.n_claims = 0
+
+
 class ForestState:
     def __init__(self, forest):
         self.forest = forest
+        self.reset()
+
+    def reset(self):
+        """Zapomina wszystkie cache (np. po ręcznej zmianie claimed_by)."""
+        self._trees: dict[int, _TreeCache] = {}
+        self._ap_xyz = None
+        self._ap_owner = None
+        # globalna lista zmian: indeksy AP w kolejności zajmowania (prefiks [:n] się nie zmienia)
+        self._ap_claims = _AppendArray(dtype=int, capacity=1024)
+        self._ap_version = 0
+
+    # -------------------------------------------------
+    # Wersje
+    # -------------------------------------------------
+
+    @property
+    def ap_version(self) -> int:
+        """Liczba zajęć AP zarejestrowanych w pulach drzew."""
+        return sum(len(tree.claimed_ap_indices) for tree in self.forest.trees)
+
+    def versions(self) -> tuple:
+        return tuple(tree.version for tree in self.forest.trees) + (self.ap_version,)
+
+    # -------------------------------------------------
+    # Drzewa
+    # -------------------------------------------------
+
+    def _entry(self, tree) -> _TreeCache:
+        cache = self._trees.get(tree.tree_id)
+        if cache is None:
+            cache = self._trees[tree.tree_id] = _TreeCache()
+        return cache
+
+    def _tree(self, tree) -> _TreeCache:
+        cache = self._entry(tree)
+        if cache.version == tree.version:
+            return cache
+
+        positions = tree.node_positions()
+        start, n = cache.n_nodes, len(positions)
+
+        if n > start:
+            new_parents = np.array(
+                [tree.nodes[i].parent for i in range(max(start, 1), n)], dtype=int
+            )
+            cache._parents.append(new_parents)
+            cache.parents = cache._parents.view()
+
+            # segmenty (rodzic, dziecko) tylko dla nowych node'ów
+            children = np.arange(max(start, 1), n)
+            segments = np.empty((2 * len(children), 3))
+            segments[0::2] = positions[new_parents]
+            segments[1::2] = positions[children]
+            cache._edges.append(segments)
+            cache.edges = cache._edges.view()
+
+            cache.height = max(cache.height, positions[start:, 2].max())
+
+        cache.n_nodes = n
+        cache.version = tree.version
+        return cache
 
     def tree_nodes(self):
-        return {
-            tree.tree_id: np.array([n.position() for n in tree.nodes])
-            for tree in self.forest.trees
-        }
+        return {tree.tree_id: tree.node_positions() for tree in self.forest.trees}
 
     def tree_edges(self):
-        result = {}
-        for tree in self.forest.trees:
-            edges = []
-            for i, j in tree.edges:
-                edges.append(tree.nodes[i].position())
-                edges.append(tree.nodes[j].position())
-            result[tree.tree_id] = np.array(edges)
-        return result
+        return {tree.tree_id: self._tree(tree).edges for tree in self.forest.trees}
+
+    def tree_parents(self):
+        """Indeks rodzica dla node'ów 1..N-1 każdego drzewa."""
+        return {tree.tree_id: self._tree(tree).parents for tree in self.forest.trees}
 
     def tree_heights(self):
-        return {
-            tree.tree_id: max(n.z for n in tree.nodes)
-            for tree in self.forest.trees
-        }
+        return {tree.tree_id: self._tree(tree).height for tree in self.forest.trees}
+
+    # -------------------------------------------------
+    # Attraction points
+    # -------------------------------------------------
+
+    def _update_aps(self):
+        aps = self.forest.attraction_points
+
+        if self._ap_xyz is None or len(self._ap_xyz) != len(aps):
+            self._ap_xyz = _readonly(np.array([[p.x, p.y, p.z] for p in aps], dtype=float).reshape(-1, 3))
+            self._ap_owner = np.array(
+                [-1 if p.claimed_by is None else p.claimed_by for p in aps], dtype=int
+            )
+            # nowy bufor – widoki starej listy (snapshoty) zostają nietknięte
+            self._ap_claims = _AppendArray(dtype=int, capacity=1024)
+            self._ap_claims.append(np.flatnonzero(self._ap_owner >= 0))
+            for tree in self.forest.trees:
+                self._entry(tree).n_claims = len(tree.claimed_ap_indices)
+            self._ap_version = self.ap_version
+            return
+
+        if self._ap_version == self.ap_version:
+            return
+
+        for tree in self.forest.trees:
+            cache = self._entry(tree)
+            new_claims = tree.claimed_ap_indices[cache.n_claims:]
+            if new_claims:
+                self._ap_owner[new_claims] = tree.tree_id
+                self._ap_claims.append(new_claims)
+                cache.n_claims = len(tree.claimed_ap_indices)
+
+        self._ap_version = self.ap_version
+
+    def attraction_points_3d(self):
+        """(pozycje (M, 3), właściciel (M,) albo -1). Właściciel jest kopią."""
+        self._update_aps()
+        return self._ap_xyz, self._ap_owner.copy()
+
+    def ap_claims(self) -> np.ndarray:
+        """
+        Indeksy zajętych AP w kolejności zajmowania (tylko do odczytu).
+        Lista tylko rośnie: odbiorca pamięta, ile pozycji już obsłużył,
+        i przy kolejnym odczycie bierze ogon ap_claims()[n:].
+        """
+        self._update_aps()
+        return self._ap_claims.view()
 
     def attraction_points_2d(self):
-        xy = np.array([[p.x, p.y] for p in self.forest.attraction_points])
-        owner = np.array([
-            -1 if p.claimed_by is None else p.claimed_by
-            for p in self.forest.attraction_points
-        ])
-        return xy, owner
+        xyz, owner = self.attraction_points_3d()
+        return xyz[:, :2], owner
@@ -0,0 +1,74 @@
+import numpy as np
+from scipy.spatial import KDTree
+
+from structures.attraction_point import attraction_point_array
+
+
+# -------------------------------------------------
+# Zliczanie punktów w promieniu (KDTree, jedno zapytanie wsadowe)
+# -------------------------------------------------
+
+def count_within(centers, points, radius) -> np.ndarray:
+    """
+    Dla każdego środka (M, 3) liczba punktów (N, 3) w odległości <= radius.
+    radius może być liczbą albo tablicą (M,) – osobny promień dla każdego środka.
+    Koszt O((M + N) log N) zamiast O(M * N).
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+
+    if not len(centers):
+        return np.zeros(0, dtype=int)
+    if not len(points):
+        return np.zeros(len(centers), dtype=int)
+
+    counts = KDTree(points).query_ball_point(centers, r=radius, return_length=True)
+    return np.asarray(counts, dtype=int)
+
+
+def _trunk_positions(trees):
+    """Pozycje końców pni (T, 3) i maska drzew, które mają już pień."""
+    has_trunk = np.array([t.trunk_end is not None for t in trees], dtype=bool)
+    positions = np.array(
+        [t.trunk_end.position() if t.trunk_end is not None else (np.nan,) * 3 for t in trees],
+        dtype=float,
+    ).reshape(-1, 3)
+    return positions, has_trunk
+
+
+# -------------------------------------------------
+# Metryki drzew do post-processingu eksperymentów
+# -------------------------------------------------
+
+def count_ap_in_growth_radius(trees, attraction_points) -> np.ndarray:
+    """
+    Liczba AP (zajętych i wolnych) w zasięgu wzrostu pnia każdego drzewa.
+    Promień to tree.growth_radius(), więc TreeNoRadius liczy praktycznie wszystkie AP.
+    """
+    ap_positions = attraction_points
+    if not isinstance(ap_positions, np.ndarray):
+        ap_positions = attraction_point_array(attraction_points)
+
+    trunks, has_trunk = _trunk_positions(trees)
+    counts = np.zeros(len(trees), dtype=int)
+
+    if has_trunk.any():
+        radii = np.array([t.growth_radius() for t, ok in zip(trees, has_trunk) if ok])
+        counts[has_trunk] = count_within(trunks[has_trunk], ap_positions, radii)
+
+    return counts
+
+
+def count_neighboring_trees(trees, radius=8.0) -> np.ndarray:
+    """
+    Liczba innych drzew w promieniu radius od pnia każdego drzewa (konkurencja).
+    Drzewa bez pnia nie są liczone i same dostają 0.
+    """
+    trunks, has_trunk = _trunk_positions(trees)
+    counts = np.zeros(len(trees), dtype=int)
+
+    if has_trunk.any():
+        # -1: każde drzewo znajduje samo siebie
+        counts[has_trunk] = count_within(trunks[has_trunk], trunks[has_trunk], radius) - 1
+
+    return counts
@@ -2,7 +2,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 from analysis.terrain_dem import terrain_dem
-from analysis.canopy import canopy_hull
+from analysis.canopy_raster import rasterize_canopy
 
 
 def plot_dem(terrain):
@@ -38,21 +38,23 @@ def plot_seed_points(attraction_points):
     plt.axis("equal")
 
 
-def plot_canopy_footprints(forest):
-    plt.figure(figsize=(6, 6))
+def plot_canopy_raster(forest, terrain, size=20.0, resolution=200):
+    """CHM i mapa właścicieli komórek (luki = białe, nakładanie = kontur)."""
+    raster = rasterize_canopy(forest, terrain, size=size, resolution=resolution)
+    extent = raster.extent()
 
-    n = max(1, len(forest.trees))
-    cmap = plt.get_cmap("tab20")
+    fig, (ax_chm, ax_owner) = plt.subplots(1, 2, figsize=(12, 5))
 
-    for i, tree in enumerate(forest.trees):
-        hull = canopy_hull(tree)
-        if hull is None:
-            continue
+    im = ax_chm.imshow(raster.chm, extent=extent, origin="lower", cmap="viridis")
+    fig.colorbar(im, ax=ax_chm, label="Canopy height above ground")
+    ax_chm.set_title(f"Canopy Height Model (cover {raster.cover_fraction:.0%})")
 
-        poly = np.vstack([hull, hull[0]])
-        plt.plot(poly[:, 0], poly[:, 1], linewidth=1.5, color=cmap(i % 20))
+    owner = np.ma.masked_less(raster.owner, 0)
+    ax_owner.imshow(owner % 20, extent=extent, origin="lower", cmap="tab20", vmin=0, vmax=19, interpolation="nearest")
+    ax_owner.contour(raster.xs, raster.ys, raster.n_trees > 1, levels=[0.5], colors="black", linewidths=0.8)
+    ax_owner.set_title(f"Canopy owners (overlap {raster.overlap_fraction:.0%})")
 
-    plt.title("Tree Canopy Footprints (Convex Hull)")
-    plt.xlabel("X")
-    plt.ylabel("Y")
-    plt.axis("equal")
\ No newline at end of file
+    for ax in (ax_chm, ax_owner):
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+        ax.set_aspect("equal")
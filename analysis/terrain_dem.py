@@ -1,13 +1,151 @@
+"""
+Rastry terenu (DEM, nachylenie, wilgotność, nasłonecznienie) na siatce XY.
+
+Cała siatka liczona jest jednym wywołaniem na tablicach (Terrain.height,
+slope i moisture działają też na tablicach numpy), a wyniki są pamiętane
+według (parametry terenu, size, resolution[, pozycja słońca]). Kolejne
+wykresy i siatki dla tego samego terenu nie liczą niczego od nowa.
+Cache jest ograniczony łącznym rozmiarem tablic (_CACHE_BYTES), najdawniej
+używane rastry są usuwane jako pierwsze.
+
+Zwracane tablice są tylko do odczytu, bo są współdzielone przez cache.
+"""
+
+from collections import OrderedDict
+
 import numpy as np
 
-def terrain_dem(terrain, size=20.0, resolution=200):
-    xs = np.linspace(-size, size, resolution)
-    ys = np.linspace(-size, size, resolution)
 
-    Z = np.zeros((resolution, resolution))
+# krok różnic centralnych – jak w Terrain.slope / Terrain.sunlight
+_EPS = 0.1
+
+
+def terrain_key(terrain):
+    """Hashowalny klucz parametrów terenu (do cache'owania pochodnych danych)."""
+    return type(terrain).__qualname__, tuple(sorted(vars(terrain).items()))
+
+
+class ArrayCache:
+    """
+    Cache LRU tablic numpy ograniczony łącznym rozmiarem (nbytes), a nie
+    liczbą wpisów – jeden raster 2000 × 2000 waży tyle co sto małych.
+    Wartość to tablica albo krotka tablic; po zapisaniu jest tylko do odczytu.
+    Wartość większa niż cały limit jest zwracana, ale nie zapamiętywana.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def _arrays(value):
+        return value if isinstance(value, tuple) else (value,)
+
+    def get(self, key, compute):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        value = compute()
+        size = 0
+        for arr in self._arrays(value):
+            arr.setflags(write=False)
+            size += arr.nbytes
+        if size > self.max_bytes:
+            return value
+
+        self._entries[key] = value
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self.nbytes -= sum(arr.nbytes for arr in self._arrays(old))
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+
+_CACHE_BYTES = 256 * 2**20
+_cache = ArrayCache(_CACHE_BYTES)
+
+
+def _cached(key, compute):
+    return _cache.get(key, compute)
 
-    for i, x in enumerate(xs):
-        for j, y in enumerate(ys):
-            Z[j, i] = terrain.height(x, y)
 
-    return xs, ys, Z
+def clear_dem_cache():
+    _cache.clear()
+
+
+# -------------------------------------------------
+# Siatka i rastry
+# -------------------------------------------------
+
+def dem_grid(size=20.0, resolution=200):
+    """xs, ys (resolution,) oraz X, Y (resolution, resolution), X[j, i] = xs[i]."""
+    def compute():
+        xs = np.linspace(-size, size, resolution)
+        ys = np.linspace(-size, size, resolution)
+        X, Y = np.meshgrid(xs, ys)
+        return xs, ys, X, Y
+
+    return _cached(("grid", size, resolution), compute)
+
+
+def _sunlight(terrain, X, Y, Z, sun):
+    """Wektorowa wersja Terrain.sunlight (ten sam wzór)."""
+    dzdx = (terrain.height(X + _EPS, Y) - terrain.height(X - _EPS, Y)) / (2 * _EPS)
+    dzdy = (terrain.height(X, Y + _EPS) - terrain.height(X, Y - _EPS)) / (2 * _EPS)
+
+    normal = np.stack([-dzdx, -dzdy, np.ones_like(Z)], axis=-1)
+    normal /= np.linalg.norm(normal, axis=-1, keepdims=True) + 1e-6
+
+    to_sun = sun.position - np.stack([X, Y, Z], axis=-1)
+    dist = np.linalg.norm(to_sun, axis=-1, keepdims=True)
+    light_dir = np.where(dist < 1e-6, (0.0, 0.0, 1.0), to_sun / np.maximum(dist, 1e-6))
+
+    return np.clip((normal * light_dir).sum(axis=-1), 0.05, 1.0)
+
+
+def terrain_raster(terrain, layer="height", size=20.0, resolution=200, sun=None):
+    """
+    Jeden raster (resolution, resolution) w układzie Z[j, i] = f(xs[i], ys[j]):
+    layer = "height" | "slope" | "moisture" | "sunlight" (wymaga sun).
+    """
+    key = (layer, terrain_key(terrain), size, resolution)
+    _, _, X, Y = dem_grid(size, resolution)
+
+    if layer == "height":
+        compute = lambda: terrain.height(X, Y)
+    elif layer == "slope":
+        compute = lambda: terrain.slope(X, Y, eps=_EPS)
+    elif layer == "moisture":
+        compute = lambda: terrain.moisture(X, Y)
+    elif layer == "sunlight":
+        if sun is None:
+            raise ValueError("raster 'sunlight' wymaga sun")
+        key += (tuple(sun.position),)
+        Z = terrain_raster(terrain, "height", size, resolution)
+        compute = lambda: _sunlight(terrain, X, Y, Z, sun)
+    else:
+        raise ValueError(f"nieznany raster: {layer}")
+
+    return _cached(key, lambda: np.asarray(compute(), dtype=float))
+
+
+def terrain_rasters(terrain, size=20.0, resolution=200, sun=None) -> dict:
+    """Wszystkie rastry naraz: xs, ys, height, slope, moisture (+ sunlight, jeśli podano sun)."""
+    xs, ys, _, _ = dem_grid(size, resolution)
+    layers = ["height", "slope", "moisture"] + (["sunlight"] if sun is not None else [])
+
+    rasters = {"xs": xs, "ys": ys}
+    for layer in layers:
+        rasters[layer] = terrain_raster(terrain, layer, size, resolution, sun)
+    return rasters
+
+
+def terrain_dem(terrain, size=20.0, resolution=200):
+    xs, ys, _, _ = dem_grid(size, resolution)
+    return xs, ys, terrain_raster(terrain, "height", size, resolution)
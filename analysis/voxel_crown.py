@@ -0,0 +1,167 @@
+"""
+Objętość korony z zajętości wokseli (alternatywa dla ConvexHull).
+
+Każdy node jest "pogrubiany" do kuli o promieniu dilation i zapisywany
+jako zbiór wokseli o boku resolution. Objętość to liczba wokseli * resolution³,
+powierzchnia to liczba odsłoniętych ścian * resolution², a profil korony
+to liczba wokseli w każdej warstwie z. W przeciwieństwie do convex hull
+nie zawyża objętości wklęsłych koron.
+
+Woksele są trzymane jako posortowana tablica kluczy int64 (x, y, z
+upakowane po 21 bitów), więc dokładanie punktów i liczenie sąsiadów
+przez ścianę to np.unique + searchsorted, bez pętli w Pythonie.
+
+Zbiór jest aktualizowany przyrostowo: update(tree) dokłada tylko node'y
+dodane od poprzedniego wywołania, więc można go odświeżać w każdym kroku.
+To jest szybka ścieżka przy śledzeniu korony w trakcie wzrostu –
+voxel_crown_volume buduje zbiór od zera przy każdym wywołaniu.
+"""
+
+import numpy as np
+
+
+# upakowanie (x, y, z) w jeden int64: 21 bitów na oś, indeksy w [-2^20, 2^20)
+_BITS = 21
+_BIAS = 1 << (_BITS - 1)
+_MASK = (1 << _BITS) - 1
+
+# przesunięcia klucza do 6 sąsiadów przez ścianę
+_FACE_STEPS = np.array([1 << 2 * _BITS, 1 << _BITS, 1], dtype=np.int64)
+
+
+def _pack(ijk: np.ndarray) -> np.ndarray:
+    ijk = ijk.astype(np.int64) + _BIAS
+    return (ijk[:, 0] << 2 * _BITS) | (ijk[:, 1] << _BITS) | ijk[:, 2]
+
+
+def _unpack(keys: np.ndarray) -> np.ndarray:
+    return np.stack(
+        [(keys >> 2 * _BITS) & _MASK, (keys >> _BITS) & _MASK, keys & _MASK], axis=1
+    ) - _BIAS
+
+
+def _contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Maska: które keys są w posortowanej tablicy sorted_keys."""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    idx = np.searchsorted(sorted_keys, keys)
+    idx[idx == len(sorted_keys)] = 0
+    return sorted_keys[idx] == keys
+
+
+def _ball_offsets(radius_voxels: float) -> np.ndarray:
+    r = int(np.ceil(radius_voxels))
+    grid = np.arange(-r, r + 1)
+    offsets = np.stack(np.meshgrid(grid, grid, grid, indexing="ij"), axis=-1).reshape(-1, 3)
+    keep = (offsets ** 2).sum(axis=1) <= radius_voxels ** 2 + 1e-9
+    return offsets[keep]
+
+
+class VoxelCrown:
+    def __init__(self, resolution=0.25, dilation=0.5):
+        self.resolution = resolution
+        self.dilation = dilation
+
+        self._offsets = _ball_offsets(dilation / resolution)
+
+        # posortowane klucze zajętych wokseli
+        self.keys = np.empty(0, dtype=np.int64)
+        # indeks warstwy z -> liczba wokseli
+        self.layer_counts: dict[int, int] = {}
+        self.exposed_faces = 0
+
+        self._nodes_seen = 0
+
+    @classmethod
+    def from_tree(cls, tree, resolution=0.25, dilation=0.5):
+        crown = cls(resolution, dilation)
+        crown.update(tree)
+        return crown
+
+    # -------------------------------------------------
+    # Aktualizacja
+    # -------------------------------------------------
+
+    def add_points(self, points):
+        """Dokłada node'y (M, 3) do zbioru wokseli."""
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if not len(points):
+            return
+
+        centers = np.floor(points / self.resolution).astype(np.int64)
+        candidates = (centers[:, None, :] + self._offsets[None, :, :]).reshape(-1, 3)
+        new = np.unique(_pack(candidates))
+        new = new[~_contains(self.keys, new)]
+        if not len(new):
+            return
+
+        # nowy woksel odsłania 6 ścian, a każda para sąsiadów zakrywa po jednej
+        # ścianie z obu stron: pary nowy–stary liczone raz, nowy–nowy dwa razy
+        neighbours = (new[:, None, None] + np.array([1, -1])[:, None] * _FACE_STEPS).ravel()
+        old_pairs = np.count_nonzero(_contains(self.keys, neighbours))
+        new_pairs = np.count_nonzero(_contains(new, neighbours))
+        self.exposed_faces += 6 * len(new) - 2 * old_pairs - new_pairs
+
+        self.keys = np.insert(self.keys, np.searchsorted(self.keys, new), new)
+
+        layers, counts = np.unique(_unpack(new)[:, 2], return_counts=True)
+        for z, count in zip(layers.tolist(), counts.tolist()):
+            self.layer_counts[z] = self.layer_counts.get(z, 0) + count
+
+    def update(self, tree):
+        """Dokłada node'y drzewa dodane od ostatniego update."""
+        positions = tree.node_positions()
+        self.add_points(positions[self._nodes_seen:])
+        self._nodes_seen = len(positions)
+
+    # -------------------------------------------------
+    # Wyniki
+    # -------------------------------------------------
+
+    @property
+    def voxels(self) -> np.ndarray:
+        """(K, 3) indeksy zajętych wokseli."""
+        return _unpack(self.keys)
+
+    @property
+    def volume(self) -> float:
+        return len(self.keys) * self.resolution ** 3
+
+    @property
+    def surface_area(self) -> float:
+        return self.exposed_faces * self.resolution ** 2
+
+    def profile(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Profil korony: (z środka warstwy, pole przekroju warstwy),
+        od najniższej do najwyższej warstwy.
+        """
+        if not self.layer_counts:
+            return np.empty(0), np.empty(0)
+
+        layers = np.array(sorted(self.layer_counts))
+        counts = np.array([self.layer_counts[k] for k in layers], dtype=float)
+        return (layers + 0.5) * self.resolution, counts * self.resolution ** 2
+
+    def crown_volume(self, z_threshold: float) -> float:
+        """Objętość wokseli, których środek jest na wysokości >= z_threshold."""
+        z, area = self.profile()
+        return float(area[z >= z_threshold].sum() * self.resolution)
+
+
+def voxel_crown_volume(tree, min_height_ratio=0.6, resolution=0.25, dilation=0.5):
+    """
+    Objętość korony (node'y powyżej min_height_ratio wysokości drzewa,
+    jak w crown_volume) z zajętości wokseli. Woksele powstają tylko
+    z node'ów korony, więc pień i dolne gałęzie nie są pogrubiane.
+
+    Zbiór jest budowany od zera; przy liczeniu w każdym kroku wzrostu
+    szybciej jest trzymać VoxelCrown i wołać update(tree).
+    """
+    positions = tree.node_positions()
+    zs = positions[:, 2]
+    threshold = zs.min() + min_height_ratio * (zs.max() - zs.min())
+
+    crown = VoxelCrown(resolution, dilation)
+    crown.add_points(positions[zs >= threshold])
+    return crown.volume
@@ -0,0 +1,242 @@
+"""
+Przypadki benchmarków.
+
+Każdy przypadek to Benchmark(name, setup, run): setup przygotowuje stan
+(nie jest mierzony), run wykonuje mierzoną operację na tym stanie.
+Stany, które run modyfikuje (wzrost drzewa/lasu), są kopiowane z
+przygotowanego wcześniej szablonu, więc każde powtórzenie startuje
+z identycznego punktu.
+"""
+
+import copy
+import math
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from environment.terrain import Terrain
+from environment.sun import Sun
+from structures.attraction_point import (
+    attraction_points_from_array,
+    generate_attraction_points_from_terrain,
+)
+from structures.ap_cache import load_or_generate_ap_field
+from structures.random_streams import RunStreams
+from structures.tree import Tree
+from structures.forest import Forest
+
+from analysis.crown_metrics import crown_metrics
+from analysis.forest_state import ForestState
+from analysis.terrain_dem import clear_dem_cache, terrain_dem, terrain_rasters
+from visualization.scene_buffers import ForestBufferSync
+from visualization.simulation_worker import take_snapshot
+
+
+# rozmiary w trybie szybkim / pełnym (--full)
+TREE_NODE_COUNTS = {"quick": [50, 200], "full": [50, 200, 800, 2000]}
+FOREST_TREE_COUNTS = {"quick": [1, 4, 16], "full": [1, 4, 16, 64, 256]}
+AP_CANDIDATES = {"quick": [10_000], "full": [10_000, 100_000, 1_000_000]}
+SCENE_TREE_COUNT = {"quick": 4, "full": 16}
+
+SEED = 1234
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+    repeat: int = 5
+
+
+# -------------------------------------------------
+# Wspólne fixture'y
+# -------------------------------------------------
+
+def _environment():
+    return Terrain(scale=8.0, height_amp=2.0), Sun(position=(30.0, 0.0, 30.0))
+
+
+def _attraction_points(terrain, sun, n_candidates, area_size):
+    positions = load_or_generate_ap_field(
+        terrain, sun, SEED,
+        n_candidates=n_candidates,
+        area_size=area_size,
+        trunk_height=4.0,
+    )
+    return attraction_points_from_array(positions)
+
+
+def _tree_grid(num_trees, spacing=1.5):
+    grid_size = math.ceil(math.sqrt(num_trees))
+    positions = []
+    for i in range(grid_size):
+        for j in range(grid_size):
+            if len(positions) < num_trees:
+                x = i * spacing - (grid_size - 1) * spacing / 2
+                y = j * spacing - (grid_size - 1) * spacing / 2
+                positions.append((x, y))
+    return positions
+
+
+def build_forest(num_trees, n_candidates=25000, area_size=20.0, spacing=1.5):
+    terrain, sun = _environment()
+    attraction_points = _attraction_points(terrain, sun, n_candidates, area_size)
+
+    trees = []
+    for tree_id, (x, y) in enumerate(_tree_grid(num_trees, spacing)):
+        trees.append(Tree(
+            root_position=(x, y, terrain.height(x, y)),
+            attraction_points=attraction_points,
+            terrain=terrain,
+            tree_id=tree_id,
+            influence_radius=3.0,
+            kill_radius=1.0,
+            step_size=0.5,
+        ))
+
+    return Forest(trees, attraction_points)
+
+
+def grow_single_tree(target_nodes, max_steps=3000):
+    """Jedno drzewo (jak w exp2) wyhodowane do ~target_nodes node'ów."""
+    forest = build_forest(1, n_candidates=15000, area_size=12.0)
+    tree = forest.trees[0]
+    # limit AP wyłączony, żeby dało się dojść do dużych drzew
+    tree.max_attraction_points = float("inf")
+
+    for _ in range(max_steps):
+        if len(tree.nodes) >= target_nodes:
+            break
+        forest.grow()
+
+    return forest
+
+
+def grown_forest(num_trees, steps):
+    forest = build_forest(num_trees)
+    for _ in range(steps):
+        forest.grow()
+    return forest
+
+
+def _once(factory):
+    """setup, który buduje stan przy pierwszym użyciu i potem go zwraca."""
+    state = []
+
+    def setup():
+        if not state:
+            state.append(factory())
+        return state[0]
+
+    return setup
+
+
+def _copying(template_factory):
+    """setup, który buduje szablon raz, a potem podaje jego kopie."""
+    template = _once(template_factory)
+    return lambda: copy.deepcopy(template())
+
+
+def _scene_after_step(template_factory):
+    """
+    setup dla scene_sync: kopia lasu z ForestState i buforami sceny
+    zsynchronizowanymi z poprzednim snapshotem, potem jeden krok wzrostu.
+    """
+    template = _once(template_factory)
+
+    def setup():
+        forest = copy.deepcopy(template())
+        state, buffers = ForestState(forest), ForestBufferSync()
+        snapshot = take_snapshot(forest, state, 0)
+        buffers.sync(snapshot.nodes, snapshot.parents)
+        forest.grow()
+        return forest, state, buffers
+
+    return setup
+
+
+def _scene_sync(scene):
+    # to, co robią SimulationWorker (publikacja) i TreeScene (sync) po kroku
+    forest, state, buffers = scene
+    snapshot = take_snapshot(forest, state, 1)
+    return buffers.sync(snapshot.nodes, snapshot.parents)
+
+
+def _uncached_terrain_dem(terrain):
+    clear_dem_cache()
+    return terrain_dem(terrain)
+
+
+def _uncached_terrain_rasters(terrain):
+    # bez czyszczenia cache mierzylibyśmy tylko odczyt ze słownika
+    clear_dem_cache()
+    return terrain_rasters(terrain, resolution=2000)
+
+
+# -------------------------------------------------
+# Lista przypadków
+# -------------------------------------------------
+
+def benchmark_cases(mode="quick") -> list[Benchmark]:
+    cases = []
+
+    # ---- Tree.grow: jeden krok przy rosnącej liczbie node'ów ----
+    for n in TREE_NODE_COUNTS[mode]:
+        cases.append(Benchmark(
+            name=f"tree_grow_step[nodes={n}]",
+            setup=_copying(lambda n=n: grow_single_tree(n).trees[0]),
+            run=lambda tree: tree.grow(),
+        ))
+
+    # ---- Forest.grow: jeden krok lasu tuż po wyrośnięciu pni ----
+    for t in FOREST_TREE_COUNTS[mode]:
+        cases.append(Benchmark(
+            name=f"forest_grow_step[trees={t}]",
+            setup=_copying(lambda t=t: grown_forest(t, steps=10)),
+            run=lambda forest: forest.grow(),
+            repeat=3 if t >= 64 else 5,
+        ))
+
+    # ---- generowanie attraction points ----
+    for c in AP_CANDIDATES[mode]:
+        terrain, sun = _environment()
+        cases.append(Benchmark(
+            name=f"generate_attraction_points[candidates={c}]",
+            setup=lambda: RunStreams(SEED).ap,
+            run=lambda rng, c=c, terrain=terrain, sun=sun: generate_attraction_points_from_terrain(
+                terrain, sun, n_candidates=c, area_size=20.0, trunk_height=4.0, rng=rng
+            ),
+            repeat=1 if c >= 100_000 else 3,
+        ))
+
+    # ---- analiza ----
+    cases.append(Benchmark(
+        name="crown_metrics[nodes~400]",
+        setup=_once(lambda: grow_single_tree(400).trees[0]),
+        run=crown_metrics,
+    ))
+
+    # nazwa sprzed cache rastrów – porównywalna ze starymi plikami bazowymi
+    cases.append(Benchmark(
+        name="terrain_dem[resolution=200]",
+        setup=lambda: _environment()[0],
+        run=_uncached_terrain_dem,
+        repeat=3,
+    ))
+
+    cases.append(Benchmark(
+        name="terrain_rasters[resolution=2000]",
+        setup=lambda: _environment()[0],
+        run=_uncached_terrain_rasters,
+        repeat=3,
+    ))
+
+    # ---- publikacja snapshotu i synchronizacja buforów sceny po kroku ----
+    scene_trees = SCENE_TREE_COUNT[mode]
+    cases.append(Benchmark(
+        name=f"scene_sync[trees={scene_trees}]",
+        setup=_scene_after_step(lambda: grown_forest(scene_trees, steps=60)),
+        run=_scene_sync,
+    ))
+
+    return cases
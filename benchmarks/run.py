@@ -0,0 +1,150 @@
+"""
+Uruchamianie benchmarków i porównywanie wyników między commitami.
+
+    python -m benchmarks.run                          # szybki zestaw
+    python -m benchmarks.run --full --out base.json   # pełny zestaw
+    python -m benchmarks.run --compare base.json      # + porównanie
+
+Wynik to JSON z metadanymi (commit, wersje bibliotek) i czasami
+(min / median / mean w sekundach) dla każdego przypadku. Porównanie
+zgłasza regresję, gdy mediana wzrosła o więcej niż --threshold
+(domyślnie 15%), a także przypadki obecne tylko w pliku bazowym albo
+tylko w bieżącym przebiegu; wtedy kod wyjścia to 1.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy
+
+from benchmarks.cases import benchmark_cases
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(bench) -> dict:
+    times = []
+    for _ in range(bench.repeat):
+        state = bench.setup()
+        t0 = time.perf_counter()
+        bench.run(state)
+        times.append(time.perf_counter() - t0)
+
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "repeat": bench.repeat,
+    }
+
+
+def run_suite(mode="quick", name_filter=None) -> dict:
+    results = {}
+
+    for bench in benchmark_cases(mode):
+        if name_filter and name_filter not in bench.name:
+            continue
+
+        res = run_benchmark(bench)
+        results[bench.name] = res
+        print(f"{bench.name:<50} median={res['median'] * 1e3:10.3f} ms  min={res['min'] * 1e3:10.3f} ms")
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "mode": mode,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold=0.15, name_filter=None) -> list[str]:
+    """
+    Zwraca nazwy przypadków, których mediana pogorszyła się ponad próg,
+    oraz przypadków obecnych tylko w jednym z plików (zmiana nazwy albo
+    usunięty przypadek nie może po cichu zniknąć z porównania).
+    """
+    regressions = []
+
+    base_results = {
+        name: res for name, res in baseline["results"].items()
+        if not name_filter or name_filter in name
+    }
+
+    print(f"\n{'benchmark':<50} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for name, new in current["results"].items():
+        old = base_results.get(name)
+        if old is None:
+            continue
+
+        ratio = new["median"] / old["median"] if old["median"] > 0 else float("inf")
+        flag = ""
+        if ratio > 1.0 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+
+        print(
+            f"{name:<50} {old['median'] * 1e3:10.3f} {new['median'] * 1e3:10.3f} "
+            f"{ratio:7.2f}{flag}"
+        )
+
+    missing = sorted(base_results.keys() - current["results"].keys())
+    added = sorted(current["results"].keys() - base_results.keys())
+    for name in missing:
+        print(f"{name:<50} brak w bieżącym przebiegu  MISSING")
+    for name in added:
+        print(f"{name:<50} brak w pliku bazowym  NEW")
+
+    return regressions + missing + added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki symulacji koron drzew")
+    parser.add_argument("--full", action="store_true", help="pełne rozmiary (wolne)")
+    parser.add_argument("--filter", default=None, help="tylko przypadki zawierające tekst")
+    parser.add_argument("--out", default="bench_results.json", help="plik wynikowy JSON")
+    parser.add_argument("--compare", default=None, help="JSON bazowy do porównania")
+    parser.add_argument("--threshold", type=float, default=0.15, help="próg regresji (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    report = run_suite("full" if args.full else "quick", args.filter)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWyniki zapisane do {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        regressions = compare(baseline, report, args.threshold, args.filter)
+        if regressions:
+            print(f"\n{len(regressions)} regresji powyżej {args.threshold:.0%} lub przypadków bez pary")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
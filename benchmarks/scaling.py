@@ -0,0 +1,212 @@
+"""
+Harness skalowania: jak symulacja zachowuje się dla dużych lasów.
+
+Od konfiguracji bazowej (16 drzew, 25k kandydatów AP, area_size=20)
+zmieniamy po jednym wymiarze:
+- trees      – liczba drzew w siatce,
+- density    – liczba kandydatów AP przy stałym obszarze,
+- area       – rozmiar obszaru przy stałej gęstości AP.
+
+Mierzone jest config["steps"] kroków po wyrośnięciu pni. Każda
+konfiguracja działa w osobnym procesie (spawn), więc peak RSS
+dotyczy tylko tej konfiguracji. Zapisywane są: kroki/s, node'y/s,
+peak RSS, udział faz wzrostu (GrowthProfiler) i opcjonalnie największe
+alokacje z tracemalloc (--tracemalloc, spowalnia symulację).
+Na końcu liczony jest wykładnik skalowania (nachylenie log-log) czasu kroku
+i pamięci względem parametru każdego wymiaru.
+
+    python -m benchmarks.scaling --out scaling.json
+    python -m benchmarks.scaling --full --tracemalloc
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+BASE = {"trees": 16, "n_candidates": 25000, "area_size": 20.0}
+
+SWEEPS = {
+    "quick": {
+        "trees": [4, 16, 64],
+        "density": [10_000, 25_000, 100_000],
+        "area": [10.0, 20.0, 40.0],
+    },
+    "full": {
+        "trees": [4, 16, 64, 256, 1024],
+        "density": [10_000, 25_000, 100_000, 1_000_000],
+        "area": [10.0, 20.0, 40.0, 80.0],
+    },
+}
+
+
+def _peak_rss_mb():
+    if resource is None:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        # psutil nie zna peak RSS na wszystkich systemach – bierzemy bieżący
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2**20
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bajty
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def sweep_configs(mode="quick") -> list[dict]:
+    configs = []
+    sweeps = SWEEPS[mode]
+
+    for trees in sweeps["trees"]:
+        configs.append(dict(BASE, sweep="trees", param=trees, trees=trees))
+
+    for n in sweeps["density"]:
+        configs.append(dict(BASE, sweep="density", param=n, n_candidates=n))
+
+    for area in sweeps["area"]:
+        # stała gęstość: liczba kandydatów rośnie z polem powierzchni
+        scale = (area / BASE["area_size"]) ** 2
+        configs.append(dict(
+            BASE, sweep="area", param=area,
+            area_size=area, n_candidates=int(BASE["n_candidates"] * scale),
+        ))
+
+    return configs
+
+
+def run_config(config: dict) -> dict:
+    """Jedna konfiguracja (wykonywana w osobnym procesie)."""
+    from benchmarks.cases import build_forest
+    from structures.profiling import GrowthProfiler
+
+    use_tracemalloc = config.get("tracemalloc", False)
+    if use_tracemalloc:
+        tracemalloc.start(10)
+
+    t_setup = time.perf_counter()
+    forest = build_forest(
+        config["trees"],
+        n_candidates=config["n_candidates"],
+        area_size=config["area_size"],
+    )
+    # pnie rosną deterministycznie – mierzymy dopiero wzrost koron
+    while not all(tree.trunk_done for tree in forest.trees):
+        forest.grow()
+    setup_s = time.perf_counter() - t_setup
+
+    profiler = GrowthProfiler()
+    forest.set_profiler(profiler)
+
+    nodes_before = sum(len(t.nodes) for t in forest.trees)
+    t0 = time.perf_counter()
+    for _ in range(config["steps"]):
+        forest.grow()
+    elapsed = time.perf_counter() - t0
+    nodes_added = sum(len(t.nodes) for t in forest.trees) - nodes_before
+
+    result = dict(config)
+    result.update({
+        "n_attraction_points": len(forest.attraction_points),
+        "setup_s": setup_s,
+        "grow_s": elapsed,
+        "steps_per_s": config["steps"] / elapsed if elapsed > 0 else None,
+        "nodes_added": nodes_added,
+        "nodes_per_s": nodes_added / elapsed if elapsed > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    })
+
+    report = profiler.report()
+    result["phase_share"] = {
+        name: p["share"] for name, p in report["phases"].items() if name != "tree.grow"
+    }
+    result["kdtree_builds"] = report["counters"].get("kdtree_builds", 0)
+
+    if use_tracemalloc:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        result["top_allocations"] = [
+            {
+                "location": str(stat.traceback[0]),
+                "size_kb": stat.size / 1024,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:10]
+        ]
+
+    return result
+
+
+def scaling_exponents(results: list[dict]) -> dict:
+    """Nachylenie log-log: sekundy/krok i peak RSS względem parametru wymiaru."""
+    exponents = {}
+
+    for sweep in sorted({r["sweep"] for r in results}):
+        rows = [r for r in results if r["sweep"] == sweep and r["steps_per_s"]]
+        if len(rows) < 2:
+            continue
+
+        x = np.log([r["param"] for r in rows])
+        entry = {
+            "sec_per_step": float(np.polyfit(x, np.log([1.0 / r["steps_per_s"] for r in rows]), 1)[0]),
+        }
+        if all(r["peak_rss_mb"] for r in rows):
+            entry["peak_rss"] = float(np.polyfit(x, np.log([r["peak_rss_mb"] for r in rows]), 1)[0])
+        exponents[sweep] = entry
+
+    return exponents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Skalowanie symulacji lasu")
+    parser.add_argument("--full", action="store_true", help="duże lasy i 1M kandydatów AP")
+    parser.add_argument("--steps", type=int, default=30, help="kroki Forest.grow na konfigurację")
+    parser.add_argument("--tracemalloc", action="store_true", help="zbieraj największe alokacje")
+    parser.add_argument("--out", default="scaling_results.json")
+    args = parser.parse_args(argv)
+
+    configs = sweep_configs("full" if args.full else "quick")
+    results = []
+
+    ctx = multiprocessing.get_context("spawn")
+    for config in configs:
+        config = dict(config, steps=args.steps, tracemalloc=args.tracemalloc)
+
+        # nowy proces dla każdej konfiguracji => niezależny peak RSS
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            res = pool.submit(run_config, config).result()
+        results.append(res)
+
+        rss = f"{res['peak_rss_mb']:.0f} MB" if res["peak_rss_mb"] else "-"
+        # tempo jest None, gdy pomiar czasu dał 0 s
+        steps_rate = "n/a" if res["steps_per_s"] is None else f"{res['steps_per_s']:.2f}"
+        nodes_rate = "n/a" if res["nodes_per_s"] is None else f"{res['nodes_per_s']:.1f}"
+        print(
+            f"{res['sweep']:<8} param={res['param']:<10} APs={res['n_attraction_points']:<8} "
+            f"steps/s={steps_rate:>8} nodes/s={nodes_rate:>9} rss={rss}"
+        )
+
+    exponents = scaling_exponents(results)
+    print("\nWykładniki skalowania (log-log):")
+    for sweep, entry in exponents.items():
+        print(f"  {sweep:<8} " + "  ".join(f"{k}={v:.2f}" for k, v in entry.items()))
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"base": BASE, "results": results, "exponents": exponents}, f, indent=2)
+    print(f"\nWyniki zapisane do {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import numpy as np
 from vispy import app
 
 from environment.terrain import Terrain
@@ -6,58 +5,33 @@ from environment.sun import Sun
 from structures.tree import Tree
 from structures.forest import Forest
 from structures.attraction_point import AttractionPoint
+from structures.random_streams import RunStreams
 from visualization.vispy_scene import TreeScene
 
-from analysis.crown_metrics import crown_metrics
-from analysis.canopy import canopy_hull
-
-
-# ------------------------------------------------------------
-# Promień korony
-# ------------------------------------------------------------
-def crown_radius(tree):
-    hull = canopy_hull(tree)
-    if hull is None:
-        return 0.0
-    center = hull.mean(axis=0)
-    radii = np.linalg.norm(hull - center, axis=1)
-    return radii.mean()
-
-
-# ------------------------------------------------------------
-# Liczenie AP w growth radius
-# ------------------------------------------------------------
-def count_ap_in_growth_radius(tree, attraction_points):
-    trunk_pos = tree.trunk_end.position()
-    radius = tree.growth_radius()
-
-    count = 0
-    for ap in attraction_points:
-        if np.linalg.norm(ap.position() - trunk_pos) <= radius:
-            count += 1
-    return count
+from analysis.crown_metrics import CrownAnalysis
+from analysis.neighbors import count_ap_in_growth_radius
 
 
 # ------------------------------------------------------------
 # Sztuczne chmury attraction points
 # ------------------------------------------------------------
-def generate_custom_ap(terrain):
+def generate_custom_ap(terrain, rng):
     points = []
 
     center_sun = (0.0, -12.0)
     for _ in range(3500):
-        x = np.random.normal(center_sun[0], 3.0)
-        y = np.random.normal(center_sun[1], 3.0)
+        x = rng.normal(center_sun[0], 3.0)
+        y = rng.normal(center_sun[1], 3.0)
         ground_z = terrain.height(x, y)
-        z = ground_z + 4.0 + np.random.uniform(1.0, 10.0)
+        z = ground_z + 4.0 + rng.uniform(1.0, 10.0)
         points.append(AttractionPoint(x, y, z))
 
     center_shadow = (0.0, 12.0)
     for _ in range(700):
-        x = np.random.normal(center_shadow[0], 3.0)
-        y = np.random.normal(center_shadow[1], 3.0)
+        x = rng.normal(center_shadow[0], 3.0)
+        y = rng.normal(center_shadow[1], 3.0)
         ground_z = terrain.height(x, y)
-        z = ground_z + 4.0 + np.random.uniform(1.0, 10.0)
+        z = ground_z + 4.0 + rng.uniform(1.0, 10.0)
         points.append(AttractionPoint(x, y, z))
 
     return points
@@ -68,19 +42,21 @@ def generate_custom_ap(terrain):
 # ------------------------------------------------------------
 def build_tree_dataframe(forest, terrain, attraction_points):
     records = []
-    for tree in forest.trees:
-        metrics = crown_metrics(tree)
+    ap_counts = count_ap_in_growth_radius(forest.trees, attraction_points)
+
+    for i, tree in enumerate(forest.trees):
+        crown = CrownAnalysis.from_tree(tree)
         x, y, _ = tree.nodes[0].position()
 
         records.append({
             "tree_id": tree.tree_id,
             "x": x,
             "y": y,
-            "height": metrics["height"],
-            "crown_radius": crown_radius(tree),
-            "crown_volume": metrics["crown_volume"],
+            "height": crown.height,
+            "crown_radius": crown.crown_radius,
+            "crown_volume": crown.crown_volume,
             "moisture": terrain.moisture(x, y),
-            "AP_in_growth_radius": count_ap_in_growth_radius(tree, attraction_points),
+            "AP_in_growth_radius": int(ap_counts[i]),
         })
 
     import pandas as pd
@@ -93,12 +69,12 @@ def build_tree_dataframe(forest, terrain, attraction_points):
 def main():
     print("\n=== WIZUALIZACJA: KOMPENSACJA WZROSTU ===")
 
-    np.random.seed(42)
+    streams = RunStreams(42)
 
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=(25.0, -20.0, 30.0))
 
-    attraction_points = generate_custom_ap(terrain)
+    attraction_points = generate_custom_ap(terrain, streams.ap)
 
     pos_sun = (0.0, -12.0)
     pos_shadow = (0.0, 12.0)
@@ -117,23 +93,12 @@ def main():
         )
         trees.append(tree)
 
-    forest = Forest(trees, attraction_points)
+    forest = Forest(trees, attraction_points, streams=streams)
 
+    # wzrost prowadzi wątek symulacji TreeScene (bez osobnego timera)
     scene = TreeScene(forest, terrain, sun, debug=True)
-
-    step_counter = 0
-
-    def update(event):
-        nonlocal step_counter
-        forest.grow()
-        step_counter += 1
-
-        scene.scene_dirty = True
-        scene.update()
-
-    timer = app.Timer(interval=0.03, connect=update, start=True)
-
     app.run()
+    scene.worker.stop()
 
     print("\n=== WYNIKI KOŃCOWE ===")
     df = build_tree_dataframe(forest, terrain, attraction_points)
@@ -1,3 +1,4 @@
+import argparse
 import math
 import numpy as np
 import pandas as pd
@@ -6,12 +7,13 @@ import logging
 
 from environment.terrain import Terrain
 from environment.sun import Sun
-from structures.attraction_point import generate_attraction_points_from_terrain
+from structures.ap_cache import cached_attraction_points
 from structures.tree import Tree
 from structures.forest import Forest
+from structures.random_streams import RunStreams, map_runs
 
-from analysis.crown_metrics import crown_volume, asymmetry_radius
-from analysis.canopy import canopy_hull
+from analysis.crown_metrics import CrownAnalysis
+from analysis.neighbors import count_ap_in_growth_radius
 
 
 logging.basicConfig(
@@ -22,37 +24,17 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def crown_radius(tree):
-    hull = canopy_hull(tree)
-    if hull is None:
-        return 0.0
-    center = hull.mean(axis=0)
-    radii = np.linalg.norm(hull - center, axis=1)
-    return float(radii.mean())
-
-
-def count_ap_in_growth_radius(tree, attraction_points):
-    trunk_pos = tree.trunk_end.position()
-    radius = tree.growth_radius()
-
-    count = 0
-    for ap in attraction_points:
-        if np.linalg.norm(ap.position() - trunk_pos) <= radius:
-            count += 1
-    return count
-
-
-def run_simulation(sun_pos, seed, max_steps=3000):
-    np.random.seed(seed)
-
+def run_simulation(sun_pos, streams, max_steps=3000):
+    seed = streams.label
     logger.info(f"Starting run seed={seed} sun={sun_pos}")
 
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=sun_pos)
 
-    attraction_points = generate_attraction_points_from_terrain(
+    attraction_points = cached_attraction_points(
         terrain=terrain,
         sun=sun,
+        streams=streams,
         n_candidates=15000,
         area_size=12.0,
         trunk_height=4.0,
@@ -73,7 +55,7 @@ def run_simulation(sun_pos, seed, max_steps=3000):
         step_size=0.5,
     )
 
-    forest = Forest([tree], attraction_points)
+    forest = Forest([tree], attraction_points, streams=streams)
 
     steps = 0
     stagnant = 0
@@ -103,11 +85,12 @@ def run_simulation(sun_pos, seed, max_steps=3000):
 
     # Metryki
     h = tree.height()
-    cv = crown_volume(tree)
-    cr = crown_radius(tree)
-    ar = asymmetry_radius(tree)
+    crown = CrownAnalysis.from_tree(tree)
+    cv = crown.crown_volume
+    cr = crown.crown_radius
+    ar = crown.asymmetry_radius
     consumed = int(tree.consumed_attraction_points)
-    ap_in_radius = count_ap_in_growth_radius(tree, attraction_points)
+    ap_in_radius = count_ap_in_growth_radius([tree], attraction_points)[0]
 
     logger.info(
         f"Finished run seed={seed}: steps={steps}, nodes={len(tree.nodes)}, consumed_AP={consumed}"
@@ -128,7 +111,12 @@ def run_simulation(sun_pos, seed, max_steps=3000):
     }
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exp2: wpływ położenia słońca na koronę")
+    parser.add_argument("--workers", type=int, default=1, help="liczba procesów (wyniki nie zależą od niej)")
+    parser.add_argument("--legacy-rng", action="store_true", help="stary strumień np.random.seed (odtwarza exp2_results.csv)")
+    args = parser.parse_args(argv)
+
     azimuths = np.linspace(0, 2 * math.pi, 8, endpoint=False)  # 8 kierunków
     radii = [30.0]  # odległość słońca od środka
     heights = [10.0, 30.0, 60.0]  # różne wysokości słońca
@@ -144,20 +132,19 @@ def main():
                 z = h
                 params.append((x, y, z))
 
-    results = []
+    # powtórzenie run_id (od 1) ma strumienie base.replicate(run_id), etykieta 1000 + run_id
+    base = RunStreams(1000, legacy=args.legacy_rng)
+    tasks = []
+    run_id = 0
+    for pos in params:
+        for t in range(trials_per_position):
+            run_id += 1
+            tasks.append((pos, base.replicate(run_id)))
 
-    total_runs = len(params) * trials_per_position
+    total_runs = len(tasks)
     logger.info(f"Running {total_runs} simulations ({len(params)} positions x {trials_per_position} trials)")
 
-    run_id = 0
-    with tqdm(total=total_runs, desc="Exp2 runs") as pbar:
-        for pos in params:
-            for t in range(trials_per_position):
-                run_id += 1
-                seed = 1000 + run_id
-                res = run_simulation(pos, seed)
-                results.append(res)
-                pbar.update(1)
+    results = list(tqdm(map_runs(run_simulation, tasks, args.workers), total=total_runs, desc="Exp2 runs"))
 
     df = pd.DataFrame(results)
 
@@ -1,12 +1,14 @@
-import numpy as np
 import logging
 from vispy import app
 
 from environment.terrain import Terrain
 from environment.sun import Sun
-from structures.attraction_point import generate_attraction_points_from_terrain
+from structures.ap_cache import cached_attraction_points
 from structures.tree import Tree
 from structures.forest import Forest
+from structures.random_streams import RunStreams
+from structures.growth_log import GrowthLog, GrowthLogWriter, growth_log_exists, growth_log_path
+from visualization.growth_replay import GrowthLogPlayer
 from visualization.vispy_scene import TreeScene
 
 
@@ -18,20 +20,23 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run_simulation_headless(sun_pos, seed, max_steps=3000):
-    np.random.seed(seed)
+# parametry symulacji – wchodzą też do nazwy katalogu logu wzrostu
+AP_PARAMS = {"n_candidates": 15000, "area_size": 12.0, "trunk_height": 4.0}
+TREE_PARAMS = {"influence_radius": 3.0, "kill_radius": 1.0, "step_size": 0.5}
+MAX_STEPS = 3000
 
+
+def run_simulation_headless(sun_pos, streams, max_steps=MAX_STEPS, log_path=None):
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=sun_pos)
 
-    logger.info(f"Symulacja: Sun={sun_pos} (seed={seed})")
+    logger.info(f"Symulacja: Sun={sun_pos} (seed={streams.label})")
 
-    attraction_points = generate_attraction_points_from_terrain(
+    attraction_points = cached_attraction_points(
         terrain=terrain,
         sun=sun,
-        n_candidates=15000,
-        area_size=12.0,
-        trunk_height=4.0,
+        streams=streams,
+        **AP_PARAMS,
     )
 
     x, y = 0.0, 0.0
@@ -42,12 +47,13 @@ def run_simulation_headless(sun_pos, seed, max_steps=3000):
         attraction_points=attraction_points,
         terrain=terrain,
         tree_id=0,
-        influence_radius=3.0,
-        kill_radius=1.0,
-        step_size=0.5,
+        **TREE_PARAMS,
     )
 
-    forest = Forest([tree], attraction_points)
+    forest = Forest([tree], attraction_points, streams=streams)
+    if log_path is not None:
+        # każdy krok trafia do logu wzrostu – kolejne uruchomienia tylko go odtwarzają
+        forest.growth_log = GrowthLogWriter(log_path, forest, terrain, sun)
 
     steps = 0
     stagnant = 0
@@ -78,6 +84,8 @@ def run_simulation_headless(sun_pos, seed, max_steps=3000):
             break
 
     logger.info(f"  Koniec: steps={steps}, nodes={len(tree.nodes)}, height={tree.height():.2f}")
+    if forest.growth_log is not None:
+        forest.growth_log.close()
     return forest, terrain, sun
 
 
@@ -109,14 +117,25 @@ def main():
 
     for i, sun_pos in enumerate(sun_positions, start=1):
         logger.info(f"\n[{i}/{len(sun_positions)}] Sun position: {sun_pos}")
-        seed = 2000 + i
-        
-        forest, terrain, sun = run_simulation_headless(sun_pos, seed)
+        streams = RunStreams(2000).replicate(i)
+        seed = streams.label
+
+        # usunięcie katalogu logu wymusza ponowną symulację; zmiana parametrów daje nowy katalog
+        log_path = growth_log_path(f"exp2_visualize_{seed}", {
+            "sun": [float(v) for v in sun_pos],
+            "streams": streams.cache_key(),
+            "ap": AP_PARAMS,
+            "tree": TREE_PARAMS,
+            "max_steps": MAX_STEPS,
+        })
+        if growth_log_exists(log_path):
+            logger.info(f"  Log wzrostu: {log_path} (bez symulacji)")
+        else:
+            run_simulation_headless(sun_pos, streams, log_path=log_path)
+
         results.append({
             "sun_pos": sun_pos,
-            "forest": forest,
-            "terrain": terrain,
-            "sun": sun,
+            "log": GrowthLog(log_path),
         })
 
     # Wizualizacja każdego drzewa
@@ -127,13 +146,13 @@ def main():
 
     for idx, result in enumerate(results, start=1):
         sun_pos = result["sun_pos"]
-        forest = result["forest"]
-        terrain = result["terrain"]
-        sun = result["sun"]
+        log = result["log"]
 
         print(f"\nScene {idx}/{len(results)}: Sun = {sun_pos}")
+        print("  ←/→ krok, PgUp/PgDn ±50 kroków, Home/End początek/koniec, SPACJA pauza")
 
-        scene = TreeScene(forest, terrain, sun, debug=True)
+        # odtwarzanie logu: zero obliczeń symulacji
+        scene = TreeScene(None, log.terrain(), log.sun(), debug=True, worker=GrowthLogPlayer(log))
         app.run()
 
 
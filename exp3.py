@@ -1,17 +1,18 @@
+import argparse
 import math
-import numpy as np
 import pandas as pd
 from tqdm import tqdm
 import logging
 
 from environment.terrain import Terrain
 from environment.sun import Sun
-from structures.attraction_point import generate_attraction_points_from_terrain
+from structures.ap_cache import cached_attraction_points
 from structures.tree import Tree
 from structures.forest import Forest
+from structures.random_streams import RunStreams, map_runs
 
-from analysis.crown_metrics import crown_volume, asymmetry_radius
-from analysis.canopy import canopy_hull
+from analysis.forest_metrics import forest_crown_metrics
+from analysis.neighbors import count_ap_in_growth_radius, count_neighboring_trees
 
 
 # --- logging
@@ -23,55 +24,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# -------------------------------------------------
-# Funkcje pomocnicze do metryk
-# -------------------------------------------------
-
-def crown_radius(tree):
-    """Średni promień korony (na podstawie convex hull)."""
-    hull = canopy_hull(tree)
-    if hull is None:
-        return 0.0
-    center = hull.mean(axis=0)
-    radii = np.linalg.norm(hull - center, axis=1)
-    return float(radii.mean())
-
-
-def count_ap_in_growth_radius(tree, attraction_points):
-    """Liczba AP w zasięgu wzrostu pnia."""
-    trunk_pos = tree.trunk_end.position()
-    radius = tree.growth_radius()
-
-    count = 0
-    for ap in attraction_points:
-        if np.linalg.norm(ap.position() - trunk_pos) <= radius:
-            count += 1
-    return count
-
-
-def count_neighboring_trees(tree, all_trees, radius=8.0):
-    """
-    Liczba innych drzew w danym promieniu od pnia tego drzewa (konkurencja).
-    """
-    if tree.trunk_end is None:
-        return 0
-    
-    trunk_pos = tree.trunk_end.position()
-    count = 0
-    
-    for other_tree in all_trees:
-        if other_tree.tree_id == tree.tree_id or other_tree.trunk_end is None:
-            continue
-        
-        other_pos = other_tree.trunk_end.position()
-        dist = np.linalg.norm(np.array(trunk_pos) - np.array(other_pos))
-        
-        if dist <= radius:
-            count += 1
-    
-    return count
-
-
 # -------------------------------------------------
 # Konfiguracja rozmieszczenia drzew w siatce
 # -------------------------------------------------
@@ -94,18 +46,18 @@ def create_tree_grid(num_trees_total, spacing=1.5):
 # Symulacja lasu z konkurencją
 # -------------------------------------------------
 
-def run_simulation(num_trees, seed, max_steps=3000):
-    np.random.seed(seed)
-    
+def run_simulation(num_trees, streams, max_steps=3000):
+    seed = streams.label
     logger.info(f"Starting run seed={seed} num_trees={num_trees}")
     
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=(30.0, 0.0, 30.0))  # Ustalone położenie słońca
     
     # Generujemy wspólny basen AP dla wszystkich drzew
-    attraction_points = generate_attraction_points_from_terrain(
+    attraction_points = cached_attraction_points(
         terrain=terrain,
         sun=sun,
+        streams=streams,
         n_candidates=25000,  # Więcej AP dla konkurencji
         area_size=20.0,  # Większa powierzchnia
         trunk_height=4.0,
@@ -130,7 +82,7 @@ def run_simulation(num_trees, seed, max_steps=3000):
         )
         trees.append(tree)
     
-    forest = Forest(trees, attraction_points)
+    forest = Forest(trees, attraction_points, streams=streams)
     
     steps = 0
     stagnant_counts = {tree.tree_id: 0 for tree in trees}
@@ -159,16 +111,20 @@ def run_simulation(num_trees, seed, max_steps=3000):
             break
     
     records = []
-    for tree in trees:
+    crowns = forest_crown_metrics(forest)
+    ap_counts = count_ap_in_growth_radius(trees, attraction_points)
+    neighbor_counts = count_neighboring_trees(trees, radius=8.0)
+
+    for i, tree in enumerate(trees):
         x, y, _ = tree.nodes[0].position()
         
         h = tree.height()
-        cv = crown_volume(tree)
-        cr = crown_radius(tree)
-        ar = asymmetry_radius(tree)
+        cv = crowns["crown_volume"][i]
+        cr = crowns["crown_radius"][i]
+        ar = crowns["asymmetry_radius"][i]
         consumed = int(tree.consumed_attraction_points)
-        ap_in_radius = count_ap_in_growth_radius(tree, attraction_points)
-        neighbors = count_neighboring_trees(tree, trees, radius=8.0)
+        ap_in_radius = int(ap_counts[i])
+        neighbors = int(neighbor_counts[i])
         
         records.append({
             "seed": int(seed),
@@ -197,27 +153,31 @@ def run_simulation(num_trees, seed, max_steps=3000):
 # GŁÓWNA FUNKCJA
 # -------------------------------------------------
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exp3: wpływ konkurencji drzew na koronę")
+    parser.add_argument("--workers", type=int, default=1, help="liczba procesów (wyniki nie zależą od niej)")
+    parser.add_argument("--legacy-rng", action="store_true", help="stary strumień np.random.seed (odtwarza exp3_results.csv)")
+    args = parser.parse_args(argv)
+
     tree_counts = [1, 4, 9, 16]
     
     trials_per_count = 5  # Liczba powtórzeń dla każej konfiguracji
     
-    results = []
-    
-    total_runs = len(tree_counts) * trials_per_count
-    logger.info(f"Running {total_runs} simulations across {tree_counts}")
-    
+    # powtórzenie run_id (od 1) ma strumienie base.replicate(run_id), etykieta 3000 + run_id
+    base = RunStreams(3000, legacy=args.legacy_rng)
+    tasks = []
     run_id = 0
-    with tqdm(total=total_runs, desc="Exp3 runs") as pbar:
-        for tree_count in tree_counts:
-            for trial in range(trials_per_count):
-                run_id += 1
-                seed = 3000 + run_id
-                
-                tree_records = run_simulation(tree_count, seed)
-                results.extend(tree_records)
-                
-                pbar.update(1)
+    for tree_count in tree_counts:
+        for trial in range(trials_per_count):
+            run_id += 1
+            tasks.append((tree_count, base.replicate(run_id)))
+
+    total_runs = len(tasks)
+    logger.info(f"Running {total_runs} simulations across {tree_counts}")
+
+    results = []
+    for tree_records in tqdm(map_runs(run_simulation, tasks, args.workers), total=total_runs, desc="Exp3 runs"):
+        results.extend(tree_records)
     
     df = pd.DataFrame(results)
     
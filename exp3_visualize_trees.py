@@ -11,15 +11,17 @@ Zamknij okno, aby przejść do następnego lasu.
 """
 
 import math
-import numpy as np
 import logging
 from vispy import app
 
 from environment.terrain import Terrain
 from environment.sun import Sun
-from structures.attraction_point import generate_attraction_points_from_terrain
+from structures.ap_cache import cached_attraction_points
 from structures.tree import Tree
 from structures.forest import Forest
+from structures.random_streams import RunStreams
+from structures.growth_log import GrowthLog, GrowthLogWriter, growth_log_exists, growth_log_path
+from visualization.growth_replay import GrowthLogPlayer
 from visualization.vispy_scene import TreeScene
 
 
@@ -31,6 +33,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# parametry symulacji – wchodzą też do nazwy katalogu logu wzrostu
+AP_PARAMS = {"n_candidates": 25000, "area_size": 20.0, "trunk_height": 4.0}
+TREE_PARAMS = {"influence_radius": 3.0, "kill_radius": 1.0, "step_size": 0.5}
+MAX_STEPS = 3000
+
+
 # -------------------------------------------------
 # Pomocnicze funkcje
 # -------------------------------------------------
@@ -50,22 +58,19 @@ def create_tree_grid(num_trees_total, spacing=1.5):
     return positions[:num_trees_total]
 
 
-def run_simulation_headless(num_trees, seed, max_steps=3000):
+def run_simulation_headless(num_trees, streams, max_steps=MAX_STEPS, log_path=None):
     """Uruchomienie symulacji lasu bez GUI."""
-    np.random.seed(seed)
-
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=(30.0, 0.0, 30.0))  # Ustalone położenie słońca
 
-    logger.info(f"Symulacja: num_trees={num_trees} (seed={seed})")
+    logger.info(f"Symulacja: num_trees={num_trees} (seed={streams.label})")
 
     # Generujemy wspólny basen AP dla wszystkich drzew
-    attraction_points = generate_attraction_points_from_terrain(
+    attraction_points = cached_attraction_points(
         terrain=terrain,
         sun=sun,
-        n_candidates=25000,
-        area_size=20.0,
-        trunk_height=4.0,
+        streams=streams,
+        **AP_PARAMS,
     )
 
     logger.debug(f"Generated {len(attraction_points)} attraction points")
@@ -82,13 +87,14 @@ def run_simulation_headless(num_trees, seed, max_steps=3000):
             attraction_points=attraction_points,
             terrain=terrain,
             tree_id=tree_id,
-            influence_radius=3.0,
-            kill_radius=1.0,
-            step_size=0.5,
+            **TREE_PARAMS,
         )
         trees.append(tree)
 
-    forest = Forest(trees, attraction_points)
+    forest = Forest(trees, attraction_points, streams=streams)
+    if log_path is not None:
+        # każdy krok trafia do logu wzrostu – kolejne uruchomienia tylko go odtwarzają
+        forest.growth_log = GrowthLogWriter(log_path, forest, terrain, sun)
 
     # Symulacja bez GUI
     steps = 0
@@ -129,6 +135,8 @@ def run_simulation_headless(num_trees, seed, max_steps=3000):
         f"avg_height={avg_height:.2f}"
     )
 
+    if forest.growth_log is not None:
+        forest.growth_log.close()
     return forest, terrain, sun
 
 
@@ -146,14 +154,25 @@ def main():
 
     for i, num_trees in enumerate(tree_counts, start=1):
         logger.info(f"\n[{i}/{len(tree_counts)}] Preparing visualization: {num_trees} trees")
-        seed = 3000 + i
-        
-        forest, terrain, sun = run_simulation_headless(num_trees, seed)
+        streams = RunStreams(3000).replicate(i)
+        seed = streams.label
+
+        # usunięcie katalogu logu wymusza ponowną symulację; zmiana parametrów daje nowy katalog
+        log_path = growth_log_path(f"exp3_visualize_{num_trees}_{seed}", {
+            "num_trees": num_trees,
+            "streams": streams.cache_key(),
+            "ap": AP_PARAMS,
+            "tree": TREE_PARAMS,
+            "max_steps": MAX_STEPS,
+        })
+        if growth_log_exists(log_path):
+            logger.info(f"  Log wzrostu: {log_path} (bez symulacji)")
+        else:
+            run_simulation_headless(num_trees, streams, log_path=log_path)
+
         results.append({
             "num_trees": num_trees,
-            "forest": forest,
-            "terrain": terrain,
-            "sun": sun,
+            "log": GrowthLog(log_path),
         })
 
     # Wizualizacja każdego lasu
@@ -164,21 +183,23 @@ def main():
 
     for idx, result in enumerate(results, start=1):
         num_trees = result["num_trees"]
-        forest = result["forest"]
-        terrain = result["terrain"]
-        sun = result["sun"]
+        log = result["log"]
 
-        # Oblicz statystyki dla wyświetlenia
-        total_height = sum(tree.height() for tree in forest.trees)
-        avg_height = total_height / len(forest.trees) if forest.trees else 0.0
-        total_nodes = sum(len(tree.nodes) for tree in forest.trees)
+        # Oblicz statystyki dla wyświetlenia (stan końcowy z logu)
+        tree_nodes = log.tree_nodes(log.n_steps)
+        total_height = sum(nodes[:, 2].max() for nodes in tree_nodes)
+        avg_height = total_height / len(tree_nodes) if tree_nodes else 0.0
+        total_nodes = sum(len(nodes) for nodes in tree_nodes)
 
         print(f"\nScene {idx}/{len(results)}: {num_trees} drzew w lesie")
         print(f"  • Średnia wysokość: {avg_height:.2f} j.")
         print(f"  • Łączna liczba gałęzi: {total_nodes}")
         print(f"  • Konkurencja: {'niska   🌳' if num_trees <= 4 else 'średnia 🌲' if num_trees <= 9 else 'wysoka 🌴'}")
 
-        scene = TreeScene(forest, terrain, sun, debug=True)
+        print("  ←/→ krok, PgUp/PgDn ±50 kroków, Home/End początek/koniec, SPACJA pauza")
+
+        # odtwarzanie logu: zero obliczeń symulacji
+        scene = TreeScene(None, log.terrain(), log.sun(), debug=True, worker=GrowthLogPlayer(log))
         app.run()
 
     print("\n" + "="*70)
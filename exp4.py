@@ -1,17 +1,18 @@
+import argparse
 import math
-import numpy as np
 import pandas as pd
 from tqdm import tqdm
 import logging
 
 from environment.terrain import Terrain
 from environment.sun import Sun
-from structures.attraction_point import generate_attraction_points_from_terrain
-from structures.tree import Tree
+from structures.ap_cache import cached_attraction_points
+from structures.tree import TreeNoRadius
 from structures.forest import Forest
+from structures.random_streams import RunStreams, map_runs
 
-from analysis.crown_metrics import crown_volume, asymmetry_radius
-from analysis.canopy import canopy_hull
+from analysis.forest_metrics import forest_crown_metrics
+from analysis.neighbors import count_ap_in_growth_radius, count_neighboring_trees
 
 
 logging.basicConfig(
@@ -22,61 +23,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# -------------------------------------------------
-# Wersja Tree bez growth_radius
-# -------------------------------------------------
-
-class TreeNoRadius(Tree):
-    
-    def growth_radius(self) -> float:
-        return 10000.0  
-
-
-# -------------------------------------------------
-# Funkcje pomocnicze do metryk
-# -------------------------------------------------
-
-def crown_radius(tree):
-    hull = canopy_hull(tree)
-    if hull is None:
-        return 0.0
-    center = hull.mean(axis=0)
-    radii = np.linalg.norm(hull - center, axis=1)
-    return float(radii.mean())
-
-
-def count_ap_in_growth_radius(tree, attraction_points):
-    trunk_pos = tree.trunk_end.position()
-    # W exp4 domyślnie nie ma growth_radius, ale obliczmy dla ref
-    radius = 10000.0  # Praktycznie wszystkie
-    
-    count = 0
-    for ap in attraction_points:
-        if np.linalg.norm(ap.position() - trunk_pos) <= radius:
-            count += 1
-    return count
-
-
-def count_neighboring_trees(tree, all_trees, radius=8.0):
-    if tree.trunk_end is None:
-        return 0
-    
-    trunk_pos = tree.trunk_end.position()
-    count = 0
-    
-    for other_tree in all_trees:
-        if other_tree.tree_id == tree.tree_id or other_tree.trunk_end is None:
-            continue
-        
-        other_pos = other_tree.trunk_end.position()
-        dist = np.linalg.norm(np.array(trunk_pos) - np.array(other_pos))
-        
-        if dist <= radius:
-            count += 1
-    
-    return count
-
-
 # -------------------------------------------------
 # Konfiguracja rozmieszczenia drzew w siatce
 # -------------------------------------------------
@@ -99,18 +45,18 @@ def create_tree_grid(num_trees_total, spacing=1.5):
 # Symulacja lasu z konkurencją (BEZ growth_radius)
 # -------------------------------------------------
 
-def run_simulation(num_trees, seed, max_steps=3000):
-    np.random.seed(seed)
-    
+def run_simulation(num_trees, streams, max_steps=3000):
+    seed = streams.label
     logger.info(f"Starting run seed={seed} num_trees={num_trees} (NO growth_radius)")
     
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=(30.0, 0.0, 30.0))  # Ustalone położenie słońca
     
     # Generujemy wspólny basen AP dla wszystkich drzew
-    attraction_points = generate_attraction_points_from_terrain(
+    attraction_points = cached_attraction_points(
         terrain=terrain,
         sun=sun,
+        streams=streams,
         n_candidates=25000,  # Więcej AP dla konkurencji
         area_size=20.0,  # Większa powierzchnia
         trunk_height=4.0,
@@ -137,7 +83,7 @@ def run_simulation(num_trees, seed, max_steps=3000):
         )
         trees.append(tree)
     
-    forest = Forest(trees, attraction_points)
+    forest = Forest(trees, attraction_points, streams=streams)
     
     steps = 0
     stagnant_counts = {tree.tree_id: 0 for tree in trees}
@@ -166,16 +112,20 @@ def run_simulation(num_trees, seed, max_steps=3000):
             break
     
     records = []
-    for tree in trees:
+    crowns = forest_crown_metrics(forest)
+    ap_counts = count_ap_in_growth_radius(trees, attraction_points)
+    neighbor_counts = count_neighboring_trees(trees, radius=8.0)
+
+    for i, tree in enumerate(trees):
         x, y, _ = tree.nodes[0].position()
         
         h = tree.height()
-        cv = crown_volume(tree)
-        cr = crown_radius(tree)
-        ar = asymmetry_radius(tree)
+        cv = crowns["crown_volume"][i]
+        cr = crowns["crown_radius"][i]
+        ar = crowns["asymmetry_radius"][i]
         consumed = int(tree.consumed_attraction_points)
-        ap_in_radius = count_ap_in_growth_radius(tree, attraction_points)
-        neighbors = count_neighboring_trees(tree, trees, radius=8.0)
+        ap_in_radius = int(ap_counts[i])
+        neighbors = int(neighbor_counts[i])
         
         records.append({
             "seed": int(seed),
@@ -204,7 +154,12 @@ def run_simulation(num_trees, seed, max_steps=3000):
 # GŁÓWNA FUNKCJA
 # -------------------------------------------------
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exp4: konkurencja drzew bez growth_radius")
+    parser.add_argument("--workers", type=int, default=1, help="liczba procesów (wyniki nie zależą od niej)")
+    parser.add_argument("--legacy-rng", action="store_true", help="stary strumień np.random.seed (odtwarza exp4_results.csv)")
+    args = parser.parse_args(argv)
+
     
     # Liczby drzew do testowania (identyczne jak exp3)
     # Siatki: 1x1, 2x2, 3x3, 4x4
@@ -212,22 +167,21 @@ def main():
     
     trials_per_count = 5  # Liczba powtórzeń dla każej konfiguracji
     
-    results = []
-    
-    total_runs = len(tree_counts) * trials_per_count
-    logger.info(f"Running {total_runs} simulations across {tree_counts} (NO growth_radius)")
-    
+    # powtórzenie run_id (od 1) ma strumienie base.replicate(run_id), etykieta 4000 + run_id
+    base = RunStreams(4000, legacy=args.legacy_rng)
+    tasks = []
     run_id = 0
-    with tqdm(total=total_runs, desc="Exp4 runs") as pbar:
-        for tree_count in tree_counts:
-            for trial in range(trials_per_count):
-                run_id += 1
-                seed = 4000 + run_id
-                
-                tree_records = run_simulation(tree_count, seed)
-                results.extend(tree_records)
-                
-                pbar.update(1)
+    for tree_count in tree_counts:
+        for trial in range(trials_per_count):
+            run_id += 1
+            tasks.append((tree_count, base.replicate(run_id)))
+
+    total_runs = len(tasks)
+    logger.info(f"Running {total_runs} simulations across {tree_counts} (NO growth_radius)")
+
+    results = []
+    for tree_records in tqdm(map_runs(run_simulation, tasks, args.workers), total=total_runs, desc="Exp4 runs"):
+        results.extend(tree_records)
     
     df = pd.DataFrame(results)
     
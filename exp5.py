@@ -1,3 +1,4 @@
+import argparse
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
@@ -5,12 +6,13 @@ import logging
 
 from environment.terrain import Terrain
 from environment.sun import Sun
-from structures.attraction_point import generate_attraction_points_from_terrain
+from structures.ap_cache import cached_attraction_points
 from structures.tree import Tree
 from structures.forest import Forest
+from structures.random_streams import RunStreams, map_runs
 
-from analysis.crown_metrics import crown_volume, asymmetry_radius
-from analysis.canopy import canopy_hull
+from analysis.forest_metrics import forest_crown_metrics
+from analysis.neighbors import count_ap_in_growth_radius
 
 
 logging.basicConfig(
@@ -21,29 +23,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# ------------------------------------------------------------
-# Pomocnicze metryki
-# ------------------------------------------------------------
-def crown_radius(tree):
-    hull = canopy_hull(tree)
-    if hull is None:
-        return 0.0
-    center = hull.mean(axis=0)
-    radii = np.linalg.norm(hull - center, axis=1)
-    return float(radii.mean())
-
-
-def count_ap_in_growth_radius(tree, attraction_points):
-    trunk_pos = tree.trunk_end.position()
-    radius = tree.growth_radius()
-
-    count = 0
-    for ap in attraction_points:
-        if np.linalg.norm(ap.position() - trunk_pos) <= radius:
-            count += 1
-    return count
-
-
 # ------------------------------------------------------------
 # Siatka pozycji drzew
 # ------------------------------------------------------------
@@ -64,9 +43,8 @@ def create_tree_grid(num_trees, spacing=1.0):
 # ------------------------------------------------------------
 # Symulacja lasu z konkurencją
 # ------------------------------------------------------------
-def run_simulation(trunk_heights, seed, max_steps=3000):
-    np.random.seed(seed)
-
+def run_simulation(trunk_heights, streams, max_steps=3000):
+    seed = streams.label
     logger.info(f"Starting run seed={seed} trunk_heights={trunk_heights}")
 
     terrain = Terrain(scale=8.0, height_amp=2.0)
@@ -74,9 +52,10 @@ def run_simulation(trunk_heights, seed, max_steps=3000):
 
     FIXED_AP_TRUNK_HEIGHT = 4.0
 
-    attraction_points = generate_attraction_points_from_terrain(
+    attraction_points = cached_attraction_points(
         terrain=terrain,
         sun=sun,
+        streams=streams,
         n_candidates=25000,
         area_size=20.0,
         trunk_height=FIXED_AP_TRUNK_HEIGHT,
@@ -105,7 +84,7 @@ def run_simulation(trunk_heights, seed, max_steps=3000):
         tree.trunk_height = float(th)
         trees.append(tree)
 
-    forest = Forest(trees, attraction_points)
+    forest = Forest(trees, attraction_points, streams=streams)
 
     steps = 0
     stagnant_counts = {tree.tree_id: 0 for tree in trees}
@@ -137,14 +116,16 @@ def run_simulation(trunk_heights, seed, max_steps=3000):
             break
 
     records = []
+    crowns = forest_crown_metrics(forest)
+    ap_counts = count_ap_in_growth_radius(trees, attraction_points)
 
-    for tree, th in zip(trees, trunk_heights):
+    for i, (tree, th) in enumerate(zip(trees, trunk_heights)):
         h = tree.height()
-        cv = crown_volume(tree)
-        cr = crown_radius(tree)
-        ar = asymmetry_radius(tree)
+        cv = crowns["crown_volume"][i]
+        cr = crowns["crown_radius"][i]
+        ar = crowns["asymmetry_radius"][i]
         consumed = int(tree.consumed_attraction_points)
-        ap_in_radius = count_ap_in_growth_radius(tree, attraction_points)
+        ap_in_radius = int(ap_counts[i])
 
         records.append({
             "seed": int(seed),
@@ -166,23 +147,25 @@ def run_simulation(trunk_heights, seed, max_steps=3000):
 # ------------------------------------------------------------
 # Główna funkcja
 # ------------------------------------------------------------
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exp5: wpływ wysokości pnia na koronę")
+    parser.add_argument("--workers", type=int, default=1, help="liczba procesów (wyniki nie zależą od niej)")
+    parser.add_argument("--legacy-rng", action="store_true", help="stary strumień np.random.seed (odtwarza exp5_results.csv)")
+    args = parser.parse_args(argv)
+
     trunk_heights = [1.0, 2.0, 4.0, 6.0, 8.0, 10.0]
     trials_per_run = 6
 
-    results = []
+    # powtórzenie run_id (od 1) ma strumienie base.replicate(run_id), etykieta 5000 + run_id
+    base = RunStreams(5000, legacy=args.legacy_rng)
+    tasks = [(trunk_heights, base.replicate(run_id)) for run_id in range(1, trials_per_run + 1)]
 
-    total_runs = trials_per_run
+    total_runs = len(tasks)
     logger.info(f"Running {total_runs} simulations (each run = full forest)")
 
-    run_id = 0
-    with tqdm(total=total_runs, desc="Exp5 runs") as pbar:
-        for t in range(trials_per_run):
-            run_id += 1
-            seed = 5000 + run_id
-            recs = run_simulation(trunk_heights, seed)
-            results.extend(recs)
-            pbar.update(1)
+    results = []
+    for recs in tqdm(map_runs(run_simulation, tasks, args.workers), total=total_runs, desc="Exp5 runs"):
+        results.extend(recs)
 
     df = pd.DataFrame(results)
 
@@ -4,9 +4,10 @@ from vispy import app
 
 from environment.terrain import Terrain
 from environment.sun import Sun
-from structures.attraction_point import generate_attraction_points_from_terrain
+from structures.ap_cache import cached_attraction_points
 from structures.tree import Tree
 from structures.forest import Forest
+from structures.random_streams import RunStreams
 from visualization.vispy_scene import TreeScene
 
 
@@ -38,22 +39,21 @@ def create_tree_grid(num_trees, spacing=1.0):
 # ------------------------------------------------------------
 # Symulacja lasu z różnymi trunk_height
 # ------------------------------------------------------------
-def run_simulation_headless(trunk_heights, seed, max_steps=3000):
-    np.random.seed(seed)
-
+def run_simulation_headless(trunk_heights, streams, max_steps=3000):
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=(30.0, 0.0, 30.0))
 
-    logger.info(f"Symulacja lasu: trunk_heights={trunk_heights} (seed={seed})")
+    logger.info(f"Symulacja lasu: trunk_heights={trunk_heights} (seed={streams.label})")
 
     # --------------------------------------------------------
     # Attraction Points generujemy ZAWSZE tak samo
     # --------------------------------------------------------
     FIXED_AP_TRUNK_HEIGHT = 4.0
 
-    attraction_points = generate_attraction_points_from_terrain(
+    attraction_points = cached_attraction_points(
         terrain=terrain,
         sun=sun,
+        streams=streams,
         n_candidates=25000,
         area_size=20.0,
         trunk_height=FIXED_AP_TRUNK_HEIGHT,
@@ -87,7 +87,7 @@ def run_simulation_headless(trunk_heights, seed, max_steps=3000):
         trees.append(tree)
 
 
-    forest = Forest(trees, attraction_points)
+    forest = Forest(trees, attraction_points, streams=streams)
 
     # --------------------------------------------------------
     # Pętla wzrostu
@@ -131,8 +131,7 @@ def main():
     # Dodane drzewo o trunk_height = 8.0
     trunk_heights = [1.0, 2.0, 4.0, 6.0, 8.0, 10.0]
 
-    seed = 9000
-    forest, terrain, sun = run_simulation_headless(trunk_heights, seed)
+    forest, terrain, sun = run_simulation_headless(trunk_heights, RunStreams(9000))
 
     print("\nWizualizacja lasu — różne wysokości pnia, wspólna konkurencja\n")
     print(f"Trunk heights: {trunk_heights}")
@@ -1,17 +1,38 @@
-from vispy import app
-import matplotlib.pyplot as plt
+"""
+Prezentacja: intro (jedno drzewo) i las 12 drzew.
 
-from environment.terrain import Terrain
-from environment.sun import Sun
+Domyślnie odtwarzane są logi wzrostu dołączone do programu
+(assets/demo/<scena>), więc okno otwiera się od razu, bez generowania
+AP i bez liczenia wzrostu. Logi przygotowuje się raz, ze źródeł:
 
-from structures.tree import Tree
-from structures.forest import Forest
-from structures.attraction_point import generate_attraction_points_from_terrain
+    python presentation.py --precompute     # zapis do assets/demo
+    python presentation.py --live           # stara ścieżka: symulacja na żywo
 
-from visualization.vispy_scene import TreeScene
+Ciężkie moduły (vispy, scipy, symulacja) są importowane dopiero
+w funkcjach, które ich potrzebują.
+"""
 
+import argparse
 
-def main_intro():
+from visualization.resources import resource_path
+
+
+DEMO_DIR = ("assets", "demo")
+
+
+# -------------------------------------------------
+# Sceny
+# -------------------------------------------------
+
+def build_intro(seed=1):
+    from environment.terrain import Terrain
+    from environment.sun import Sun
+    from structures.tree import Tree
+    from structures.forest import Forest
+    from structures.attraction_point import generate_attraction_points_from_terrain
+    from structures.random_streams import RunStreams
+
+    streams = RunStreams(seed)
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=(25.0, -20.0, 30.0))
 
@@ -20,7 +41,8 @@ def main_intro():
         sun=sun,
         n_candidates=15000,
         area_size=12.0,
-        trunk_height=4.0
+        trunk_height=4.0,
+        rng=streams.ap,
     )
 
     x, y = 0.0, 0.0
@@ -36,23 +58,28 @@ def main_intro():
         step_size=0.5
     )
 
-    forest = Forest([tree], attraction_points)
+    return Forest([tree], attraction_points, streams=streams), terrain, sun
 
-    print("Intro: wzrost jednego drzewa")
-    TreeScene(forest, terrain, sun, debug=True)
-    app.run()
 
+def build_forest(seed=2):
+    from environment.terrain import Terrain
+    from environment.sun import Sun
+    from structures.tree import Tree
+    from structures.forest import Forest
+    from structures.attraction_point import generate_attraction_points_from_terrain
+    from structures.random_streams import RunStreams
 
-def main():
+    streams = RunStreams(seed)
     terrain = Terrain(scale=8.0, height_amp=2.0)
     sun = Sun(position=(25.0, -20.0, 30.0))
 
     attraction_points = generate_attraction_points_from_terrain(
         terrain=terrain,
         sun=sun,
-        n_candidates=20000,   
+        n_candidates=20000,
         area_size=15.0,
-        trunk_height=4.0
+        trunk_height=4.0,
+        rng=streams.ap,
     )
 
     trees = []
@@ -76,15 +103,86 @@ def main():
         )
         trees.append(tree)
 
-    forest = Forest(trees, attraction_points)
+    return Forest(trees, attraction_points, streams=streams), terrain, sun
+
+
+# nazwa, budowa sceny, debug, komunikat
+DEMOS = [
+    ("intro", build_intro, True, "Intro: wzrost jednego drzewa"),
+    ("forest", build_forest, False, None),
+]
+
+
+# -------------------------------------------------
+# Przygotowanie logów
+# -------------------------------------------------
+
+def precompute(max_steps=3000, stagnant_steps=100):
+    """Symuluje każdą scenę do zatrzymania wzrostu i zapisuje jej log wzrostu."""
+    from structures.growth_log import GrowthLogWriter
+
+    for name, build, _, _ in DEMOS:
+        forest, terrain, sun = build()
+        path = resource_path(*DEMO_DIR, name)
+        forest.growth_log = GrowthLogWriter(path, forest, terrain, sun)
+
+        def progress():
+            return sum(len(t.nodes) + len(t.claimed_ap_indices) for t in forest.trees)
+
+        steps, stagnant, last = 0, 0, progress()
+        while steps < max_steps and stagnant < stagnant_steps:
+            forest.grow()
+            steps += 1
+            current = progress()
+            stagnant = stagnant + 1 if current == last else 0
+            last = current
+
+        forest.growth_log.close()
+        nodes = sum(len(t.nodes) for t in forest.trees)
+        print(f"{name}: {steps} kroków, {nodes} node'ów -> {path}")
+
+
+# -------------------------------------------------
+# Pokaz
+# -------------------------------------------------
+
+def show(name, build, debug, live=False):
+    from vispy import app
+    from structures.growth_log import GrowthLog, growth_log_exists
+    from visualization.growth_replay import GrowthLogPlayer
+    from visualization.vispy_scene import TreeScene
+
+    path = resource_path(*DEMO_DIR, name)
+    if not live and growth_log_exists(path):
+        log = GrowthLog(path)
+        scene = TreeScene(None, log.terrain(), log.sun(), debug=debug, worker=GrowthLogPlayer(log))
+    else:
+        forest, terrain, sun = build()
+        scene = TreeScene(forest, terrain, sun, debug=debug)
 
-    TreeScene(forest, terrain, sun)
     app.run()
+    scene.worker.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prezentacja symulacji koron drzew")
+    parser.add_argument("--precompute", action="store_true", help="zapisz logi wzrostu scen do assets/demo")
+    parser.add_argument("--live", action="store_true", help="symulacja na żywo zamiast logów")
+    args = parser.parse_args(argv)
+
+    if args.precompute:
+        precompute()
+        return
+
+    for name, build, debug, message in DEMOS:
+        if message:
+            print(message)
+        show(name, build, debug, live=args.live)
 
     # ---- ANALIZA ----
     """plot_dem(terrain)
     plot_seed_points(attraction_points)
-    plot_canopy_footprints(forest)
+    plot_canopy_raster(forest, terrain)
     plt.show()
 
     run_environment_stats(forest, terrain)
@@ -106,5 +204,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main_intro()
     main()
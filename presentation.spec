@@ -5,7 +5,8 @@ a = Analysis(
     ['presentation.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    # tekstura terenu + logi wzrostu scen (python presentation.py --precompute)
+    datas=[('assets', 'assets')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
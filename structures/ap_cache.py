@@ -0,0 +1,126 @@
+"""
+Cache pól attraction points na dysku.
+
+Pole AP zależy wyłącznie od parametrów terenu, położenia słońca,
+parametrów generatora i strumienia AP (RunStreams), więc przy powtórnym
+uruchomieniu eksperymentu (albo wizualizacji) można je wczytać zamiast generować.
+
+Pola są zapisywane jako pliki .npy (N, 3), które da się otworzyć
+przez np.load(..., mmap_mode="r") – procesy czytające to samo pole
+współdzielą strony pliku w page cache systemu.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from structures.attraction_point import (
+    attraction_point_array,
+    attraction_points_from_array,
+    generate_attraction_points_from_terrain,
+)
+from structures.random_streams import RunStreams
+
+
+# zmiana sposobu generowania AP => podbić wersję (stare pliki przestają pasować)
+_CACHE_VERSION = 4
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "AP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".ap_cache"),
+)
+
+
+# -------------------------------------------------
+# Klucz cache
+# -------------------------------------------------
+
+def ap_cache_key(
+    terrain,
+    sun,
+    streams,
+    n_candidates=15000,
+    area_size=20.0,
+    trunk_height=2.0,
+    z_min=0.5,
+    z_max=14.0,
+) -> str:
+    params = {
+        "version": _CACHE_VERSION,
+        "terrain": [type(terrain).__name__, float(terrain.scale), float(terrain.height_amp)],
+        "sun": [float(v) for v in sun.position],
+        "streams": streams.cache_key(),
+        "n_candidates": int(n_candidates),
+        "area_size": float(area_size),
+        "trunk_height": float(trunk_height),
+        "z_min": float(z_min),
+        "z_max": float(z_max),
+    }
+    payload = json.dumps(params, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:20]
+
+
+# -------------------------------------------------
+# Wczytanie / wygenerowanie pola AP
+# -------------------------------------------------
+
+def load_or_generate_ap_field(
+    terrain,
+    sun,
+    streams,
+    n_candidates=15000,
+    area_size=20.0,
+    trunk_height=2.0,
+    z_min=0.5,
+    z_max=14.0,
+    cache_dir=None,
+) -> np.ndarray:
+    """
+    Zwraca pozycje AP (N, 3) jako tablicę tylko do odczytu (memmap).
+    Przy braku pliku w cache generuje pole ze streams.ap i zapisuje je atomowo.
+    streams: RunStreams albo seed (int, to samo co RunStreams(seed)).
+    """
+    if not isinstance(streams, RunStreams):
+        streams = RunStreams(streams)
+
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    key = ap_cache_key(
+        terrain, sun, streams, n_candidates, area_size, trunk_height, z_min, z_max
+    )
+    path = os.path.join(cache_dir, f"ap_{key}.npy")
+
+    if not os.path.exists(path):
+        points = generate_attraction_points_from_terrain(
+            terrain=terrain,
+            sun=sun,
+            n_candidates=n_candidates,
+            area_size=area_size,
+            trunk_height=trunk_height,
+            z_min=z_min,
+            z_max=z_max,
+            # RunStreams(seed, legacy=True) odtwarza pola z exp*_results.csv
+            rng=streams.ap,
+        )
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # zapis do pliku tymczasowego + rename, żeby równoległe procesy
+        # nigdy nie zobaczyły niedopisanego pliku
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, attraction_point_array(points))
+        os.replace(tmp_path, path)
+
+    return np.load(path, mmap_mode="r")
+
+
+def cached_attraction_points(terrain, sun, streams, cache_dir=None, **params):
+    """
+    Odpowiednik generate_attraction_points_from_terrain z cache na dysku.
+    Zwraca nową listę AttractionPoint (claimed_by=None) przy każdym wywołaniu.
+    """
+    positions = load_or_generate_ap_field(
+        terrain, sun, streams, cache_dir=cache_dir, **params
+    )
+    return attraction_points_from_array(positions)
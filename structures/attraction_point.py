@@ -21,13 +21,20 @@ def generate_attraction_points_from_terrain(
     trunk_height=2.0,
     z_min=0.5,
     z_max=14.0,
+    rng=None,
 ):
     """
     Attraction points:
     - pełne pokrycie obszaru (siatka + jitter)
     - gęstość silnie zależy od słońca
     - liczba punktów ograniczona globalnie
+
+    rng: np.random.Generator (np. RunStreams(seed).ap) albo
+    np.random.RandomState. Bez niego używane są funkcje modułu np.random
+    (globalny stan, stare zachowanie z np.random.seed).
     """
+    if rng is None:
+        rng = np.random
 
     points: list[AttractionPoint] = []
 
@@ -43,8 +50,8 @@ def generate_attraction_points_from_terrain(
 
     for x in xs:
         for y in ys:
-            xj = x + np.random.uniform(-0.4, 0.4)
-            yj = y + np.random.uniform(-0.4, 0.4)
+            xj = x + rng.uniform(-0.4, 0.4)
+            yj = y + rng.uniform(-0.4, 0.4)
 
             sun_val = terrain.sunlight(xj, yj, sun)  
 
@@ -55,13 +62,13 @@ def generate_attraction_points_from_terrain(
 
             prob = min_prob + (max_prob - min_prob) * sun_weight
 
-            if np.random.rand() > prob:
+            if rng.random() > prob:
                 continue
 
             ground_z = terrain.height(xj, yj)
 
             height_factor = 0.4 + 0.6 * sun_weight
-            z = ground_z + trunk_height + np.random.uniform(
+            z = ground_z + trunk_height + rng.uniform(
                 z_min,
                 z_max * height_factor
             )
@@ -69,7 +76,24 @@ def generate_attraction_points_from_terrain(
             points.append(AttractionPoint(xj, yj, z))
 
     if len(points) > target_points:
-        idx = np.random.choice(len(points), size=target_points, replace=False)
+        idx = rng.choice(len(points), size=target_points, replace=False)
         points = [points[i] for i in idx]
 
     return points
+
+
+def attraction_point_array(points) -> np.ndarray:
+    """
+    Pozycje attraction points jako tablica (N, 3)
+    """
+    if not points:
+        return np.empty((0, 3), dtype=float)
+    return np.array([[p.x, p.y, p.z] for p in points], dtype=float)
+
+
+def attraction_points_from_array(positions) -> list[AttractionPoint]:
+    """
+    Odtwarza listę AttractionPoint z tablicy (N, 3).
+    Każde wywołanie daje nowe, niezajęte punkty (claimed_by=None).
+    """
+    return [AttractionPoint(float(x), float(y), float(z)) for x, y, z in positions]
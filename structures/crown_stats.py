@@ -0,0 +1,149 @@
+"""
+Statystyki korony aktualizowane przy każdym nowym node.
+
+Tree.add_node wywołuje CrownStats.add (O(1)), więc kształt korony można
+odczytywać w każdym kroku symulacji bez liczenia metryk od zera.
+
+Problem ruchomego progu: korona to node'y z z >= z_min + ratio * (z_max - z_min),
+a próg rośnie razem z drzewem. Dlatego sumy (n, Σx, Σy, Σx², Σy², Σxy,
+lewo/prawo) trzymamy osobno dla poziomych warstw o grubości slab_height.
+Warstwy w całości powyżej progu sumujemy gotowymi sumami, a tylko warstwę,
+przez którą przechodzi próg, filtrujemy node po node'zie. Koszt odczytu
+zależy od liczby warstw (wysokość / slab_height), a nie od liczby node'ów,
+a wynik jest dokładny.
+
+Współrzędne x, y są przechowywane względem korzenia (mniejsze błędy
+zaokrągleń w sumach kwadratów).
+"""
+
+import math
+
+import numpy as np
+
+
+# indeksy w wektorze sum warstwy
+_N, _SX, _SY, _SXX, _SYY, _SXY, _LEFT, _RIGHT = range(8)
+
+
+class CrownStats:
+    def __init__(self, root_position, slab_height=0.25):
+        self.root_x, self.root_y, self.root_z = (float(v) for v in root_position)
+        self.slab_height = slab_height
+
+        self.count = 0
+        self.z_min = math.inf
+        self.z_max = -math.inf
+
+        # indeks warstwy -> sumy (8,) oraz lista node'ów (x, y, z) tej warstwy
+        self._slab_sums: dict[int, np.ndarray] = {}
+        self._slab_points: dict[int, list] = {}
+
+        self.add(self.root_x, self.root_y, self.root_z)
+
+    # -------------------------------------------------
+
+    def _slab(self, z: float) -> int:
+        return math.floor((z - self.root_z) / self.slab_height)
+
+    def add(self, x: float, y: float, z: float):
+        """Dodaje node (O(1))."""
+        x = float(x) - self.root_x
+        y = float(y) - self.root_y
+        z = float(z)
+
+        self.count += 1
+        self.z_min = min(self.z_min, z)
+        self.z_max = max(self.z_max, z)
+
+        k = self._slab(z)
+        sums = self._slab_sums.get(k)
+        if sums is None:
+            sums = self._slab_sums[k] = np.zeros(8)
+            self._slab_points[k] = []
+
+        sums[_N] += 1
+        sums[_SX] += x
+        sums[_SY] += y
+        sums[_SXX] += x * x
+        sums[_SYY] += y * y
+        sums[_SXY] += x * y
+        sums[_LEFT] += x < 0
+        sums[_RIGHT] += x > 0
+
+        self._slab_points[k].append((x, y, z))
+
+    # -------------------------------------------------
+
+    def canopy_sums(self, min_height_ratio=0.6) -> np.ndarray:
+        """Sumy (n, Σx, Σy, Σx², Σy², Σxy, lewo, prawo) dla node'ów korony."""
+        threshold = self.z_min + min_height_ratio * (self.z_max - self.z_min)
+        k_threshold = self._slab(threshold)
+
+        total = np.zeros(8)
+        for k, sums in self._slab_sums.items():
+            if k > k_threshold:
+                total += sums
+
+        # warstwa przecięta progiem – dokładnie, node po node'zie
+        points = self._slab_points.get(k_threshold)
+        if points:
+            pts = np.array(points)
+            pts = pts[pts[:, 2] >= threshold]
+            if len(pts):
+                x, y = pts[:, 0], pts[:, 1]
+                total += (
+                    len(pts), x.sum(), y.sum(),
+                    (x * x).sum(), (y * y).sum(), (x * y).sum(),
+                    (x < 0).sum(), (x > 0).sum(),
+                )
+
+        return total
+
+    def metrics(self, min_height_ratio=0.6) -> dict:
+        """
+        Metryki korony w bieżącym stanie:
+        - height: względem korzenia (jak crown_metrics),
+        - asymmetry_pca, asymmetry_inertia: jak w CrownAnalysis,
+        - asymmetry_hemispheres_trunk: lewo/prawo względem osi pnia (x korzenia),
+          a nie środka korony, bo środek przesuwa się w czasie.
+        """
+        s = self.canopy_sums(min_height_ratio)
+        n = s[_N]
+
+        result = {
+            "height": self.z_max - self.root_z,
+            "n_canopy": int(n),
+            "centroid_x": self.root_x + s[_SX] / n,
+            "centroid_y": self.root_y + s[_SY] / n,
+            "asymmetry_pca": 0.0,
+            "asymmetry_inertia": 0.0,
+            "asymmetry_hemispheres_trunk": 0.0,
+        }
+
+        if n < 3:
+            return result
+
+        # momenty centralne
+        cx, cy = s[_SX] / n, s[_SY] / n
+        sxx = max(s[_SXX] - n * cx * cx, 0.0)
+        syy = max(s[_SYY] - n * cy * cy, 0.0)
+        sxy = s[_SXY] - n * cx * cy
+
+        # PCA: wartości własne kowariancji (ddof=1 jak np.cov)
+        a, c, b = sxx / (n - 1), syy / (n - 1), sxy / (n - 1)
+        half_trace = 0.5 * (a + c)
+        disc = math.sqrt(0.25 * (a - c) ** 2 + b * b)
+        eig_small = half_trace - disc
+        if eig_small > 1e-6:
+            result["asymmetry_pca"] = (half_trace + disc) / eig_small
+
+        # bezwładność: Ixx = Σ(y - cy)², Iyy = Σ(x - cx)²
+        i_min = min(sxx, syy)
+        if i_min > 1e-6:
+            result["asymmetry_inertia"] = max(sxx, syy) / i_min
+
+        sides = s[_LEFT] + s[_RIGHT]
+        if sides > 0:
+            result["asymmetry_hemispheres_trunk"] = abs(s[_LEFT] - s[_RIGHT]) / sides
+
+        return result
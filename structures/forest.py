@@ -1,9 +1,35 @@
+from structures.profiling import NULL_PROFILER
+
+
 class Forest:
-    def __init__(self, trees, attraction_points):
+    def __init__(self, trees, attraction_points, profiler=None, growth_log=None, streams=None):
         self.trees = trees
         self.attraction_points = attraction_points
 
+        # opcjonalne RunStreams – drzewa bez własnego rng dostają streams.tree(tree_id)
+        if streams is not None:
+            for tree in trees:
+                if tree.rng is None:
+                    tree.rng = streams.tree(tree.tree_id)
+
+        self.set_profiler(profiler)
+        # opcjonalny GrowthLogWriter – zapis każdego kroku do logu wzrostu
+        self.growth_log = growth_log
+
+    def set_profiler(self, profiler):
+        """Opcjonalny GrowthProfiler współdzielony przez wszystkie drzewa."""
+        self.profiler = profiler or NULL_PROFILER
+        for tree in self.trees:
+            tree.profiler = self.profiler
+
     def grow(self, steps_per_tick: int = 1):
+        prof = self.profiler
         for _ in range(steps_per_tick):
+            prof.begin_step()
             for tree in self.trees:
-                tree.grow()
+                with prof.phase("tree.grow", tid=tree.tree_id):
+                    tree.grow()
+            prof.end_step()
+
+            if self.growth_log is not None:
+                self.growth_log.record(self)
@@ -0,0 +1,308 @@
+"""
+Log wzrostu lasu: append-only zapis kolejnych kroków symulacji na dysku.
+
+Katalog logu zawiera:
+- meta.json     – parametry terenu i słońca, tree_ids, liczba AP,
+- aps.npy       – pozycje attraction points (M, 3),
+- nodes.bin     – rekordy NODE_DTYPE (drzewo, rodzic, x, y, z) w kolejności dodawania,
+- claims.bin    – rekordy CLAIM_DTYPE (AP, drzewo) w kolejności zajmowania,
+- trunks.bin    – rekordy TRUNK_DTYPE: krok, w którym drzewo skończyło pień,
+- steps.bin     – int64 (liczba rekordów nodes, liczba rekordów claims) po każdym kroku.
+
+Wiersz 0 w steps.bin to stan początkowy (same korzenie). Stan po kroku s
+to pierwsze steps[s] rekordów obu logów, więc odczyt dowolnego kroku nie
+wymaga przeliczania symulacji. Pliki są czytane przez np.memmap, a log
+można dopisywać także podczas odczytu (GrowthLog.refresh).
+
+Indeksy drzew w rekordach to pozycje w forest.trees (tree_ids w meta.json).
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+NODE_DTYPE = np.dtype([("tree", "<i4"), ("parent", "<i4"), ("position", "<f8", 3)])
+CLAIM_DTYPE = np.dtype([("ap", "<i4"), ("tree", "<i4")])
+TRUNK_DTYPE = np.dtype([("step", "<i8"), ("tree", "<i4"), ("node", "<i4"), ("growth_radius", "<f8")])
+STEP_DTYPE = np.dtype("<i8")
+
+_FORMAT_VERSION = 1
+
+DEFAULT_LOG_DIR = os.environ.get(
+    "GROWTH_LOG_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".growth_logs"),
+)
+
+
+def _paths(path):
+    return {
+        name: os.path.join(path, name)
+        for name in ("meta.json", "aps.npy", "nodes.bin", "claims.bin", "trunks.bin", "steps.bin")
+    }
+
+
+def growth_log_path(name, params, log_dir=None) -> str:
+    """
+    Katalog logu "<name>_<hash params>" (jak klucz w ap_cache): log symulacji
+    z innymi parametrami trafia do innego katalogu zamiast zostać odtworzony.
+    """
+    payload = json.dumps({"version": _FORMAT_VERSION, **params}, sort_keys=True).encode("utf-8")
+    digest = hashlib.sha1(payload).hexdigest()[:12]
+    return os.path.join(log_dir or DEFAULT_LOG_DIR, f"{name}_{digest}")
+
+
+def growth_log_exists(path) -> bool:
+    """True dla kompletnego logu (zamkniętego przez GrowthLogWriter.close)."""
+    files = _paths(path)
+    if not all(os.path.exists(p) for p in files.values()):
+        return False
+    with open(files["meta.json"]) as f:
+        return "n_steps" in json.load(f)
+
+
+# -------------------------------------------------
+# Zapis
+# -------------------------------------------------
+
+class GrowthLogWriter:
+    """
+    Dopisuje do logu to, co zmieniło się w lesie od poprzedniego record();
+    każdy krok jest od razu wypychany do plików (steps.bin na końcu). Użycie: forest.growth_log = GrowthLogWriter(path, forest, terrain, sun)
+    (Forest.grow woła record po każdym kroku), na końcu close().
+    """
+
+    def __init__(self, path, forest, terrain, sun):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        files = _paths(path)
+
+        self.tree_ids = [int(tree.tree_id) for tree in forest.trees]
+        self.meta = {
+            "version": _FORMAT_VERSION,
+            "terrain": {"type": type(terrain).__name__, **{k: float(v) for k, v in vars(terrain).items()}},
+            "sun": [float(v) for v in sun.position],
+            "tree_ids": self.tree_ids,
+            "n_attraction_points": len(forest.attraction_points),
+        }
+        self._write_meta()
+
+        ap_xyz = np.array([[p.x, p.y, p.z] for p in forest.attraction_points], dtype=float)
+        np.save(files["aps.npy"], ap_xyz.reshape(-1, 3))
+
+        self._nodes = open(files["nodes.bin"], "wb")
+        self._claims = open(files["claims.bin"], "wb")
+        self._trunks = open(files["trunks.bin"], "wb")
+        self._steps = open(files["steps.bin"], "wb")
+
+        self.step = 0
+        self.n_node_records = 0
+        self.n_claim_records = 0
+        self._n_nodes = [0] * len(forest.trees)
+        self._n_claims = [0] * len(forest.trees)
+        self._trunk_done = [False] * len(forest.trees)
+
+        self._write(forest)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------------------------
+
+    def record(self, forest):
+        """Zapisuje jeden krok (wywoływane po każdym kroku Forest.grow)."""
+        self.step += 1
+        self._write(forest)
+
+    def _write(self, forest):
+        nodes, claims, trunks = [], [], []
+
+        for t, tree in enumerate(forest.trees):
+            start, n = self._n_nodes[t], len(tree.nodes)
+            if n > start:
+                rec = np.empty(n - start, dtype=NODE_DTYPE)
+                rec["tree"] = t
+                rec["parent"] = [-1 if node.parent is None else node.parent for node in tree.nodes[start:n]]
+                rec["position"] = tree.node_positions()[start:n]
+                nodes.append(rec)
+                self._n_nodes[t] = n
+
+            new_claims = tree.claimed_ap_indices[self._n_claims[t]:]
+            if new_claims:
+                rec = np.empty(len(new_claims), dtype=CLAIM_DTYPE)
+                rec["ap"] = new_claims
+                rec["tree"] = t
+                claims.append(rec)
+                self._n_claims[t] += len(new_claims)
+
+            if tree.trunk_done and not self._trunk_done[t]:
+                rec = np.empty(1, dtype=TRUNK_DTYPE)
+                rec["step"] = self.step
+                rec["tree"] = t
+                # pień kończy się node'em dodanym w tym samym kroku
+                rec["node"] = len(tree.nodes) - 1
+                rec["growth_radius"] = tree.growth_radius()
+                trunks.append(rec)
+                self._trunk_done[t] = True
+
+        for f, parts in ((self._nodes, nodes), (self._claims, claims), (self._trunks, trunks)):
+            for rec in parts:
+                f.write(rec.tobytes())
+
+        self.n_node_records += sum(len(rec) for rec in nodes)
+        self.n_claim_records += sum(len(rec) for rec in claims)
+
+        # rekordy trafiają do plików przed wierszem indeksu kroków, więc
+        # GrowthLog.refresh w trakcie zapisu nie zobaczy kroku bez danych
+        for f in (self._nodes, self._claims, self._trunks):
+            f.flush()
+        self._steps.write(np.array([self.n_node_records, self.n_claim_records], dtype=STEP_DTYPE).tobytes())
+        self._steps.flush()
+
+    def flush(self):
+        # kolejność: rekordy przed indeksem kroków, żeby czytelnik nie zobaczył
+        # kroku, którego dane nie są jeszcze na dysku
+        for f in (self._nodes, self._claims, self._trunks, self._steps):
+            f.flush()
+
+    def _write_meta(self):
+        with open(_paths(self.path)["meta.json"], "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def close(self):
+        if not self._steps.closed:
+            self.flush()
+            for f in (self._nodes, self._claims, self._trunks, self._steps):
+                f.close()
+            # n_steps w meta.json oznacza kompletny log
+            self.meta["n_steps"] = self.step
+            self._write_meta()
+
+
+# -------------------------------------------------
+# Odczyt
+# -------------------------------------------------
+
+def _memmap(path, dtype):
+    n = os.path.getsize(path) // dtype.itemsize
+    if n == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+
+class GrowthLog:
+    """
+    Odczyt logu. Po otwarciu rekordy node'ów są pogrupowane wg drzew
+    (jeden stabilny sort), więc stan dowolnego kroku to dla każdego drzewa
+    searchsorted po indeksach rekordów – O(T log N), bez przeliczania wzrostu.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._files = _paths(path)
+
+        with open(self._files["meta.json"]) as f:
+            self.meta = json.load(f)
+        self.tree_ids = tuple(self.meta["tree_ids"])
+        self.ap_positions = np.load(self._files["aps.npy"], mmap_mode="r")
+
+        self.refresh()
+
+    def refresh(self):
+        """Wczytuje kroki dopisane od ostatniego odczytu (log może być wciąż zapisywany)."""
+        steps = _memmap(self._files["steps.bin"], STEP_DTYPE)
+        self.steps = steps[:len(steps) // 2 * 2].reshape(-1, 2)
+        node_end, claim_end = self.steps[-1] if len(self.steps) else (0, 0)
+
+        # tylko rekordy objęte zapisanym indeksem kroków
+        self.node_records = _memmap(self._files["nodes.bin"], NODE_DTYPE)[:node_end]
+        self.claim_records = _memmap(self._files["claims.bin"], CLAIM_DTYPE)[:claim_end]
+        self.trunk_records = _memmap(self._files["trunks.bin"], TRUNK_DTYPE)
+        self.trunk_records = self.trunk_records[self.trunk_records["step"] < len(self.steps)]
+
+        # node'y każdego drzewa w kolejności dodawania + globalny indeks rekordu
+        trees = np.asarray(self.node_records["tree"])
+        order = np.argsort(trees, kind="stable")
+        bounds = np.searchsorted(trees[order], np.arange(len(self.tree_ids) + 1))
+
+        positions = np.asarray(self.node_records["position"])[order]
+        parents = np.asarray(self.node_records["parent"])[order]
+        for arr in (positions, parents, order):
+            arr.setflags(write=False)
+
+        self._record_index = [order[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        self._positions = [positions[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        self._parents = [parents[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+        # ranga zajęcia każdego AP (AP zajmowany jest najwyżej raz)
+        n_aps = len(self.ap_positions)
+        self._claim_rank = np.full(n_aps, np.iinfo(np.int64).max)
+        self._claim_tree = np.full(n_aps, -1)
+        self._claim_rank[self.claim_records["ap"]] = np.arange(len(self.claim_records))
+        self._claim_tree[self.claim_records["ap"]] = np.asarray(self.tree_ids)[self.claim_records["tree"]]
+        self._claim_order = np.array(self.claim_records["ap"], dtype=int)
+        self._claim_order.setflags(write=False)
+
+    # -------------------------------------------------
+
+    @property
+    def n_steps(self) -> int:
+        """Numer ostatniego zapisanego kroku (0 = same korzenie)."""
+        return len(self.steps) - 1
+
+    def _clip(self, step) -> int:
+        return int(np.clip(step, 0, self.n_steps))
+
+    def node_counts(self, step) -> np.ndarray:
+        """Liczba node'ów każdego drzewa po kroku step."""
+        node_end = self.steps[self._clip(step), 0]
+        return np.array([np.searchsorted(idx, node_end) for idx in self._record_index], dtype=int)
+
+    def tree_nodes(self, step) -> list[np.ndarray]:
+        """(N_t, 3) node'y każdego drzewa po kroku step (widoki tylko do odczytu)."""
+        return [pos[:n] for pos, n in zip(self._positions, self.node_counts(step))]
+
+    def tree_parents(self, step) -> list[np.ndarray]:
+        """Rodzice node'ów 1..N_t-1 każdego drzewa po kroku step."""
+        return [par[1:max(n, 1)] for par, n in zip(self._parents, self.node_counts(step))]
+
+    def ap_owner(self, step) -> np.ndarray:
+        """tree_id właściciela każdego AP po kroku step albo -1."""
+        claim_end = self.steps[self._clip(step), 1]
+        return np.where(self._claim_rank < claim_end, self._claim_tree, -1)
+
+    def ap_claims(self, step) -> np.ndarray:
+        """Indeksy AP zajętych do kroku step, w kolejności zajmowania."""
+        return self._claim_order[:self.steps[self._clip(step), 1]]
+
+    def trunks(self, step):
+        """(trunk_end (T, 3), growth_radius (T,)) po kroku step, NaN dla drzew bez pnia."""
+        step = self._clip(step)
+        trunk_end = np.full((len(self.tree_ids), 3), np.nan)
+        growth_radius = np.full(len(self.tree_ids), np.nan)
+
+        for rec in self.trunk_records[self.trunk_records["step"] <= step]:
+            t = int(rec["tree"])
+            trunk_end[t] = self._positions[t][rec["node"]]
+            growth_radius[t] = rec["growth_radius"]
+        return trunk_end, growth_radius
+
+    # -------------------------------------------------
+    # Scena
+    # -------------------------------------------------
+
+    def terrain(self):
+        from environment.terrain import Terrain
+
+        params = {k: v for k, v in self.meta["terrain"].items() if k != "type"}
+        return Terrain(**params)
+
+    def sun(self):
+        from environment.sun import Sun
+
+        return Sun(position=tuple(self.meta["sun"]))
@@ -0,0 +1,169 @@
+"""
+Opcjonalne profilowanie faz wzrostu (Tree.grow / Forest.grow).
+
+Domyślnie drzewa używają NULL_PROFILER, którego metody nic nie robią,
+więc koszt przy wyłączonym profilowaniu to jedno wywołanie metody na fazę.
+
+Użycie:
+    profiler = GrowthProfiler(trace=True)
+    forest = Forest(trees, attraction_points, profiler=profiler)
+    ...
+    report = profiler.report()
+    profiler.write_chrome_trace("trace.json")   # chrome://tracing / Perfetto
+
+Czasy faz są inkluzywne: "min_distance" nie obejmuje add_node, ale
+"tree.grow" (mierzony w Forest.grow) obejmuje wszystkie fazy drzewa.
+"""
+
+import json
+import time
+from contextlib import nullcontext
+
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _NullProfiler:
+    enabled = False
+
+    def phase(self, name, tid=None):
+        return _NULL_CONTEXT
+
+    def count(self, name, n=1):
+        pass
+
+    def begin_step(self):
+        pass
+
+    def end_step(self):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "tid", "prev_tid", "t0")
+
+    def __init__(self, profiler, name, tid):
+        self.profiler = profiler
+        self.name = name
+        self.tid = tid
+
+    def __enter__(self):
+        prof = self.profiler
+        self.prev_tid = prof._tid
+        if self.tid is not None:
+            prof._tid = self.tid
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter()
+        prof = self.profiler
+
+        stats = prof.phases.get(self.name)
+        if stats is None:
+            stats = prof.phases[self.name] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += t1 - self.t0
+
+        if prof.trace:
+            prof.events.append({
+                "name": self.name,
+                "cat": "grow",
+                "ph": "X",
+                "ts": (self.t0 - prof._t_origin) * 1e6,
+                "dur": (t1 - self.t0) * 1e6,
+                "pid": 0,
+                "tid": prof._tid,
+            })
+
+        prof._tid = self.prev_tid
+        return False
+
+
+class GrowthProfiler:
+    enabled = True
+
+    def __init__(self, trace=False):
+        self.trace = trace
+
+        # nazwa fazy -> [liczba wywołań, łączny czas w s]
+        self.phases: dict[str, list] = {}
+        # liczniki globalne (kdtree_builds, nodes_added, aps_in_range, ...)
+        self.counters: dict[str, int] = {}
+        # liczniki i czas dla każdego kroku Forest.grow
+        self.steps: list[dict] = []
+        self.events: list[dict] = []
+
+        self._tid = 0
+        self._t_origin = time.perf_counter()
+        self._step_counters: dict[str, int] | None = None
+        self._step_t0 = 0.0
+
+    # -------------------------------------------------
+
+    def phase(self, name, tid=None):
+        """Kontekst mierzący fazę; tid (np. tree_id) dziedziczą fazy zagnieżdżone."""
+        return _Phase(self, name, tid)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+        if self._step_counters is not None:
+            self._step_counters[name] = self._step_counters.get(name, 0) + n
+
+    def begin_step(self):
+        self._step_counters = {}
+        self._step_t0 = time.perf_counter()
+
+    def end_step(self):
+        if self._step_counters is None:
+            return
+
+        record = {
+            "step": len(self.steps),
+            "wall_s": time.perf_counter() - self._step_t0,
+        }
+        record.update(self._step_counters)
+        self.steps.append(record)
+        self._step_counters = None
+
+    # -------------------------------------------------
+
+    def report(self) -> dict:
+        total = sum(s["wall_s"] for s in self.steps)
+
+        phases = {}
+        for name, (calls, seconds) in sorted(
+            self.phases.items(), key=lambda kv: kv[1][1], reverse=True
+        ):
+            phases[name] = {
+                "calls": calls,
+                "total_s": seconds,
+                "mean_us": seconds / calls * 1e6 if calls else 0.0,
+                "share": seconds / total if total > 0 else None,
+            }
+
+        return {
+            "steps": len(self.steps),
+            "wall_s": total,
+            "phases": phases,
+            "counters": dict(self.counters),
+            "per_step": list(self.steps),
+        }
+
+    def write_chrome_trace(self, path):
+        """Zapisuje zdarzenia w formacie Chrome Trace Event (wymaga trace=True)."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def print_report(self):
+        report = self.report()
+        print(f"steps={report['steps']} wall={report['wall_s']:.3f}s")
+        print(f"{'phase':<22} {'calls':>9} {'total s':>10} {'mean us':>10} {'share':>7}")
+        for name, p in report["phases"].items():
+            share = f"{p['share']:.1%}" if p["share"] is not None else "-"
+            print(f"{name:<22} {p['calls']:>9} {p['total_s']:>10.4f} {p['mean_us']:>10.1f} {share:>7}")
+        for name, value in report["counters"].items():
+            print(f"{name}: {value}")
@@ -0,0 +1,102 @@
+"""
+Niezależne strumienie liczb losowych dla symulacji.
+
+Zamiast globalnego np.random.seed(seed) uruchomienie dostaje RunStreams(seed),
+czyli generatory np.random.Generator z potomków SeedSequence(seed).spawn:
+- ap            – generowanie attraction points (każdy odczyt to nowy
+                  generator od początku strumienia),
+- tree(tree_id) – losowość konkretnego drzewa (Tree.jitter kierunku wzrostu),
+- replicate(k)  – RunStreams k-tego powtórzenia eksperymentu.
+
+Potomek o indeksie i ma zawsze ten sam spawn_key, więc strumień zależy
+tylko od (seed, strumień, indeks), a nie od kolejności wywołań: replicate(3)
+policzone w osobnym procesie daje te same liczby co w pętli szeregowej
+(map_runs uruchamia powtórzenia równolegle).
+
+RunStreams(seed, legacy=True) odtwarza stare wyniki (exp*_results.csv):
+ap to np.random.RandomState(seed) – ten sam strumień co np.random.seed(seed)
+i np.random.* – drzewa nie mają własnych strumieni, a replicate(k) to seed + k.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def _nth_child(parent: np.random.SeedSequence, children: list, index: int) -> np.random.SeedSequence:
+    """index-ty potomek parent.spawn (potomkowie tworzeni po kolei i pamiętani)."""
+    if index < 0:
+        raise ValueError(f"indeks strumienia musi być >= 0, jest {index}")
+    if index >= len(children):
+        children.extend(parent.spawn(index + 1 - len(children)))
+    return children[index]
+
+
+class RunStreams:
+    def __init__(self, seed, legacy=False, label=None):
+        self.legacy = legacy
+        # etykieta uruchomienia w logach i CSV (seed bazowy + numer powtórzenia)
+        if label is None and not isinstance(seed, np.random.SeedSequence):
+            label = int(seed)
+        self.label = label
+
+        if legacy:
+            self.seed = int(seed)
+            return
+
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+
+        self._ap, self._trees, self._replicates = seed.spawn(3)
+        self._tree_children: list = []
+        self._replicate_children: list = []
+
+    @property
+    def ap(self):
+        """Generator attraction points; legacy: np.random.RandomState(seed)."""
+        if self.legacy:
+            return np.random.RandomState(self.seed)
+        return np.random.default_rng(self._ap)
+
+    def tree(self, tree_id: int) -> np.random.Generator | None:
+        """Nowy generator drzewa tree_id (zawsze ten sam strumień); legacy: None."""
+        if self.legacy:
+            return None
+        return np.random.default_rng(_nth_child(self._trees, self._tree_children, tree_id))
+
+    def replicate(self, k: int) -> "RunStreams":
+        """Strumienie k-tego powtórzenia eksperymentu."""
+        label = None if self.label is None else self.label + k
+        if self.legacy:
+            return RunStreams(self.seed + k, legacy=True, label=label)
+        return RunStreams(_nth_child(self._replicates, self._replicate_children, k), label=label)
+
+    def cache_key(self):
+        """Opis strumienia AP do kluczy cache (JSON)."""
+        if self.legacy:
+            return {"legacy_seed": self.seed}
+        seq = self.seed_sequence
+        return {"entropy": str(seq.entropy), "spawn_key": [int(k) for k in seq.spawn_key]}
+
+
+# -------------------------------------------------
+# Powtórzenia równolegle
+# -------------------------------------------------
+
+def map_runs(fn, tasks, workers=1):
+    """
+    fn(*task) dla każdego zadania, wyniki w kolejności tasks.
+    workers > 1: osobne procesy (spawn). Każde zadanie niesie własne
+    RunStreams, więc wyniki są identyczne jak przy workers=1.
+    """
+    tasks = list(tasks)
+    if workers is None or workers <= 1:
+        for task in tasks:
+            yield fn(*task)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        yield from pool.map(fn, *zip(*tasks))
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from structures.node import Node
+from structures.crown_stats import CrownStats
+from structures.profiling import NULL_PROFILER
 from scipy.spatial import KDTree
 import numpy as np
 
@@ -15,6 +17,8 @@ class Tree:
         influence_radius: float = 2.0,
         kill_radius: float = 1.0,
         step_size: float = 0.5,
+        rng=None,
+        jitter: float = 0.0,
     ):
         self.tree_id = tree_id
 
@@ -22,6 +26,11 @@ class Tree:
         self.nodes: list[Node] = []
         self.edges: list[tuple[int, int]] = []
 
+        # rośnie przy każdym nowym node (ForestState odświeża tylko zmienione drzewa)
+        self.version = 0
+        # indeksy AP (w self.attraction_points) zajętych przez to drzewo, w kolejności
+        self.claimed_ap_indices: list[int] = []
+
         # attraction points współdzielone z lasem
         self.attraction_points = attraction_points
 
@@ -29,12 +38,20 @@ class Tree:
         self.kill_radius = kill_radius
         self.step_size = step_size
 
+        # losowe odchylenie kierunku wzrostu (odch. std.); 0 = wzrost deterministyczny.
+        # rng to własny strumień drzewa (RunStreams.tree, nadawany też przez Forest)
+        self.jitter = jitter
+        self.rng = rng
+
         self.trunk_height = 4.0
         self.trunk_done = False
         self.trunk_end: Node | None = None
 
         self.terrain = terrain
 
+        # profilowanie faz wzrostu (GrowthProfiler); domyślnie wyłączone
+        self.profiler = NULL_PROFILER
+
         # --- korzeń ---
         root = Node(*root_position, parent=None)
         self.nodes.append(root)
@@ -42,6 +59,9 @@ class Tree:
         self._node_positions = np.array([root.position()], dtype=float)
         self._node_tree = KDTree(self._node_positions)
 
+        # statystyki korony aktualizowane przy każdym nowym node (O(1))
+        self.crown_stats = CrownStats(root_position)
+
         # --- parametry zależne od wilgotności ---
         root_x, root_y, _ = root_position
         root_moisture = self.terrain.moisture(root_x, root_y)
@@ -56,16 +76,30 @@ class Tree:
 
     def _rebuild_node_tree(self) -> None:
         """Aktualizuje KDTree po dodaniu nowych nodeów."""
-        self._node_positions = np.array(
-            [n.position() for n in self.nodes],
-            dtype=float
-        )
-        self._node_tree = KDTree(self._node_positions)
+        with self.profiler.phase("node_index_rebuild"):
+            self._node_positions = np.array(
+                [n.position() for n in self.nodes],
+                dtype=float
+            )
+            self._node_tree = KDTree(self._node_positions)
+        self.profiler.count("kdtree_builds")
+
+    def node_positions(self) -> np.ndarray:
+        """
+        Pozycje wszystkich node'ów (N, 3), w kolejności self.nodes.
+        Widok tylko do odczytu – tablica jest współdzielona z KDTree drzewa.
+        """
+        view = self._node_positions.view()
+        view.flags.writeable = False
+        return view
 
     def add_node(self, position, parent_index: int):
         node = Node(*position, parent=parent_index)
         self.nodes.append(node)
         self.edges.append((parent_index, len(self.nodes) - 1))
+        self.crown_stats.add(*position)
+        self.version += 1
+        self.profiler.count("nodes_added")
 
         self._rebuild_node_tree()
 
@@ -95,44 +129,53 @@ class Tree:
 
         # najpierw rośnie pień
         if not self.trunk_done:
-            self.grow_trunk()
+            with self.profiler.phase("trunk"):
+                self.grow_trunk()
             return
 
+        prof = self.profiler
+
         trunk_pos = self.trunk_end.position()
         growth_radius = self.growth_radius()
 
         node_tree = self._node_tree
 
         # bierzemy tylko AP, które są wolne lub przypisane do tego drzewa
-        free_aps = [
-            ap for ap in self.attraction_points
-            if ap.claimed_by is None or ap.claimed_by == self.tree_id
-        ]
+        with prof.phase("free_ap_filter"):
+            free_aps = [
+                ap for ap in self.attraction_points
+                if ap.claimed_by is None or ap.claimed_by == self.tree_id
+            ]
 
         if not free_aps:
             return
 
         # pozycje AP tylko dla wolnych punktów
-        ap_positions = np.array([ap.position() for ap in free_aps], dtype=float)
-        ap_tree = KDTree(ap_positions)
+        with prof.phase("ap_kdtree_build"):
+            ap_positions = np.array([ap.position() for ap in free_aps], dtype=float)
+            ap_tree = KDTree(ap_positions)
+        prof.count("kdtree_builds")
 
         # szukamy AP w zasięgu korony
-        ap_indices = ap_tree.query_ball_point(trunk_pos, growth_radius)
+        with prof.phase("ball_query"):
+            ap_indices = ap_tree.query_ball_point(trunk_pos, growth_radius)
+        prof.count("aps_in_range", len(ap_indices))
         if not ap_indices:
             return
 
         growth_vectors: dict[int, list[np.ndarray]] = {i: [] for i in range(len(self.nodes))}
 
         # dla każdego AP szukamy najbliższego node’a
-        for i in ap_indices:
-            ap = free_aps[i]
+        with prof.phase("nearest_node"):
+            for i in ap_indices:
+                ap = free_aps[i]
 
-            dist, node_idx = node_tree.query(ap.position())
-            if dist < self.influence_radius:
-                direction = ap.position() - self.nodes[node_idx].position()
-                norm = np.linalg.norm(direction)
-                if norm > 0:
-                    growth_vectors[node_idx].append(direction / norm)
+                dist, node_idx = node_tree.query(ap.position())
+                if dist < self.influence_radius:
+                    direction = ap.position() - self.nodes[node_idx].position()
+                    norm = np.linalg.norm(direction)
+                    if norm > 0:
+                        growth_vectors[node_idx].append(direction / norm)
 
         new_nodes: list[tuple[np.ndarray, int]] = []
         for node_idx, directions in growth_vectors.items():
@@ -145,31 +188,48 @@ class Tree:
                 continue
 
             avg_dir /= norm
+            if self.jitter > 0:
+                avg_dir = self._jittered(avg_dir)
             parent_node = self.nodes[node_idx]
             new_pos = parent_node.position() + avg_dir * self.step_size
             new_nodes.append((new_pos, node_idx))
 
         # dodajemy nowe node’y, pilnując minimalnego dystansu
         for pos, parent_idx in new_nodes:
-            if all(
-                np.linalg.norm(pos - n.position()) > self.step_size * 0.9
-                for n in self.nodes
-            ):
+            with prof.phase("min_distance"):
+                far_enough = all(
+                    np.linalg.norm(pos - n.position()) > self.step_size * 0.9
+                    for n in self.nodes
+                )
+            if far_enough:
                 self.add_node(tuple(pos), parent_idx)
 
         # --- szybki kill-radius (KDTree) ---
-        node_positions = np.array([n.position() for n in self.nodes])
-        node_tree = KDTree(node_positions)
-
-        for ap in self.attraction_points:
-            if ap.claimed_by is not None:
-                continue
-
-            idxs = node_tree.query_ball_point(ap.position(), self.kill_radius)
-            if idxs:
-                ap.claimed_by = self.tree_id
-                self.consumed_attraction_points += 1
-
+        with prof.phase("node_index_rebuild"):
+            node_positions = np.array([n.position() for n in self.nodes])
+            node_tree = KDTree(node_positions)
+        prof.count("kdtree_builds")
+
+        with prof.phase("kill_pass"):
+            for ap_index, ap in enumerate(self.attraction_points):
+                if ap.claimed_by is not None:
+                    continue
+
+                idxs = node_tree.query_ball_point(ap.position(), self.kill_radius)
+                if idxs:
+                    ap.claimed_by = self.tree_id
+                    self.claimed_ap_indices.append(ap_index)
+                    self.consumed_attraction_points += 1
+
+
+    def _jittered(self, direction: np.ndarray) -> np.ndarray:
+        if self.rng is None:
+            raise ValueError(
+                f"drzewo {self.tree_id}: jitter > 0 wymaga rng (Tree(rng=...) albo Forest(streams=...))"
+            )
+        direction = direction + self.rng.normal(0.0, self.jitter, 3)
+        norm = np.linalg.norm(direction)
+        return direction / norm if norm > 0 else direction
 
     # ---------------- RADIUS ----------------
 
@@ -186,3 +246,13 @@ class Tree:
 
     def height(self) -> float:
         return max(n.z for n in self.nodes)
+
+
+# -------------------------------------------------
+# Wersja Tree bez growth_radius (exp4)
+# -------------------------------------------------
+
+class TreeNoRadius(Tree):
+
+    def growth_radius(self) -> float:
+        return 10000.0
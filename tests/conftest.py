@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# moduły projektu (structures, analysis, ...) importowane z katalogu głównego repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from environment.terrain import Terrain  # noqa: E402
+from environment.sun import Sun  # noqa: E402
+from structures.attraction_point import generate_attraction_points_from_terrain  # noqa: E402
+from structures.forest import Forest  # noqa: E402
+from structures.random_streams import RunStreams  # noqa: E402
+from structures.tree import Tree  # noqa: E402
+
+
+@pytest.fixture
+def make_forest():
+    """Mały las na polu 6 x 6 z niskimi pniami – kilkadziesiąt kroków trwa ułamek sekundy."""
+
+    def build(positions=((-1.0, 0.0), (1.0, 0.0), (0.0, 1.5)), seed=5, tree_cls=Tree, steps=0):
+        terrain = Terrain(scale=8.0, height_amp=2.0)
+        sun = Sun(position=(30.0, 0.0, 30.0))
+        attraction_points = generate_attraction_points_from_terrain(
+            terrain, sun, n_candidates=1500, area_size=6.0, trunk_height=2.0, rng=RunStreams(seed).ap
+        )
+
+        trees = []
+        for tree_id, (x, y) in enumerate(positions):
+            tree = tree_cls(
+                root_position=(x, y, terrain.height(x, y)),
+                attraction_points=attraction_points,
+                terrain=terrain,
+                tree_id=tree_id,
+                influence_radius=3.0,
+                kill_radius=1.0,
+                step_size=0.5,
+            )
+            tree.trunk_height = 2.0
+            trees.append(tree)
+
+        forest = Forest(trees, attraction_points)
+        for _ in range(steps):
+            forest.grow()
+        return forest, terrain, sun
+
+    return build
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from analysis.crown_metrics import CrownAnalysis
+from structures.crown_stats import CrownStats
+
+
+def _assert_matches_analysis(stats, positions):
+    metrics = stats.metrics()
+    crown = CrownAnalysis(positions)
+
+    assert metrics["height"] == pytest.approx(crown.height)
+    assert metrics["n_canopy"] == len(crown.canopy_3d)
+    assert metrics["centroid_x"] == pytest.approx(crown.canopy_2d[:, 0].mean())
+    assert metrics["centroid_y"] == pytest.approx(crown.canopy_2d[:, 1].mean())
+    assert metrics["asymmetry_pca"] == pytest.approx(crown.asymmetry_pca, rel=1e-6)
+    assert metrics["asymmetry_inertia"] == pytest.approx(crown.asymmetry_inertia, rel=1e-6)
+
+
+def test_crown_stats_matches_crown_analysis_while_adding_points():
+    rng = np.random.default_rng(3)
+    root = np.array([2.0, -1.0, 0.5])
+    # korona przesunięta w bok i rozciągnięta w x, a próg korony przesuwa się z każdym punktem
+    points = root + rng.normal(0.0, 1.0, (300, 3)) * (2.0, 0.7, 1.5) + (0.5, 0.0, 3.0)
+
+    stats = CrownStats(root)
+    positions = [root]
+    for i, point in enumerate(points):
+        stats.add(*point)
+        positions.append(point)
+        if i % 25 == 24:
+            _assert_matches_analysis(stats, np.array(positions))
+
+
+def test_tree_crown_stats_match_crown_analysis_after_growth(make_forest):
+    forest, _, _ = make_forest(steps=40)
+    for tree in forest.trees:
+        assert len(tree.nodes) > 10
+        _assert_matches_analysis(tree.crown_stats, tree.node_positions())
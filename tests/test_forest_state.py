@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from analysis.forest_state import ForestState
+
+
+def _assert_matches_forest(state, forest):
+    nodes, parents, edges = state.tree_nodes(), state.tree_parents(), state.tree_edges()
+    for tree in forest.trees:
+        positions = np.array([n.position() for n in tree.nodes])
+        tree_parents = np.array([n.parent for n in tree.nodes[1:]], dtype=int)
+
+        np.testing.assert_array_equal(nodes[tree.tree_id], positions)
+        np.testing.assert_array_equal(parents[tree.tree_id], tree_parents)
+        np.testing.assert_array_equal(edges[tree.tree_id][0::2], positions[tree_parents])
+        np.testing.assert_array_equal(edges[tree.tree_id][1::2], positions[1:])
+        assert state.tree_heights()[tree.tree_id] == positions[:, 2].max()
+
+    _, owner = state.attraction_points_3d()
+    expected_owner = [-1 if ap.claimed_by is None else ap.claimed_by for ap in forest.attraction_points]
+    np.testing.assert_array_equal(owner, expected_owner)
+    assert sorted(state.ap_claims().tolist()) == np.flatnonzero(owner >= 0).tolist()
+
+
+def test_forest_state_cache_follows_growth(make_forest):
+    forest, _, _ = make_forest()
+    state = ForestState(forest)
+
+    for _ in range(6):
+        for _ in range(5):
+            forest.grow()
+        _assert_matches_forest(state, forest)
+
+    fresh = ForestState(forest)
+    for tree in forest.trees:
+        np.testing.assert_array_equal(state.tree_edges()[tree.tree_id], fresh.tree_edges()[tree.tree_id])
+    # świeży stan zna tylko zbiór zajętych AP, nie kolejność zajmowania
+    assert sorted(state.ap_claims().tolist()) == fresh.ap_claims().tolist()
+
+
+def test_forest_state_views_survive_growth(make_forest):
+    forest, _, _ = make_forest(steps=5)
+    state = ForestState(forest)
+
+    parents = {k: v.copy() for k, v in state.tree_parents().items()}
+    views = state.tree_parents()
+    claims = state.ap_claims()
+    claims_copy = claims.copy()
+
+    for _ in range(30):
+        forest.grow()
+    state.tree_parents()
+    state.ap_claims()
+
+    # snapshoty trzymają widoki – dopisywanie nie może zmienić ich treści
+    for tree_id, view in views.items():
+        np.testing.assert_array_equal(view, parents[tree_id])
+        with pytest.raises(ValueError):
+            view[...] = 0
+    np.testing.assert_array_equal(claims, claims_copy)
+    assert len(state.ap_claims()) > len(claims)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from structures.growth_log import GrowthLog, GrowthLogWriter, growth_log_exists
+
+
+def _state(forest):
+    return {
+        "nodes": [tree.node_positions().copy() for tree in forest.trees],
+        "parents": [np.array([n.parent for n in tree.nodes[1:]], dtype=int) for tree in forest.trees],
+        "owner": np.array(
+            [-1 if ap.claimed_by is None else ap.claimed_by for ap in forest.attraction_points]
+        ),
+        "trunks": [None if t.trunk_end is None else t.trunk_end.position() for t in forest.trees],
+    }
+
+
+def test_growth_log_round_trip(make_forest, tmp_path):
+    forest, terrain, sun = make_forest()
+    path = tmp_path / "log"
+
+    states = [_state(forest)]
+    forest.growth_log = GrowthLogWriter(path, forest, terrain, sun)
+    for step in range(1, 26):
+        forest.grow()
+        states.append(_state(forest))
+        if step == 10:
+            # log czytany w trakcie zapisu widzi wszystkie zapisane kroki
+            assert not growth_log_exists(path)
+            assert GrowthLog(path).n_steps == 10
+    forest.growth_log.close()
+
+    assert growth_log_exists(path)
+    log = GrowthLog(path)
+    assert log.n_steps == 25
+    np.testing.assert_array_equal(log.sun().position, sun.position)
+
+    for step, expected in enumerate(states):
+        for nodes, parents, exp_nodes, exp_parents in zip(
+            log.tree_nodes(step), log.tree_parents(step), expected["nodes"], expected["parents"]
+        ):
+            np.testing.assert_array_equal(nodes, exp_nodes)
+            np.testing.assert_array_equal(parents, exp_parents)
+        np.testing.assert_array_equal(log.ap_owner(step), expected["owner"])
+
+        trunk_end, _ = log.trunks(step)
+        for t, exp_trunk in enumerate(expected["trunks"]):
+            if exp_trunk is None:
+                assert np.isnan(trunk_end[t]).all()
+            else:
+                np.testing.assert_array_equal(trunk_end[t], exp_trunk)
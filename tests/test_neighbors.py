@@ -0,0 +1,39 @@
+import numpy as np
+
+from analysis.neighbors import count_ap_in_growth_radius
+from structures.tree import TreeNoRadius
+
+
+def _brute_force(trees, attraction_points):
+    counts = []
+    for tree in trees:
+        if tree.trunk_end is None:
+            counts.append(0)
+            continue
+        trunk = np.array(tree.trunk_end.position())
+        radius = tree.growth_radius()
+        counts.append(sum(
+            np.linalg.norm(np.array([ap.x, ap.y, ap.z]) - trunk) <= radius
+            for ap in attraction_points
+        ))
+    return counts
+
+
+def test_count_ap_in_growth_radius_matches_brute_force(make_forest):
+    forest, _, _ = make_forest()
+    trees = forest.trees
+    # drzewo bez skończonego pnia dostaje 0
+    trees[2].trunk_height = 100.0
+    for _ in range(20):
+        forest.grow()
+    assert trees[0].trunk_end is not None and trees[2].trunk_end is None
+
+    counts = count_ap_in_growth_radius(trees, forest.attraction_points)
+    assert counts.tolist() == _brute_force(trees, forest.attraction_points)
+    assert counts[0] > 0
+
+
+def test_count_ap_in_growth_radius_without_radius_limit(make_forest):
+    forest, _, _ = make_forest(tree_cls=TreeNoRadius, steps=10)
+    counts = count_ap_in_growth_radius(forest.trees, forest.attraction_points)
+    assert counts.tolist() == _brute_force(forest.trees, forest.attraction_points)
@@ -0,0 +1,89 @@
+import numpy as np
+
+from environment.terrain import Terrain
+from environment.sun import Sun
+from structures.attraction_point import generate_attraction_points_from_terrain
+from structures.forest import Forest
+from structures.random_streams import RunStreams, map_runs
+from structures.tree import Tree
+
+
+def _grow(streams, steps=25):
+    """Mały las z jitterem – każda losowość idzie przez streams."""
+    terrain = Terrain(scale=8.0, height_amp=2.0)
+    sun = Sun(position=(30.0, 0.0, 30.0))
+    attraction_points = generate_attraction_points_from_terrain(
+        terrain, sun, n_candidates=1500, area_size=6.0, trunk_height=2.0, rng=streams.ap
+    )
+
+    trees = []
+    for tree_id, (x, y) in enumerate([(-1.0, 0.0), (1.0, 0.0)]):
+        tree = Tree(
+            root_position=(x, y, terrain.height(x, y)),
+            attraction_points=attraction_points,
+            terrain=terrain,
+            tree_id=tree_id,
+            influence_radius=3.0,
+            step_size=0.5,
+            jitter=0.3,
+        )
+        tree.trunk_height = 2.0
+        trees.append(tree)
+
+    forest = Forest(trees, attraction_points, streams=streams)
+    for _ in range(steps):
+        forest.grow()
+    return [tree.node_positions().copy() for tree in trees]
+
+
+def _assert_same_runs(a, b):
+    assert len(a) == len(b)
+    for run_a, run_b in zip(a, b):
+        for nodes_a, nodes_b in zip(run_a, run_b):
+            np.testing.assert_array_equal(nodes_a, nodes_b)
+
+
+def test_tree_streams_do_not_depend_on_call_order():
+    forward = RunStreams(7)
+    expected = {i: forward.tree(i).random(4) for i in range(5)}
+
+    backward = RunStreams(7)
+    for i in reversed(range(5)):
+        np.testing.assert_array_equal(backward.tree(i).random(4), expected[i])
+
+    assert not np.array_equal(expected[0], expected[1])
+
+
+def test_replicates_do_not_depend_on_call_order():
+    expected = RunStreams(11).replicate(3).ap.random(5)
+
+    streams = RunStreams(11)
+    streams.replicate(5)
+    np.testing.assert_array_equal(streams.replicate(3).ap.random(5), expected)
+    assert streams.replicate(3).label == 14
+
+
+def test_legacy_streams_match_global_seed():
+    terrain = Terrain(scale=8.0, height_amp=2.0)
+    sun = Sun(position=(30.0, 0.0, 10.0))
+
+    np.random.seed(1001)
+    old = generate_attraction_points_from_terrain(terrain, sun, n_candidates=2000, area_size=6.0)
+    new = generate_attraction_points_from_terrain(
+        terrain, sun, n_candidates=2000, area_size=6.0, rng=RunStreams(1000, legacy=True).replicate(1).ap
+    )
+
+    assert [p.position().tolist() for p in old] == [p.position().tolist() for p in new]
+
+
+def test_serial_and_split_runs_match():
+    serial = list(map_runs(_grow, [(RunStreams(42).replicate(k),) for k in range(4)]))
+
+    # dwie partie z osobnych obiektów RunStreams, w dwóch procesach
+    first = RunStreams(42)
+    second = RunStreams(42)
+    split = list(map_runs(_grow, [(first.replicate(k),) for k in (0, 1)], workers=2))
+    split += list(map_runs(_grow, [(second.replicate(k),) for k in (2, 3)], workers=2))
+
+    _assert_same_runs(serial, split)
+    assert not np.array_equal(serial[0][0], serial[1][0])
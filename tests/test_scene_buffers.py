@@ -0,0 +1,34 @@
+import numpy as np
+
+from visualization.scene_buffers import MAX_UPLOAD_RUNS, ClaimTracker, InstanceTracker, upload_runs
+
+
+def test_upload_runs_groups_contiguous_indices():
+    assert upload_runs([7, 2, 3, 4, 9, 8], 100) == [slice(2, 5), slice(7, 10)]
+    assert upload_runs([], 100) == []
+
+
+def test_upload_runs_full_buffer_above_threshold():
+    scattered = np.arange(MAX_UPLOAD_RUNS + 1) * 3
+    assert upload_runs(scattered, 1000) == [slice(0, 1000)]
+
+
+def test_claim_tracker_uploads_only_new_claims():
+    tracker = ClaimTracker(1000)
+    assert tracker.update(np.array([5, 990])) == [slice(5, 6), slice(990, 991)]
+    assert tracker.update(np.array([5, 990])) == []
+
+    runs = tracker.update(np.array([5, 990, 11, 10]))
+    assert runs == [slice(10, 12)]
+    assert np.flatnonzero(tracker.claimed).tolist() == [5, 10, 11, 990]
+
+
+def test_instance_tracker_uploads_changed_instances():
+    tracker = InstanceTracker(6)
+    positions = np.zeros((6, 3))
+    scales = np.zeros(6)
+    scales[[0, 5]] = 1.0
+
+    assert tracker.update(positions, scales) == [slice(0, 1), slice(5, 6)]
+    assert tracker.update(positions, scales) == []
+    np.testing.assert_array_equal(tracker.scales, scales)
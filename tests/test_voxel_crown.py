@@ -0,0 +1,38 @@
+import numpy as np
+
+from analysis.voxel_crown import VoxelCrown
+
+
+def _assert_same_crown(a, b):
+    np.testing.assert_array_equal(a.keys, b.keys)
+    assert a.exposed_faces == b.exposed_faces
+    assert a.layer_counts == b.layer_counts
+
+
+def test_incremental_voxel_crown_matches_fresh_build(make_forest):
+    forest, _, _ = make_forest()
+    incremental = {tree.tree_id: VoxelCrown() for tree in forest.trees}
+
+    for _ in range(30):
+        forest.grow()
+        for tree in forest.trees:
+            incremental[tree.tree_id].update(tree)
+
+    for tree in forest.trees:
+        _assert_same_crown(incremental[tree.tree_id], VoxelCrown.from_tree(tree))
+
+
+def test_voxel_crown_chunks_match_single_batch():
+    rng = np.random.default_rng(8)
+    # punkty po obu stronach zera (ujemne indeksy wokseli)
+    points = rng.uniform(-2.0, 2.0, (400, 3))
+
+    chunked = VoxelCrown(resolution=0.2, dilation=0.3)
+    for chunk in np.array_split(points, 7):
+        chunked.add_points(chunk)
+
+    batch = VoxelCrown(resolution=0.2, dilation=0.3)
+    batch.add_points(points)
+
+    _assert_same_crown(chunked, batch)
+    assert chunked.volume == len(batch.voxels) * 0.2 ** 3
@@ -0,0 +1,296 @@
+"""
+Harness równoważności silników wzrostu.
+
+Każdy szybszy silnik (wektorowy, wsadowy, równoległy) musi dawać to samo
+co referencyjne Tree.grow / Forest.grow. Harness buduje dla obu silników
+identyczne lasy (te same seedy i konfiguracje), wykonuje kroki na przemian
+i po każdym kroku porównuje:
+- node'y każdego drzewa (pozycje, z tolerancją atol),
+- krawędzie (parent, child),
+- przypisanie attraction points (claimed_by),
+a na końcu metryki korony (crown_metrics, tolerancja względna).
+Raport wskazuje pierwszy krok, w którym silniki się rozjechały.
+
+Silnik kandydujący to obiekt z metodami build(config) -> stan,
+step(stan) i snapshot(stan) -> EngineSnapshot; najprościej dziedziczyć
+po ForestEngine i nadpisać step.
+
+    python -m validation.equivalence moj_modul:MojSilnik --steps 200
+"""
+
+import argparse
+import importlib
+import math
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from environment.terrain import Terrain
+from environment.sun import Sun
+from structures.ap_cache import cached_attraction_points
+from structures.random_streams import RunStreams
+from structures.tree import Tree, TreeNoRadius
+from structures.forest import Forest
+
+from analysis.crown_metrics import CrownAnalysis
+
+
+# -------------------------------------------------
+# Konfiguracje
+# -------------------------------------------------
+
+@dataclass
+class EquivalenceConfig:
+    name: str
+    tree_positions: list
+    seed: int
+    tree_cls: type = Tree
+    trunk_heights: list | None = None
+    n_candidates: int = 25000
+    area_size: float = 20.0
+    sun_position: tuple = (30.0, 0.0, 30.0)
+
+
+def _grid(num_trees, spacing, offset=(0.0, 0.0)):
+    grid_size = math.ceil(math.sqrt(num_trees))
+    positions = []
+    for i in range(grid_size):
+        for j in range(grid_size):
+            if len(positions) < num_trees:
+                x = i * spacing - (grid_size - 1) * spacing / 2 + offset[0]
+                y = j * spacing - (grid_size - 1) * spacing / 2 + offset[1]
+                positions.append((x, y))
+    return positions
+
+
+def default_configs() -> list[EquivalenceConfig]:
+    """Konfiguracje odpowiadające exp2–exp5."""
+    return [
+        EquivalenceConfig(
+            "single_tree", [(0.0, 0.0)], seed=2001,
+            n_candidates=15000, area_size=12.0, sun_position=(25.0, -20.0, 30.0),
+        ),
+        EquivalenceConfig("competition_grid_4", _grid(4, 1.5), seed=3001),
+        EquivalenceConfig("competition_grid_9", _grid(9, 1.5), seed=3002),
+        EquivalenceConfig("no_radius_grid_4", _grid(4, 1.5), seed=4001, tree_cls=TreeNoRadius),
+        EquivalenceConfig(
+            "trunk_heights", _grid(6, 1.0, offset=(8.0, 0.0)), seed=5001,
+            trunk_heights=[1.0, 2.0, 4.0, 6.0, 8.0, 10.0],
+        ),
+    ]
+
+
+# -------------------------------------------------
+# Silniki
+# -------------------------------------------------
+
+@dataclass
+class EngineSnapshot:
+    nodes: dict                 # tree_id -> (N, 3)
+    edges: dict                 # tree_id -> (E, 2)
+    ap_owner: np.ndarray        # (M,) tree_id albo -1
+
+
+class ForestEngine:
+    """Silnik referencyjny: Forest + Tree (lub podklasa z konfiguracji)."""
+
+    name = "reference"
+
+    def build(self, config: EquivalenceConfig):
+        terrain = Terrain(scale=8.0, height_amp=2.0)
+        sun = Sun(position=config.sun_position)
+
+        attraction_points = cached_attraction_points(
+            terrain=terrain,
+            sun=sun,
+            streams=RunStreams(config.seed),
+            n_candidates=config.n_candidates,
+            area_size=config.area_size,
+            trunk_height=4.0,
+        )
+
+        trees = []
+        for tree_id, (x, y) in enumerate(config.tree_positions):
+            tree = config.tree_cls(
+                root_position=(x, y, terrain.height(x, y)),
+                attraction_points=attraction_points,
+                terrain=terrain,
+                tree_id=tree_id,
+                influence_radius=3.0,
+                kill_radius=1.0,
+                step_size=0.5,
+            )
+            if config.trunk_heights is not None:
+                tree.trunk_height = float(config.trunk_heights[tree_id])
+            trees.append(tree)
+
+        return Forest(trees, attraction_points)
+
+    def step(self, forest):
+        forest.grow()
+
+    def snapshot(self, forest) -> EngineSnapshot:
+        return EngineSnapshot(
+            nodes={
+                t.tree_id: np.array([n.position() for n in t.nodes], dtype=float)
+                for t in forest.trees
+            },
+            edges={
+                t.tree_id: np.array(t.edges, dtype=int).reshape(-1, 2)
+                for t in forest.trees
+            },
+            ap_owner=np.array(
+                [-1 if ap.claimed_by is None else ap.claimed_by for ap in forest.attraction_points],
+                dtype=int,
+            ),
+        )
+
+
+# -------------------------------------------------
+# Porównanie
+# -------------------------------------------------
+
+@dataclass
+class EquivalenceResult:
+    config: str
+    steps: int
+    first_divergent_step: int | None = None
+    divergence: str | None = None
+    metric_diffs: dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.first_divergent_step is None and not self.metric_diffs
+
+
+def _compare_snapshots(ref: EngineSnapshot, cand: EngineSnapshot, atol) -> str | None:
+    if ref.nodes.keys() != cand.nodes.keys():
+        return f"różne drzewa: {sorted(ref.nodes)} vs {sorted(cand.nodes)}"
+
+    for tree_id, ref_nodes in ref.nodes.items():
+        cand_nodes = cand.nodes[tree_id]
+        if ref_nodes.shape != cand_nodes.shape:
+            return f"tree {tree_id}: liczba node'ów {len(ref_nodes)} vs {len(cand_nodes)}"
+        if not np.allclose(ref_nodes, cand_nodes, rtol=0.0, atol=atol):
+            bad = int(np.argmax(np.abs(ref_nodes - cand_nodes).max(axis=1)))
+            return f"tree {tree_id}: pozycja node'a {bad} {ref_nodes[bad]} vs {cand_nodes[bad]}"
+        if not np.array_equal(ref.edges[tree_id], cand.edges[tree_id]):
+            return f"tree {tree_id}: różne krawędzie"
+
+    if ref.ap_owner.shape != cand.ap_owner.shape:
+        return f"liczba AP {len(ref.ap_owner)} vs {len(cand.ap_owner)}"
+    diff = np.flatnonzero(ref.ap_owner != cand.ap_owner)
+    if len(diff):
+        i = int(diff[0])
+        return (
+            f"{len(diff)} AP z innym właścicielem, np. AP {i}: "
+            f"{ref.ap_owner[i]} vs {cand.ap_owner[i]}"
+        )
+
+    return None
+
+
+def _metrics(nodes: np.ndarray) -> dict:
+    crown = CrownAnalysis(nodes)
+    return dict(crown.metrics(), crown_radius=crown.crown_radius)
+
+
+def _compare_metrics(ref: EngineSnapshot, cand: EngineSnapshot, rtol) -> dict:
+    diffs = {}
+    for tree_id, ref_nodes in ref.nodes.items():
+        m_ref = _metrics(ref_nodes)
+        m_cand = _metrics(cand.nodes[tree_id])
+        for key, value in m_ref.items():
+            if not math.isclose(value, m_cand[key], rel_tol=rtol, abs_tol=1e-9):
+                diffs[f"tree {tree_id}: {key}"] = (value, m_cand[key])
+    return diffs
+
+
+def compare_engines(
+    candidate,
+    reference=None,
+    configs=None,
+    steps=200,
+    atol=1e-9,
+    metrics_rtol=1e-6,
+) -> list[EquivalenceResult]:
+    if reference is None:
+        reference = ForestEngine()
+    if configs is None:
+        configs = default_configs()
+    if not configs:
+        # pusta lista dałaby "wszystko zgodne" bez żadnego porównania
+        raise ValueError("compare_engines: brak konfiguracji do porównania")
+    results = []
+
+    for config in configs:
+        ref_state = reference.build(config)
+        cand_state = candidate.build(config)
+        result = EquivalenceResult(config.name, steps)
+
+        ref_snap = cand_snap = None
+        for step in range(steps):
+            reference.step(ref_state)
+            candidate.step(cand_state)
+
+            ref_snap = reference.snapshot(ref_state)
+            cand_snap = candidate.snapshot(cand_state)
+
+            divergence = _compare_snapshots(ref_snap, cand_snap, atol)
+            if divergence is not None:
+                result.first_divergent_step = step
+                result.divergence = divergence
+                break
+
+        if result.first_divergent_step is None and ref_snap is not None:
+            result.metric_diffs = _compare_metrics(ref_snap, cand_snap, metrics_rtol)
+
+        results.append(result)
+
+    return results
+
+
+def print_results(results: list[EquivalenceResult]):
+    for r in results:
+        if r.ok:
+            print(f"[OK]   {r.config}: {r.steps} kroków zgodnych")
+        elif r.first_divergent_step is not None:
+            print(f"[FAIL] {r.config}: rozjazd w kroku {r.first_divergent_step}: {r.divergence}")
+        else:
+            print(f"[FAIL] {r.config}: różne metryki korony")
+            for key, (a, b) in r.metric_diffs.items():
+                print(f"         {key}: {a} vs {b}")
+
+
+def _load_engine(spec: str):
+    module_name, _, attr = spec.partition(":")
+    engine = getattr(importlib.import_module(module_name), attr or "Engine")
+    return engine() if isinstance(engine, type) else engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Porównanie silnika wzrostu z referencją")
+    parser.add_argument("engine", help="modul:KlasaSilnika")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--config", action="append", help="tylko wybrane konfiguracje")
+    parser.add_argument("--atol", type=float, default=1e-9)
+    args = parser.parse_args(argv)
+
+    configs = default_configs()
+    if args.config:
+        unknown = set(args.config) - {c.name for c in configs}
+        if unknown:
+            parser.error(
+                f"nieznane konfiguracje: {', '.join(sorted(unknown))} "
+                f"(dostępne: {', '.join(c.name for c in configs)})"
+            )
+        configs = [c for c in configs if c.name in args.config]
+
+    results = compare_engines(_load_engine(args.engine), configs=configs, steps=args.steps, atol=args.atol)
+    print_results(results)
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Odtwarzanie logu wzrostu (structures.growth_log) w TreeScene.
+
+GrowthLogPlayer ma ten sam interfejs co SimulationWorker (start, stop,
+pause, resume, paused, latest), więc scena nie rozróżnia symulacji na
+żywo od odtwarzania. Zamiast liczyć wzrost, latest() wybiera krok z osi
+czasu (tempo steps_per_second albo ręczne przewijanie seek / step_by)
+i buduje z logu ForestSnapshot – bez wątku i bez żadnych obliczeń
+symulacji. Snapshot ostatnio wybranego kroku jest pamiętany.
+"""
+
+import time
+
+import numpy as np
+
+from visualization.simulation_worker import ForestSnapshot
+
+
+def log_snapshot(log, step) -> ForestSnapshot:
+    nodes = log.tree_nodes(step)
+    parents = log.tree_parents(step)
+    ap_owner = log.ap_owner(step)
+    trunk_end, growth_radius = log.trunks(step)
+
+    for arr in (trunk_end, growth_radius, ap_owner):
+        arr.setflags(write=False)
+
+    return ForestSnapshot(
+        step=step,
+        tree_ids=log.tree_ids,
+        nodes=tuple(nodes),
+        parents=tuple(parents),
+        trunk_end=trunk_end,
+        growth_radius=growth_radius,
+        ap_positions=log.ap_positions,
+        ap_owner=ap_owner,
+        ap_claims=log.ap_claims(step),
+        versions=tuple(len(n) - 1 for n in nodes) + (int((ap_owner >= 0).sum()),),
+    )
+
+
+class GrowthLogPlayer:
+    def __init__(self, log, steps_per_second=30.0, loop=False):
+        self.log = log
+        self.steps_per_second = steps_per_second
+        self.loop = loop
+
+        self._step = 0.0
+        self._clock = None          # czas ostatniego przesunięcia osi (None = pauza)
+        self._snapshot = log_snapshot(log, 0)
+
+    # -------------------------------------------------
+    # Sterowanie (jak SimulationWorker)
+    # -------------------------------------------------
+
+    def start(self):
+        self.resume()
+        return self
+
+    def stop(self, timeout=None):
+        self.pause()
+
+    def pause(self):
+        self._advance()
+        self._clock = None
+
+    def resume(self):
+        if self._clock is None:
+            self._clock = time.perf_counter()
+
+    @property
+    def paused(self) -> bool:
+        return self._clock is None
+
+    # -------------------------------------------------
+    # Oś czasu
+    # -------------------------------------------------
+
+    @property
+    def step(self) -> int:
+        return int(self._step)
+
+    def seek(self, step):
+        """Skok do kroku step (przycinany do zakresu logu)."""
+        self._advance()
+        self._step = float(np.clip(step, 0, self.log.n_steps))
+
+    def step_by(self, delta):
+        self.seek(self.step + delta)
+
+    def _advance(self):
+        if self._clock is None:
+            return
+        now = time.perf_counter()
+        self._step += (now - self._clock) * self.steps_per_second
+        self._clock = now
+
+        if self._step > self.log.n_steps:
+            self._step = 0.0 if self.loop else float(self.log.n_steps)
+
+    def latest(self) -> ForestSnapshot:
+        self._advance()
+        step = self.step
+        if step != self._snapshot.step:
+            self._snapshot = log_snapshot(self.log, step)
+        return self._snapshot
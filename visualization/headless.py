@@ -0,0 +1,164 @@
+"""
+Renderowanie scen bez okna (serwer, batch eksperymentów).
+
+Klatki powstają w tej samej TreeScene co w przeglądarce interaktywnej,
+tylko z show=False: bez timerów i pętli zdarzeń, render_frame zwraca
+obraz (H, W, 4). Kontekst OpenGL daje backend offscreen vispy – EGL
+(sterownik GPU bez X11) albo OSMesa (programowy, działa wszędzie, gdzie
+jest libOSMesa). Backend wybiera się raz na proces, przed utworzeniem
+pierwszego canvasa, dlatego pula workerów używa metody "spawn"
+i wybiera backend w inicjalizatorze.
+
+    python -m visualization.headless .growth_logs/* --out thumbs
+    python -m visualization.headless LOG --every 10 --video LOG.mp4
+
+Wideo wymaga opcjonalnego pakietu imageio (z imageio-ffmpeg dla mp4).
+"""
+
+import argparse
+import multiprocessing
+import os
+
+
+HEADLESS_BACKENDS = ("egl", "osmesa")
+
+
+def use_offscreen_backend(backend=None) -> str:
+    """
+    Ustawia backend vispy bez okna: podany, z VISPY_HEADLESS_BACKEND
+    albo pierwszy działający z HEADLESS_BACKENDS. Zwraca jego nazwę.
+    """
+    import vispy
+
+    candidates = [backend] if backend else [os.environ.get("VISPY_HEADLESS_BACKEND"), *HEADLESS_BACKENDS]
+    errors = []
+    for name in filter(None, candidates):
+        try:
+            vispy.use(app=name)
+            return name
+        except Exception as exc:
+            errors.append(f"{name}: {exc}")
+
+    raise RuntimeError("brak backendu offscreen OpenGL (" + "; ".join(errors) + ")")
+
+
+# -------------------------------------------------
+# Klatki
+# -------------------------------------------------
+
+def write_png(path, image):
+    from vispy import io
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    io.write_png(path, image)
+
+
+def render_forest(forest, terrain, sun, path, size=(640, 480)):
+    """Jedna klatka obecnego stanu lasu (np. po zakończonej symulacji)."""
+    from visualization.vispy_scene import TreeScene
+
+    scene = TreeScene(forest, terrain, sun, show=False, size=size)
+    try:
+        write_png(path, scene.render_frame())
+    finally:
+        scene.close()
+    return path
+
+
+def log_frame_steps(n_steps, every=None) -> list[int]:
+    """Kroki do wyrenderowania: sam koniec albo co every kroków (+ ostatni)."""
+    if every is None:
+        return [n_steps]
+    steps = list(range(0, n_steps + 1, every))
+    if steps[-1] != n_steps:
+        steps.append(n_steps)
+    return steps
+
+
+def render_log(log_path, out_dir, every=None, size=(640, 480)) -> list[str]:
+    """
+    Klatki logu wzrostu jako PNG. every=None: miniatura stanu końcowego
+    (out_dir/<log>.png), inaczej out_dir/<log>/step_XXXXX.png.
+    """
+    from structures.growth_log import GrowthLog
+    from visualization.growth_replay import GrowthLogPlayer
+    from visualization.vispy_scene import TreeScene
+
+    log = GrowthLog(log_path)
+    player = GrowthLogPlayer(log)
+    name = os.path.basename(os.path.normpath(log_path))
+
+    scene = TreeScene(None, log.terrain(), log.sun(), worker=player, show=False, size=size)
+    paths = []
+    try:
+        for step in log_frame_steps(log.n_steps, every):
+            player.seek(step)
+            if every is None:
+                path = os.path.join(out_dir, f"{name}.png")
+            else:
+                path = os.path.join(out_dir, name, f"step_{step:05d}.png")
+            write_png(path, scene.render_frame())
+            paths.append(path)
+    finally:
+        scene.close()
+    return paths
+
+
+def frames_to_video(frame_paths, path, fps=30):
+    try:
+        import imageio.v2 as imageio
+    except ImportError as exc:
+        raise ImportError("eksport wideo wymaga pakietu imageio (pip install imageio imageio-ffmpeg)") from exc
+
+    with imageio.get_writer(path, fps=fps) as writer:
+        for frame in frame_paths:
+            writer.append_data(imageio.imread(frame))
+    return path
+
+
+# -------------------------------------------------
+# Pula workerów
+# -------------------------------------------------
+
+def _render_log_task(args):
+    log_path, out_dir, every, size = args
+    return render_log(log_path, out_dir, every, size)
+
+
+def render_logs(log_paths, out_dir, every=None, size=(640, 480), processes=None, backend=None) -> list[list[str]]:
+    """Renderuje wiele logów równolegle; każdy proces ma własny kontekst offscreen."""
+    tasks = [(path, out_dir, every, size) for path in log_paths]
+    if processes == 1:
+        use_offscreen_backend(backend)
+        return [_render_log_task(task) for task in tasks]
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes, initializer=use_offscreen_backend, initargs=(backend,)) as pool:
+        return pool.map(_render_log_task, tasks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Renderowanie logów wzrostu bez okna")
+    parser.add_argument("logs", nargs="+", help="katalogi logów wzrostu")
+    parser.add_argument("--out", default="frames", help="katalog na PNG")
+    parser.add_argument("--every", type=int, default=None, help="klatka co N kroków (domyślnie tylko koniec)")
+    parser.add_argument("--size", type=int, nargs=2, default=(640, 480), metavar=("W", "H"))
+    parser.add_argument("--processes", type=int, default=None, help="liczba procesów (domyślnie liczba CPU)")
+    parser.add_argument("--backend", default=None, choices=HEADLESS_BACKENDS)
+    parser.add_argument("--video", default=None, help="plik wideo (tylko dla jednego logu, z --every)")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    if args.video and (len(args.logs) != 1 or args.every is None):
+        parser.error("--video wymaga jednego logu i --every")
+
+    results = render_logs(args.logs, args.out, args.every, tuple(args.size), args.processes, args.backend)
+    print(f"{sum(len(paths) for paths in results)} klatek w {args.out}")
+
+    if args.video:
+        frames_to_video(results[0], args.video, args.fps)
+        print(f"wideo: {args.video}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Poziomy szczegółowości (LOD) drzew dla dużych lasów, bez zależności od vispy.
+
+Dla każdego drzewa liczone są (tylko gdy drzewo urosło):
+- rozmiar poddrzewa każdego node'a (liczba potomków + 1),
+- promień gałęzi z modelu rurowego: r ~ sqrt(rozmiar poddrzewa),
+- poziomy decymacji: poziom k zawiera tylko node'y z poddrzewem
+  >= LEVEL_MIN_SUBTREE[k], czyli bez najdrobniejszych gałązek.
+  Rodzic ma zawsze poddrzewo większe od dziecka, więc każdy zachowany
+  node łączy się z zachowanym rodzicem – szkielet pozostaje spójny.
+
+ForestLOD wybiera poziom każdego drzewa wg odległości od kamery:
+blisko – rurki (instancjonowane cylindry), dalej – linie pełne,
+jeszcze dalej – coraz mocniej zdecymowane linie. Złączone bufory są
+przebudowywane tylko gdy zmienił się poziom któregoś drzewa albo
+któreś drzewo urosło; sam ruch kamery w obrębie progów nic nie kosztuje.
+"""
+
+import numpy as np
+
+
+# minimalny rozmiar poddrzewa node'a na kolejnych poziomach linii
+LEVEL_MIN_SUBTREE = (1, 4, 16)
+
+TUBES = -1      # poziom "rurki" (najbliższe drzewa)
+
+
+class TreeLOD:
+    def __init__(self, base_radius=0.02):
+        self.base_radius = base_radius
+        self.n_nodes = 0
+        self.parents = np.empty(0, dtype=int)     # rodzic node'a 1..N-1
+        self.depth = np.zeros(0, dtype=int)
+        self.subtree = np.zeros(0, dtype=int)
+        self.levels: list[np.ndarray] = []        # indeksy dzieci segmentów na poziom
+
+    def update(self, positions, parents) -> bool:
+        """Przelicza LOD, jeśli drzewo ma nowe node'y. Zwraca True, gdy coś się zmieniło."""
+        n = len(positions)
+        if n == self.n_nodes:
+            return False
+        if n < self.n_nodes:
+            # cofnięcie (odtwarzanie logu wzrostu) – liczymy od nowa
+            self.n_nodes = 0
+            self.depth = np.zeros(0, dtype=int)
+
+        # głębokość tylko dla nowych node'ów (rodzic ma zawsze mniejszy indeks)
+        depth = np.zeros(n, dtype=int)
+        depth[:self.n_nodes] = self.depth
+        for i in range(max(self.n_nodes, 1), n):
+            depth[i] = depth[parents[i - 1]] + 1
+
+        # rozmiary poddrzew: warstwami od najgłębszej
+        subtree = np.ones(n, dtype=int)
+        children = np.arange(1, n)
+        child_depth = depth[1:]
+        order = np.argsort(-child_depth, kind="stable")
+        bounds = np.flatnonzero(np.diff(child_depth[order])) + 1
+        for layer in np.split(order, bounds):
+            np.add.at(subtree, parents[layer], subtree[children[layer]])
+
+        self.n_nodes = n
+        self.parents = np.asarray(parents, dtype=int)
+        self.depth = depth
+        self.subtree = subtree
+        self.levels = [children[subtree[1:] >= s] for s in LEVEL_MIN_SUBTREE]
+        return True
+
+    def radii(self, child_indices) -> np.ndarray:
+        """Promień rurki segmentu (rodzic, dziecko) z modelu rurowego."""
+        return self.base_radius * np.sqrt(self.subtree[child_indices])
+
+
+def segments(positions, parents, child_indices) -> np.ndarray:
+    """(2k, 3) pary (rodzic, dziecko) dla wskazanych dzieci."""
+    seg = np.empty((2 * len(child_indices), 3))
+    seg[0::2] = positions[parents[child_indices - 1]]
+    seg[1::2] = positions[child_indices]
+    return seg
+
+
+def tube_transforms(starts, ends, radii) -> np.ndarray:
+    """
+    Macierze (k, 3, 3) przenoszące cylinder jednostkowy (promień 1, oś z od 0 do 1)
+    na odcinek start -> end o danym promieniu: kolumny r*u, r*v, end - start.
+    """
+    axis = ends - starts
+    length = np.linalg.norm(axis, axis=1, keepdims=True)
+    w = axis / np.maximum(length, 1e-12)
+
+    # dowolny wektor nierównoległy do osi
+    helper = np.where(np.abs(w[:, 2:3]) < 0.9, (0.0, 0.0, 1.0), (1.0, 0.0, 0.0))
+    u = np.cross(w, helper)
+    u /= np.linalg.norm(u, axis=1, keepdims=True)
+    v = np.cross(w, u)
+
+    return np.stack([u * radii[:, None], v * radii[:, None], axis], axis=2)
+
+
+class ForestLOD:
+    """
+    distances: (near, mid, far) – poniżej near rurki, potem linie
+    na poziomach 0, 1, 2 (LEVEL_MIN_SUBTREE).
+    """
+
+    def __init__(self, distances=(6.0, 15.0, 30.0), max_tubes=200_000):
+        self.distances = np.asarray(distances, dtype=float)
+        self.max_tubes = max_tubes
+        self.trees: list[TreeLOD] = []
+        self.tree_levels = np.empty(0, dtype=int)
+        self._key = None
+
+    def invalidate(self):
+        """Wymusza przebudowę buforów przy następnym build."""
+        self._key = None
+
+    def update(self, tree_nodes, tree_parents) -> bool:
+        while len(self.trees) < len(tree_nodes):
+            self.trees.append(TreeLOD())
+        changed = False
+        for lod, positions, parents in zip(self.trees, tree_nodes, tree_parents):
+            changed |= lod.update(positions, parents)
+        return changed
+
+    def tree_lod(self, t, positions, parents) -> TreeLOD:
+        """TreeLOD jednego drzewa (np. do inspekcji), odświeżony tylko dla niego."""
+        while len(self.trees) <= t:
+            self.trees.append(TreeLOD())
+        self.trees[t].update(positions, parents)
+        return self.trees[t]
+
+    def select_levels(self, anchors, eye) -> np.ndarray:
+        """Poziom każdego drzewa wg odległości kotwicy (np. korzenia) od kamery."""
+        dist = np.linalg.norm(np.asarray(anchors) - np.asarray(eye), axis=1)
+        return np.searchsorted(self.distances, dist, side="right") - 1
+
+    def build(self, tree_nodes, tree_parents, eye, visible=None):
+        """
+        Zwraca None, jeśli nic się nie zmieniło, albo słownik:
+        tube_starts, tube_transforms (rurki), lines, line_tree (segmenty + indeks drzewa).
+        """
+        changed = self.update(tree_nodes, tree_parents)
+        anchors = np.array([p[0] for p in tree_nodes]).reshape(-1, 3)
+        levels = self.select_levels(anchors, eye)
+        if visible is not None:
+            # ukryte drzewa nie zużywają budżetu rurek
+            levels = np.where(visible, levels, len(LEVEL_MIN_SUBTREE))
+
+        key = levels.tobytes()
+        if not changed and key == self._key:
+            return None
+        self._key = key
+        self.tree_levels = levels
+
+        starts, ends, radii = [], [], []
+        lines, line_tree = [], []
+        n_tubes = 0
+
+        for t in np.argsort(np.linalg.norm(anchors - np.asarray(eye), axis=1)):
+            lod, positions, parents = self.trees[t], tree_nodes[t], tree_parents[t]
+            level = levels[t]
+            if level >= len(LEVEL_MIN_SUBTREE):
+                continue
+
+            if level == TUBES and n_tubes + len(lod.levels[0]) <= self.max_tubes:
+                children = lod.levels[0]
+                starts.append(positions[parents[children - 1]])
+                ends.append(positions[children])
+                radii.append(lod.radii(children))
+                n_tubes += len(children)
+                continue
+
+            seg = segments(positions, parents, lod.levels[max(level, 0)])
+            lines.append(seg)
+            line_tree.append(np.full(len(seg), t))
+
+        def cat(parts, shape):
+            return np.concatenate(parts) if parts else np.empty(shape)
+
+        starts, ends, radii = cat(starts, (0, 3)), cat(ends, (0, 3)), cat(radii, (0,))
+        return {
+            "tube_starts": starts,
+            "tube_transforms": tube_transforms(starts, ends, radii),
+            "lines": cat(lines, (0, 3)),
+            "line_tree": cat(line_tree, (0,)).astype(int),
+        }
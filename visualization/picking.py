@@ -0,0 +1,220 @@
+"""
+Wskazywanie myszą (picking) node'ów i attraction points, bez zależności od vispy.
+
+Promień z kamery przez kursor jest przycinany do prostopadłościanu
+otaczającego punkty i próbkowany co `radius`; kandydaci to punkty
+w kulach wokół próbek (jedno wsadowe zapytanie KDTree). Trafienie to
+najbliższy kamerze punkt w odległości <= radius od promienia.
+
+NodeIndex jest dopasowany do rosnącego lasu: KDTree obejmuje node'y
+do ostatniej przebudowy, a node'y dodane później ("ogon") są sprawdzane
+wprost. Drzewo jest przebudowywane dopiero gdy ogon przekroczy
+rebuild_fraction zindeksowanych node'ów, więc zapytanie pozostaje
+poniżej milisekundy także podczas wzrostu.
+"""
+
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.spatial import KDTree
+
+from analysis.crown_metrics import CrownAnalysis
+
+
+# maks. liczba próbek promienia w jednym zapytaniu
+_MAX_SAMPLES = 4096
+
+
+@dataclass
+class PickResult:
+    kind: str               # "node" albo "ap"
+    tree: int               # indeks drzewa (forest.trees); dla AP właściciel albo -1
+    index: int              # indeks node'a w drzewie albo indeks AP
+    position: np.ndarray
+    distance: float         # odległość od kamery wzdłuż promienia
+
+
+def clip_ray(origin, direction, lo, hi):
+    """Zakres (t0, t1) promienia wewnątrz prostopadłościanu [lo, hi] albo None."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv = 1.0 / direction
+        t_a = (lo - origin) * inv
+        t_b = (hi - origin) * inv
+    t_near = np.nanmax(np.minimum(t_a, t_b))
+    t_far = np.nanmin(np.maximum(t_a, t_b))
+
+    t0, t1 = max(t_near, 0.0), t_far
+    if not np.isfinite(t1) or t1 < t0:
+        return None
+    return t0, t1
+
+
+def ray_hits(points, origin, direction, radius):
+    """(indeksy punktów w odległości <= radius od promienia, ich t wzdłuż promienia)."""
+    rel = points - origin
+    t = rel @ direction
+    perp = np.linalg.norm(rel - t[:, None] * direction, axis=1)
+    hit = (perp <= radius) & (t >= 0)
+    return np.flatnonzero(hit), t[hit]
+
+
+def _sample_candidates(kdtree, lo, hi, origin, direction, radius) -> np.ndarray:
+    span = clip_ray(origin, direction, lo - radius, hi + radius)
+    if span is None:
+        return np.empty(0, dtype=int)
+
+    t0, t1 = span
+    step = max(radius, (t1 - t0) / _MAX_SAMPLES)
+    samples = origin + np.arange(t0, t1 + step, step)[:, None] * direction
+
+    # kula wokół próbki obejmuje każdy punkt w odległości radius od odcinka
+    lists = kdtree.query_ball_point(samples, np.hypot(radius, step / 2), return_sorted=False)
+    return np.unique(np.fromiter(itertools.chain.from_iterable(lists), dtype=int))
+
+
+def _unit(direction):
+    direction = np.asarray(direction, dtype=float)
+    return direction / np.linalg.norm(direction)
+
+
+class PointIndex:
+    """Indeks stałego zbioru punktów (np. pozycji AP)."""
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self._kdtree = KDTree(self.points) if len(self.points) else None
+        if len(self.points):
+            self._lo, self._hi = self.points.min(axis=0), self.points.max(axis=0)
+
+    def query_ray(self, origin, direction, radius):
+        """(indeksy, t) punktów przy promieniu."""
+        if self._kdtree is None:
+            return np.empty(0, dtype=int), np.empty(0)
+
+        origin, direction = np.asarray(origin, dtype=float), _unit(direction)
+        candidates = _sample_candidates(self._kdtree, self._lo, self._hi, origin, direction, radius)
+        hit, t = ray_hits(self.points[candidates], origin, direction, radius)
+        return candidates[hit], t
+
+
+class NodeIndex:
+    def __init__(self, rebuild_fraction=0.1):
+        self.rebuild_fraction = rebuild_fraction
+        self._counts = None
+        self._built = []
+        self._kdtree = None
+        self._points = np.empty((0, 3))
+        self._tree = np.empty(0, dtype=int)
+        self._node = np.empty(0, dtype=int)
+        self._tail = (np.empty((0, 3)), np.empty(0, dtype=int), np.empty(0, dtype=int))
+
+    @staticmethod
+    def _flatten(tree_nodes, starts):
+        points, trees, nodes = [], [], []
+        for t, (positions, start) in enumerate(zip(tree_nodes, starts)):
+            if len(positions) > start:
+                points.append(positions[start:])
+                trees.append(np.full(len(positions) - start, t))
+                nodes.append(np.arange(start, len(positions)))
+        if not points:
+            return np.empty((0, 3)), np.empty(0, dtype=int), np.empty(0, dtype=int)
+        return np.concatenate(points), np.concatenate(trees), np.concatenate(nodes)
+
+    def update(self, tree_nodes):
+        """tree_nodes[t]: (N_t, 3) node'y drzewa t (snapshot.nodes)."""
+        counts = [len(positions) for positions in tree_nodes]
+        if counts == self._counts:
+            return
+        self._counts = counts
+
+        built = self._built + [0] * (len(counts) - len(self._built))
+        n_tail = sum(counts) - sum(built)
+        rewound = any(c < b for c, b in zip(counts, built))
+
+        if self._kdtree is None or rewound or n_tail > self.rebuild_fraction * len(self._points):
+            self._points, self._tree, self._node = self._flatten(tree_nodes, [0] * len(counts))
+            self._kdtree = KDTree(self._points) if len(self._points) else None
+            if len(self._points):
+                self._lo, self._hi = self._points.min(axis=0), self._points.max(axis=0)
+            self._built = counts
+            self._tail = self._flatten(tree_nodes, counts)
+        else:
+            self._tail = self._flatten(tree_nodes, built)
+
+    def query_ray(self, origin, direction, radius):
+        """(indeksy drzew, indeksy node'ów, t) node'ów przy promieniu."""
+        origin, direction = np.asarray(origin, dtype=float), _unit(direction)
+        trees, nodes, ts = [], [], []
+
+        if self._kdtree is not None:
+            candidates = _sample_candidates(self._kdtree, self._lo, self._hi, origin, direction, radius)
+            hit, t = ray_hits(self._points[candidates], origin, direction, radius)
+            trees.append(self._tree[candidates[hit]])
+            nodes.append(self._node[candidates[hit]])
+            ts.append(t)
+
+        tail_points, tail_tree, tail_node = self._tail
+        if len(tail_points):
+            hit, t = ray_hits(tail_points, origin, direction, radius)
+            trees.append(tail_tree[hit])
+            nodes.append(tail_node[hit])
+            ts.append(t)
+
+        if not ts:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0)
+        return np.concatenate(trees), np.concatenate(nodes), np.concatenate(ts)
+
+
+# -------------------------------------------------
+# Picking w snapshocie
+# -------------------------------------------------
+
+class Picker:
+    """
+    Picking w ForestSnapshot: node'y widocznych drzew i opcjonalnie AP.
+    Indeksy są przebudowywane tylko gdy zmienił się snapshot (i tylko
+    w części, która urosła), a metryki korony liczone przy pierwszym
+    wskazaniu drzewa i pamiętane do jego kolejnego wzrostu.
+    """
+
+    def __init__(self, radius=0.25):
+        self.radius = radius
+        self.nodes = NodeIndex()
+        self._aps = None
+        self._aps_source = None
+        self._crowns: dict[int, tuple[int, CrownAnalysis]] = {}
+
+    def pick(self, snapshot, origin, direction, visible=None, include_aps=False) -> PickResult | None:
+        origin, direction = np.asarray(origin, dtype=float), _unit(direction)
+        best = None
+
+        self.nodes.update(snapshot.nodes)
+        trees, nodes, t = self.nodes.query_ray(origin, direction, self.radius)
+        if visible is not None and len(trees):
+            keep = np.asarray(visible)[trees]
+            trees, nodes, t = trees[keep], nodes[keep], t[keep]
+        if len(t):
+            i = int(np.argmin(t))
+            tree, node = int(trees[i]), int(nodes[i])
+            best = PickResult("node", tree, node, snapshot.nodes[tree][node], float(t[i]))
+
+        if include_aps:
+            if self._aps_source is not snapshot.ap_positions:
+                self._aps_source = snapshot.ap_positions
+                self._aps = PointIndex(snapshot.ap_positions)
+            idx, t = self._aps.query_ray(origin, direction, self.radius)
+            if len(t) and (best is None or t.min() < best.distance):
+                i = int(np.argmin(t))
+                owner = int(snapshot.ap_owner[idx[i]])
+                tree = snapshot.tree_ids.index(owner) if owner >= 0 else -1
+                best = PickResult("ap", tree, int(idx[i]), snapshot.ap_positions[idx[i]], float(t[i]))
+
+        return best
+
+    def crown(self, tree, positions) -> CrownAnalysis:
+        """CrownAnalysis drzewa, liczona ponownie dopiero gdy drzewo urosło."""
+        cached = self._crowns.get(tree)
+        if cached is None or cached[0] != len(positions):
+            cached = self._crowns[tree] = (len(positions), CrownAnalysis(positions))
+        return cached[1]
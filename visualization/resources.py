@@ -0,0 +1,22 @@
+"""
+Ścieżki do plików danych (assets) niezależne od katalogu roboczego.
+
+W wersji spakowanej PyInstallerem dane (datas w presentation.spec)
+są rozpakowywane do sys._MEIPASS; przy uruchomieniu ze źródeł bazą
+jest katalog główny repozytorium.
+"""
+
+import os
+import sys
+
+
+def resource_root() -> str:
+    frozen_root = getattr(sys, "_MEIPASS", None)
+    if frozen_root is not None:
+        return frozen_root
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resource_path(*parts) -> str:
+    """resource_path("assets", "terrain_texture.png") -> pełna ścieżka."""
+    return os.path.join(resource_root(), *parts)
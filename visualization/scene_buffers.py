@@ -0,0 +1,279 @@
+"""
+Księgowanie buforów sceny bez zależności od vispy.
+
+Geometria lasu tylko przybywa (node'y i krawędzie nie znikają), więc
+scena trzyma bufory append-only: GrowableArray ma zapas pojemności,
+a ForestBufferSync zwraca przy każdej synchronizacji tylko node'y
+i segmenty dodane od poprzedniej. Do GPU wysyłany jest wyłącznie ten
+"ogon" (set_subdata od offsetu), a pełny upload tylko przy powiększeniu
+bufora (podwojenie pojemności, więc zamortyzowany koszt jest stały).
+
+Każdy wierzchołek niesie indeks drzewa (pozycja w forest.trees), dzięki
+czemu izolacja drzewa to zmiana uniformu/tekstury, a nie przebudowa danych.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+class GrowableArray:
+    """Tablica (capacity, width) z licznikiem zajętych wierszy."""
+
+    def __init__(self, width, dtype=np.float32, capacity=1024, fill=0):
+        self.width = width
+        self.fill = fill
+        self.data = np.full((capacity, width), fill, dtype=dtype)
+        self.size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.data)
+
+    def append(self, rows) -> tuple[int, bool]:
+        """
+        Dopisuje wiersze (k, width). Zwraca (offset, grew):
+        grew=True oznacza, że bufor został powiększony i trzeba wysłać całość.
+        """
+        rows = np.asarray(rows, dtype=self.data.dtype).reshape(-1, self.width)
+        offset = self.size
+        end = offset + len(rows)
+
+        grew = False
+        if end > self.capacity:
+            capacity = self.capacity
+            while capacity < end:
+                capacity *= 2
+            data = np.full((capacity, self.width), self.fill, dtype=self.data.dtype)
+            data[:offset] = self.data[:offset]
+            self.data = data
+            grew = True
+
+        self.data[offset:end] = rows
+        self.size = end
+        return offset, grew
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+@dataclass
+class ForestDelta:
+    nodes: np.ndarray           # (k, 3) nowe node'y
+    node_tree: np.ndarray       # (k,) indeks drzewa
+    segments: np.ndarray        # (2m, 3) nowe krawędzie (rodzic, dziecko)
+    segment_tree: np.ndarray    # (2m,)
+
+    def __bool__(self):
+        return bool(len(self.nodes) or len(self.segments))
+
+
+class ForestBufferSync:
+    """
+    Pamięta, ile node'ów każdego drzewa jest już w buforach,
+    oraz zakres z każdego drzewa (do kolorowania po wysokości).
+    """
+
+    def __init__(self):
+        self.n_seen: list[int] = []
+        self.z_min: list[float] = []
+        self.z_max: list[float] = []
+
+    def sync(self, tree_nodes, tree_parents) -> ForestDelta:
+        """
+        tree_nodes[t]: (N_t, 3) node'y drzewa t (w kolejności dodawania),
+        tree_parents[t]: (N_t - 1,) rodzic node'a 1..N_t-1.
+        """
+        nodes, node_tree, segments, segment_tree = [], [], [], []
+
+        for t, (positions, parents) in enumerate(zip(tree_nodes, tree_parents)):
+            if t == len(self.n_seen):
+                self.n_seen.append(0)
+                self.z_min.append(np.inf)
+                self.z_max.append(-np.inf)
+
+            start, n = self.n_seen[t], len(positions)
+            if n <= start:
+                continue
+
+            new = positions[start:n]
+            nodes.append(new)
+            node_tree.append(np.full(n - start, t))
+
+            children = np.arange(max(start, 1), n)
+            if len(children):
+                seg = np.empty((2 * len(children), 3))
+                seg[0::2] = positions[parents[children - 1]]
+                seg[1::2] = positions[children]
+                segments.append(seg)
+                segment_tree.append(np.full(len(seg), t))
+
+            self.z_min[t] = min(self.z_min[t], new[:, 2].min())
+            self.z_max[t] = max(self.z_max[t], new[:, 2].max())
+            self.n_seen[t] = n
+
+        def cat(parts, shape):
+            return np.concatenate(parts) if parts else np.empty(shape)
+
+        return ForestDelta(
+            nodes=cat(nodes, (0, 3)),
+            node_tree=cat(node_tree, (0,)).astype(int),
+            segments=cat(segments, (0, 3)),
+            segment_tree=cat(segment_tree, (0,)).astype(int),
+        )
+
+    def rewound(self, tree_nodes) -> bool:
+        """True, jeśli któreś drzewo ma mniej node'ów niż w buforach (cofnięcie osi czasu)."""
+        return any(len(positions) < seen for positions, seen in zip(tree_nodes, self.n_seen))
+
+    def z_range(self, tree_indices=None) -> tuple[float, float]:
+        """Zakres z wszystkich drzew albo wybranych (indeksy w forest.trees)."""
+        if tree_indices is None:
+            tree_indices = range(len(self.n_seen))
+        lo = min((self.z_min[t] for t in tree_indices), default=np.inf)
+        hi = max((self.z_max[t] for t in tree_indices), default=-np.inf)
+        if not np.isfinite(lo):
+            return 0.0, 1.0
+        return float(lo), float(hi)
+
+
+# powyżej tylu osobnych zakresów taniej wysłać cały bufor jednym wywołaniem
+MAX_UPLOAD_RUNS = 32
+
+
+def upload_runs(indices, size) -> list[slice]:
+    """
+    Indeksy zmienionych elementów jako spójne zakresy do set_subdata
+    (pusta lista = nic do wysłania). Zmiany są zwykle rozrzucone po buforze,
+    więc jeden zakres min..max obejmowałby prawie całość; przy więcej niż
+    MAX_UPLOAD_RUNS zakresach zwracany jest jeden pełny slice(0, size).
+    """
+    indices = np.unique(np.asarray(indices, dtype=int))
+    if not len(indices):
+        return []
+
+    breaks = np.flatnonzero(np.diff(indices) > 1) + 1
+    if len(breaks) >= MAX_UPLOAD_RUNS:
+        return [slice(0, size)]
+
+    starts = indices[np.r_[0, breaks]]
+    stops = indices[np.r_[breaks - 1, len(indices) - 1]] + 1
+    return [slice(int(a), int(b)) for a, b in zip(starts, stops)]
+
+
+class InstanceTracker:
+    """
+    Ostatnio wysłane pozycje i skale instancji (np. sfer wzrostu).
+    update zwraca zakresy instancji, które się zmieniły (upload_runs).
+    """
+
+    def __init__(self, n_instances):
+        self.positions = np.zeros((n_instances, 3))
+        self.scales = np.zeros(n_instances)
+
+    def update(self, positions, scales) -> list[slice]:
+        positions = np.nan_to_num(np.asarray(positions, dtype=float), nan=0.0)
+        scales = np.nan_to_num(np.asarray(scales, dtype=float), nan=0.0)
+
+        changed = np.flatnonzero(
+            (scales != self.scales) | (positions != self.positions).any(axis=1)
+        )
+        self.positions[changed] = positions[changed]
+        self.scales[changed] = scales[changed]
+        return upload_runs(changed, len(self.scales))
+
+
+class ClaimTracker:
+    """
+    Stan "zajęty" każdego AP (float32 0/1, wprost do bufora GPU) utrzymywany
+    z listy zmian ForestSnapshot.ap_claims. update zwraca zakresy indeksów,
+    które trzeba wysłać (upload_runs), pustą listę, gdy od poprzedniej
+    klatki nic się nie zmieniło.
+    """
+
+    def __init__(self, n_points=0):
+        self.claimed = np.zeros(n_points, dtype=np.float32)
+        self.n_applied = 0
+
+    def update(self, ap_claims) -> list[slice]:
+        if len(ap_claims) < self.n_applied:
+            # lista zmian krótsza niż obsłużona (cofnięcie logu wzrostu) – od nowa
+            self.claimed[:] = 0.0
+            self.claimed[ap_claims] = 1.0
+            self.n_applied = len(ap_claims)
+            return [slice(0, len(self.claimed))]
+
+        new = np.asarray(ap_claims[self.n_applied:])
+        self.claimed[new] = 1.0
+        self.n_applied = len(ap_claims)
+        return upload_runs(new, len(self.claimed))
+
+
+class TreeVisibility:
+    """
+    Maska widoczności drzew (indeksy w forest.trees) wysyłana jako mała
+    tekstura (rows, MASK_WIDTH). Izolowanie, przełączanie i ukrywanie grup
+    drzew zmienia tylko maskę – geometria w buforach zostaje bez zmian.
+    """
+
+    MASK_WIDTH = 1024
+
+    def __init__(self, n_trees=0):
+        self.visible = np.ones(n_trees, dtype=bool)
+        # rośnie przy każdej zmianie maski (scena wysyła teksturę ponownie)
+        self.version = 0
+
+    def resize(self, n_trees):
+        if n_trees != len(self.visible):
+            grown = np.ones(n_trees, dtype=bool)
+            keep = min(n_trees, len(self.visible))
+            grown[:keep] = self.visible[:keep]
+            self.visible = grown
+            self.version += 1
+
+    def _set(self, mask):
+        if not np.array_equal(mask, self.visible):
+            self.visible = mask
+            self.version += 1
+
+    def show_all(self):
+        self._set(np.ones_like(self.visible))
+
+    def isolate(self, index):
+        """Tylko drzewo index; None lub indeks spoza lasu = nic nie widać."""
+        mask = np.zeros_like(self.visible)
+        if index is not None and 0 <= index < len(mask):
+            mask[index] = True
+        self._set(mask)
+
+    def set_visible(self, indices, visible=True):
+        mask = self.visible.copy()
+        mask[np.asarray(indices, dtype=int)] = visible
+        self._set(mask)
+
+    def isolated(self):
+        """Indeks jedynego widocznego drzewa albo None."""
+        idx = np.flatnonzero(self.visible)
+        return int(idx[0]) if len(idx) == 1 else None
+
+    def cycle(self, step=1):
+        """Izoluje następne (step=1) lub poprzednie (step=-1) drzewo."""
+        if not len(self.visible):
+            return None
+        current = self.isolated()
+        if current is None:
+            index = 0 if step > 0 else len(self.visible) - 1
+        else:
+            index = (current + step) % len(self.visible)
+        self.isolate(index)
+        return index
+
+    def indices(self) -> np.ndarray:
+        return np.flatnonzero(self.visible)
+
+    def texture_data(self) -> np.ndarray:
+        """Maska (rows, MASK_WIDTH) uint8: 255 = widoczne."""
+        rows = max(1, -(-len(self.visible) // self.MASK_WIDTH))
+        data = np.zeros(rows * self.MASK_WIDTH, dtype=np.uint8)
+        data[:len(self.visible)] = self.visible * 255
+        return data.reshape(rows, self.MASK_WIDTH)
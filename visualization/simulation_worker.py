@@ -0,0 +1,162 @@
+"""
+Symulacja w wątku w tle, niezależna od pętli renderowania vispy.
+
+SimulationWorker wywołuje forest.grow() tak szybko, jak pozwala CPU,
+i co najmniej co publish_interval sekund publikuje niezmienny
+ForestSnapshot. Wątek GUI nie dotyka obiektów Forest/Tree – czyta tylko
+ostatni opublikowany snapshot (latest), więc wolny krok wzrostu nie
+blokuje kamery, a tempo wzrostu nie zależy od liczby klatek.
+
+Podwójne buforowanie: worker buduje kolejny snapshot, podczas gdy
+renderer wciąż używa poprzedniego; publikacja to podmiana referencji
+pod lockiem. Tablice w snapshotach są tylko do odczytu i nigdy nie są
+modyfikowane w miejscu (ForestState dopisuje tylko za końcem widoków
+wydanych wcześniej, a drzewa tworzą nowe tablice).
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from analysis.forest_state import ForestState
+
+
+def _readonly_view(arr):
+    view = arr.view()
+    view.setflags(write=False)
+    return view
+
+
+@dataclass(frozen=True)
+class ForestSnapshot:
+    step: int
+    tree_ids: tuple
+    nodes: tuple                # (N_t, 3) dla każdego drzewa
+    parents: tuple              # (N_t - 1,) dla każdego drzewa
+    trunk_end: np.ndarray       # (T, 3), NaN dla drzew bez pnia
+    growth_radius: np.ndarray   # (T,), NaN dla drzew bez pnia
+    ap_positions: np.ndarray    # (M, 3)
+    ap_owner: np.ndarray        # (M,) tree_id albo -1
+    ap_claims: np.ndarray       # (K,) indeksy AP w kolejności zajmowania (lista zmian)
+    versions: tuple             # ForestState.versions()
+
+
+def take_snapshot(forest, state: ForestState, step: int) -> ForestSnapshot:
+    trees = forest.trees
+    nodes = state.tree_nodes()
+    parents = state.tree_parents()
+    ap_positions, ap_owner = state.attraction_points_3d()
+
+    trunk_end = np.full((len(trees), 3), np.nan)
+    growth_radius = np.full(len(trees), np.nan)
+    for i, tree in enumerate(trees):
+        if tree.trunk_done:
+            trunk_end[i] = tree.trunk_end.position()
+            growth_radius[i] = tree.growth_radius()
+
+    for arr in (trunk_end, growth_radius, ap_owner):
+        arr.setflags(write=False)
+
+    return ForestSnapshot(
+        step=step,
+        tree_ids=tuple(tree.tree_id for tree in trees),
+        nodes=tuple(_readonly_view(nodes[t.tree_id]) for t in trees),
+        parents=tuple(parents[t.tree_id] for t in trees),
+        trunk_end=trunk_end,
+        growth_radius=growth_radius,
+        ap_positions=ap_positions,
+        ap_owner=ap_owner,
+        ap_claims=state.ap_claims(),
+        versions=state.versions(),
+    )
+
+
+class SimulationWorker:
+    def __init__(self, forest, publish_interval=1 / 60, idle_sleep=0.05):
+        self.forest = forest
+        self.state = ForestState(forest)
+        self.publish_interval = publish_interval
+        # gdy nic już nie rośnie, nie kręcimy pustej pętli na 100% CPU
+        self.idle_sleep = idle_sleep
+
+        self.steps = 0
+
+        self._lock = threading.Lock()
+        self._published = take_snapshot(forest, self.state, 0)
+
+        self._running = threading.Event()
+        self._running.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------------------------------------
+    # Sterowanie
+    # -------------------------------------------------
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._running.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    # -------------------------------------------------
+    # Snapshoty
+    # -------------------------------------------------
+
+    def latest(self) -> ForestSnapshot:
+        with self._lock:
+            return self._published
+
+    def _publish(self):
+        snapshot = take_snapshot(self.forest, self.state, self.steps)
+        with self._lock:
+            self._published = snapshot
+
+    # -------------------------------------------------
+
+    def _run(self):
+        last_publish = time.perf_counter()
+        published_versions = self._published.versions
+
+        while not self._stop.is_set():
+            if not self._running.is_set():
+                # pauza: publikujemy stan, na którym się zatrzymaliśmy
+                if self.state.versions() != published_versions:
+                    self._publish()
+                    published_versions = self._published.versions
+                self._running.wait()
+                continue
+
+            before = self.state.versions()
+            self.forest.grow()
+            self.steps += 1
+            changed = self.state.versions() != before
+
+            now = time.perf_counter()
+            if now - last_publish >= self.publish_interval and self.state.versions() != published_versions:
+                self._publish()
+                published_versions = self._published.versions
+                last_publish = now
+
+            if not changed:
+                self._stop.wait(self.idle_sleep)
+
+        self._publish()
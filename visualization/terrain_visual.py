@@ -1,50 +1,65 @@
+import os
+
 import numpy as np
 from vispy.scene import visuals
 from vispy import io
 
+from analysis.terrain_dem import ArrayCache, dem_grid, terrain_key, terrain_raster
+
+
+# (teren, size, resolution, tekstura, mtime) -> (vertices, faces, colors);
+# LRU ograniczone rozmiarem, więc siatki po zmianie tekstury nie zostają w pamięci
+_mesh_cache = ArrayCache(64 * 2**20)
+
+
+def grid_faces(resolution):
+    """Dwa trójkąty na każdy kwadrat siatki resolution × resolution (wierzchołki wierszami)."""
+    idx = np.arange(resolution * resolution).reshape(resolution, resolution)[:-1, :-1].ravel()
+    faces = np.stack(
+        [
+            np.stack([idx, idx + 1, idx + resolution], axis=1),
+            np.stack([idx + 1, idx + resolution + 1, idx + resolution], axis=1),
+        ],
+        axis=1,
+    )
+    return faces.reshape(-1, 3).astype(np.uint32)
+
+
+def texture_colors(texture, resolution):
+    """Kolory wierzchołków (resolution², 4) próbkowane z tekstury na równej siatce."""
+    tex_height, tex_width = texture.shape[:2]
+
+    u_idx = np.linspace(0, tex_width - 1, resolution).astype(int)
+    v_idx = np.linspace(0, tex_height - 1, resolution).astype(int)
+
+    pixels = texture[np.ix_(v_idx, u_idx)].reshape(resolution * resolution, -1) / 255.0
+
+    colors = np.ones((resolution * resolution, 4), dtype=np.float32)
+    colors[:, :pixels.shape[1]] = pixels[:, :4]
+    return colors
+
+
+def terrain_mesh(terrain, texture_path, size=20, resolution=100):
+    """vertices (N, 3), faces (F, 3), colors (N, 4) siatki terenu; wynik jest pamiętany."""
+    key = (terrain_key(terrain), size, resolution, texture_path, os.path.getmtime(texture_path))
+
+    def compute():
+        _, _, X, Y = dem_grid(size, resolution)
+        Z = terrain_raster(terrain, "height", size, resolution)
+
+        vertices = np.c_[X.ravel(), Y.ravel(), Z.ravel()]
+        faces = grid_faces(resolution)
+        colors = texture_colors(io.read_png(texture_path), resolution)
+        return vertices, faces, colors
+
+    return _mesh_cache.get(key, compute)
+
+
 class TerrainVisual:
     def __init__(self, parent, terrain, texture_path, size=20, resolution=100):
         self.terrain = terrain
 
-        texture = io.read_png(texture_path)  
-
-        tex_height, tex_width = texture.shape[:2]
-
-        xs = np.linspace(-size, size, resolution)
-        ys = np.linspace(-size, size, resolution)
-        X, Y = np.meshgrid(xs, ys)
-        Z = np.zeros_like(X)
-        for i in range(resolution):
-            for j in range(resolution):
-                Z[i, j] = terrain.height(X[i, j], Y[i, j])
-
-        vertices = np.c_[X.flatten(), Y.flatten(), Z.flatten()]
-
-        faces = []
-        for i in range(resolution - 1):
-            for j in range(resolution - 1):
-                idx = i * resolution + j
-                faces.append([idx, idx + 1, idx + resolution])
-                faces.append([idx + 1, idx + resolution + 1, idx + resolution])
-        faces = np.array(faces)
-
-
-        u_idx = (np.linspace(0, tex_width - 1, resolution)).astype(int)
-        v_idx = (np.linspace(0, tex_height - 1, resolution)).astype(int)
-        colors = np.ones((vertices.shape[0], 4), dtype=np.float32)  
-
-        for i in range(resolution):
-            for j in range(resolution):
-                tex_x = u_idx[j]
-                tex_y = v_idx[i]
-                idx = i * resolution + j
-                pixel = texture[tex_y, tex_x] / 255.0 
-                if pixel.shape[0] == 3:
-                    colors[idx, :3] = pixel   
-                    colors[idx, 3] = 1.0      
-                else:
-                    colors[idx] = pixel       
-
+        vertices, faces, colors = terrain_mesh(terrain, texture_path, size, resolution)
 
         self.mesh = visuals.Mesh(
             vertices=vertices,
@@ -0,0 +1,369 @@
+"""
+Visuale vispy dla rosnącej geometrii lasu.
+
+GrowingGeometryVisual trzyma wierzchołki w prealokowanym VertexBuffer
+i przy dopisywaniu wysyła na GPU tylko nowe wiersze (set_subdata).
+Kolor viridis po wysokości liczy shader z uniformów u_zmin / u_zmax,
+więc zmiana zakresu z nie wymaga ponownego wysyłania kolorów.
+
+AttractionPointsVisual trzyma pozycje AP na GPU na stałe i przy zmianie
+stanu wysyła tylko zakres flag "zajęty" zmienionych od poprzedniej klatki.
+
+Nieużyte sloty bufora mają a_tree = -1 i shader wyrzuca je poza
+obszar widoku, tak samo jak wierzchołki drzew ukrytych w masce
+widoczności (tekstura z TreeVisibility, próbkowana po a_tree).
+"""
+
+import numpy as np
+import vispy
+from vispy import gloo
+from vispy.geometry import create_cylinder, create_sphere
+from vispy.visuals import Visual
+from vispy.visuals.instanced_mesh import InstancedMeshVisual
+from vispy.scene.visuals import create_visual_node
+
+from visualization.scene_buffers import ClaimTracker, GrowableArray, InstanceTracker, TreeVisibility
+
+
+VIRIDIS_GLSL = """
+vec3 viridis(float t) {
+    // dopasowanie wielomianowe palety viridis
+    const vec3 c0 = vec3(0.2777273272234177, 0.005407344544966578, 0.3340998053353061);
+    const vec3 c1 = vec3(0.1050930431085774, 1.404613529898575, 1.384590162594685);
+    const vec3 c2 = vec3(-0.3308618287255563, 0.214847559468213, 0.09509516302823659);
+    const vec3 c3 = vec3(-4.634230498983486, -5.799100973351585, -19.33244095627987);
+    const vec3 c4 = vec3(6.228269936347081, 14.17993336680509, 56.69055260068105);
+    const vec3 c5 = vec3(4.776384997670288, -13.74514537774601, -65.35303263337234);
+    const vec3 c6 = vec3(-5.435455855934631, 4.645852612178535, 26.3124352495832);
+    t = clamp(t, 0.0, 1.0);
+    return c0 + t * (c1 + t * (c2 + t * (c3 + t * (c4 + t * (c5 + t * c6)))));
+}
+"""
+
+_VERT = VIRIDIS_GLSL + """
+uniform float u_zmin;
+uniform float u_zmax;
+uniform sampler2D u_visibility;
+uniform vec2 u_visibility_shape;     // (szerokość, wiersze) maski
+uniform float u_use_colormap;
+uniform vec4 u_color;
+uniform float u_point_size;
+
+attribute vec3 a_position;
+attribute float a_tree;
+
+varying vec4 v_color;
+
+float tree_visible(float tree) {
+    float col = mod(tree, u_visibility_shape.x);
+    float row = floor(tree / u_visibility_shape.x);
+    return texture2D(u_visibility, (vec2(col, row) + 0.5) / u_visibility_shape).r;
+}
+
+void main() {
+    if (a_tree < 0.0 || tree_visible(a_tree) < 0.5) {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);
+        return;
+    }
+
+    gl_Position = $transform(vec4(a_position, 1.0));
+    gl_PointSize = u_point_size;
+
+    if (u_use_colormap > 0.5) {
+        float t = (a_position.z - u_zmin) / (u_zmax - u_zmin + 1e-6);
+        v_color = vec4(viridis(t), 1.0);
+    } else {
+        v_color = u_color;
+    }
+}
+"""
+
+_FRAG_POINTS = """
+varying vec4 v_color;
+
+void main() {
+    // okrągłe punkty
+    if (length(gl_PointCoord - vec2(0.5)) > 0.5)
+        discard;
+    gl_FragColor = v_color;
+}
+"""
+
+_FRAG_LINES = """
+varying vec4 v_color;
+
+void main() {
+    gl_FragColor = v_color;
+}
+"""
+
+
+class GrowingGeometryVisual(Visual):
+    """
+    mode="points": node'y (kolor viridis), mode="lines": segmenty (parami).
+    """
+
+    def __init__(self, mode="points", color=(1.0, 1.0, 1.0, 1.0), colormap=True,
+                 size=8.0, width=2.0, capacity=4096):
+        Visual.__init__(
+            self,
+            vcode=_VERT,
+            fcode=_FRAG_POINTS if mode == "points" else _FRAG_LINES,
+        )
+
+        self._positions = GrowableArray(3, capacity=capacity)
+        self._trees = GrowableArray(1, capacity=capacity, fill=-1)
+
+        self._vbo_positions = gloo.VertexBuffer(self._positions.data)
+        self._vbo_trees = gloo.VertexBuffer(self._trees.data)
+
+        program = self.shared_program
+        program["a_position"] = self._vbo_positions
+        program["a_tree"] = self._vbo_trees
+        program["u_zmin"] = 0.0
+        program["u_zmax"] = 1.0
+        self._visibility = gloo.Texture2D(
+            TreeVisibility().texture_data(), interpolation="nearest"
+        )
+        program["u_visibility"] = self._visibility
+        program["u_visibility_shape"] = (float(TreeVisibility.MASK_WIDTH), 1.0)
+        program["u_use_colormap"] = 1.0 if colormap else 0.0
+        program["u_color"] = color
+        program["u_point_size"] = size
+
+        self._draw_mode = mode
+        self.set_gl_state("translucent", depth_test=True, line_width=width)
+
+    # -------------------------------------------------
+
+    @property
+    def size(self) -> int:
+        return self._positions.size
+
+    def append(self, positions, tree_index):
+        """Dopisuje wierzchołki (k, 3) z indeksami drzew (k,)."""
+        if not len(positions):
+            return
+
+        offset, grew = self._positions.append(positions)
+        self._trees.append(tree_index)
+
+        if grew:
+            # nowa pojemność – cały bufor od nowa (rzadko, podwojenie)
+            self._vbo_positions.set_data(self._positions.data)
+            self._vbo_trees.set_data(self._trees.data)
+        else:
+            self._vbo_positions.set_subdata(self._positions.data[offset:self.size], offset=offset)
+            self._vbo_trees.set_subdata(self._trees.data[offset:self.size], offset=offset)
+
+        self.update()
+
+    def replace(self, positions, tree_index):
+        """Zastępuje całą zawartość bufora (np. przy zmianie poziomu LOD)."""
+        self._positions.size = 0
+        self._trees.size = 0
+        self._trees.data[:] = -1
+        self._positions.append(positions)
+        self._trees.append(tree_index)
+
+        self._vbo_positions.set_data(self._positions.data)
+        self._vbo_trees.set_data(self._trees.data)
+        self.update()
+
+    def set_z_range(self, z_min, z_max):
+        self.shared_program["u_zmin"] = float(z_min)
+        self.shared_program["u_zmax"] = float(z_max)
+        self.update()
+
+    def set_visibility(self, visibility):
+        """Wysyła maskę TreeVisibility (kilka bajtów na drzewo)."""
+        mask = visibility.texture_data()
+        self._visibility.set_data(mask)
+        self.shared_program["u_visibility_shape"] = (float(mask.shape[1]), float(mask.shape[0]))
+        self.update()
+
+    # -------------------------------------------------
+
+    def _prepare_transforms(self, view):
+        view.view_program.vert["transform"] = view.get_transform()
+
+    def _prepare_draw(self, view):
+        return self.size > 0
+
+    def _compute_bounds(self, axis, view):
+        if not self.size:
+            return None
+        coords = self._positions.view()[:, axis]
+        return float(coords.min()), float(coords.max())
+
+
+GrowingGeometry = create_visual_node(GrowingGeometryVisual)
+
+
+# częściowy upload instancji przez prywatne bufory InstancedMeshVisual
+# (_instance_positions_vbo, _instance_transforms_vbos) – sprawdzone na vispy 0.17;
+# na innych wersjach GrowthSpheresVisual używa publicznych setterów (pełny upload)
+_PRIVATE_INSTANCE_VBOS = tuple(int(v) for v in vispy.__version__.split(".")[:2]) == (0, 17)
+
+
+class GrowthSpheresVisual(InstancedMeshVisual):
+    """
+    Sfery zasięgu wzrostu: jedna siatka jednostkowej sfery, instancja na drzewo.
+    Zmieniają się tylko przesunięcie i skala instancji; na GPU trafiają
+    zakresy instancji, które zmieniły się od poprzedniej aktualizacji.
+    Drzewa bez pnia (lub ukryte) mają skalę 0.
+    """
+
+    def __init__(self, n_instances, color=(0.2, 0.4, 1.0, 0.15)):
+        # przed __init__ bazowej klasy (MeshVisual zamraża atrybuty)
+        self.tracker = InstanceTracker(n_instances)
+
+        InstancedMeshVisual.__init__(
+            self,
+            meshdata=create_sphere(radius=1.0, rows=16, cols=16),
+            color=color,
+            instance_positions=np.zeros((n_instances, 3)),
+            instance_transforms=np.zeros((n_instances, 3, 3)),
+        )
+
+    def set_spheres(self, centers, radii):
+        runs = self.tracker.update(centers, radii)
+        if not runs:
+            return
+
+        if not _PRIVATE_INSTANCE_VBOS:
+            self.instance_positions = self.tracker.positions
+            self.instance_transforms = self.tracker.scales[:, None, None] * np.eye(3)
+            self.update()
+            return
+
+        for run in runs:
+            positions = self.tracker.positions[run].astype(np.float32)
+            transforms = self.tracker.scales[run, None, None] * np.eye(3, dtype=np.float32)
+            transforms = transforms.astype(np.float32)
+
+            self._instance_positions[run] = positions
+            self._instance_transforms[run] = transforms
+
+            self._instance_positions_vbo.set_subdata(positions, offset=run.start)
+            for axis, vbo in enumerate(self._instance_transforms_vbos):
+                vbo.set_subdata(np.ascontiguousarray(transforms[..., axis]), offset=run.start)
+
+        self._bounds_changed()
+        self.update()
+
+
+GrowthSpheres = create_visual_node(GrowthSpheresVisual)
+
+
+class BranchTubesVisual(InstancedMeshVisual):
+    """
+    Gałęzie jako instancjonowane cylindry: jedna siatka cylindra jednostkowego
+    (promień 1, oś z od 0 do 1), instancja na segment z macierzą z lod.tube_transforms.
+    """
+
+    def __init__(self, color=(0.6, 0.3, 0.1, 1.0), cols=8):
+        InstancedMeshVisual.__init__(
+            self,
+            meshdata=create_cylinder(rows=2, cols=cols),
+            color=color,
+            shading="smooth",
+            instance_positions=np.zeros((1, 3)),
+            instance_transforms=np.zeros((1, 3, 3)),
+        )
+
+    def set_tubes(self, starts, transforms):
+        if not len(starts):
+            # pusta lista instancji – jedna zdegenerowana (skala 0)
+            starts, transforms = np.zeros((1, 3)), np.zeros((1, 3, 3))
+        self.instance_positions = starts
+        self.instance_transforms = transforms
+        self.update()
+
+
+BranchTubes = create_visual_node(BranchTubesVisual)
+
+
+_VERT_AP = """
+uniform vec4 u_free_color;
+uniform vec4 u_claimed_color;
+uniform float u_point_size;
+
+attribute vec3 a_position;
+attribute float a_claimed;
+
+varying vec4 v_color;
+
+void main() {
+    gl_Position = $transform(vec4(a_position, 1.0));
+    gl_PointSize = u_point_size;
+    v_color = a_claimed > 0.5 ? u_claimed_color : u_free_color;
+}
+"""
+
+
+class AttractionPointsVisual(Visual):
+    """
+    Nakładka attraction points: pozycje wysyłane raz (przy zmianie puli AP),
+    potem tylko flagi zajęcia z listy zmian ForestSnapshot.ap_claims.
+    Bez nowych zajęć set_points nic nie wysyła.
+    """
+
+    def __init__(self, free_color=(1.0, 0.8, 0.2, 0.4), claimed_color=(0.5, 0.5, 0.5, 0.2), size=6.0):
+        Visual.__init__(self, vcode=_VERT_AP, fcode=_FRAG_POINTS)
+
+        self._source = None
+        self._positions = np.zeros((0, 3), dtype=np.float32)
+        self.tracker = ClaimTracker()
+
+        self._vbo_positions = gloo.VertexBuffer(np.zeros((1, 3), dtype=np.float32))
+        self._vbo_claimed = gloo.VertexBuffer(np.zeros((1, 1), dtype=np.float32))
+
+        program = self.shared_program
+        program["a_position"] = self._vbo_positions
+        program["a_claimed"] = self._vbo_claimed
+        program["u_free_color"] = free_color
+        program["u_claimed_color"] = claimed_color
+        program["u_point_size"] = size
+
+        self._draw_mode = "points"
+        self.set_gl_state("translucent", depth_test=True)
+
+    def set_points(self, positions, ap_claims):
+        if positions is not self._source:
+            # nowa pula AP – jedyny pełny upload
+            self._source = positions
+            self._positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+            self.tracker = ClaimTracker(len(self._positions))
+            self.tracker.update(ap_claims)
+            if len(self._positions):
+                self._vbo_positions.set_data(self._positions)
+                self._vbo_claimed.set_data(self.tracker.claimed[:, None])
+            self._bounds_changed()
+            self.update()
+            return
+
+        runs = self.tracker.update(ap_claims)
+        if not runs:
+            return
+
+        for run in runs:
+            self._vbo_claimed.set_subdata(self.tracker.claimed[run, None], offset=run.start)
+        self.update()
+
+    # -------------------------------------------------
+
+    def _prepare_transforms(self, view):
+        view.view_program.vert["transform"] = view.get_transform()
+
+    def _prepare_draw(self, view):
+        return len(self._positions) > 0
+
+    def _compute_bounds(self, axis, view):
+        if not len(self._positions):
+            return None
+        coords = self._positions[:, axis]
+        return float(coords.min()), float(coords.max())
+
+
+AttractionPoints = create_visual_node(AttractionPointsVisual)
@@ -1,20 +1,28 @@
 import numpy as np
 from vispy import scene, app
 from vispy.scene import visuals
-from vispy.scene.visuals import Mesh
-from vispy.geometry import create_sphere
-from matplotlib import cm
 
 from visualization.terrain_visual import TerrainVisual
 from visualization.sun_visual import SunVisual
+from visualization.scene_buffers import ForestBufferSync, TreeVisibility
+from visualization.tree_visuals import AttractionPoints, BranchTubes, GrowingGeometry, GrowthSpheres
+from visualization.lod import ForestLOD
+from visualization.simulation_worker import SimulationWorker
+from visualization.growth_replay import GrowthLogPlayer
+from visualization.resources import resource_path
 
 
 class TreeScene(scene.SceneCanvas):
-    def __init__(self, forest, terrain, sun, debug=False):
+    # klawisz -> przesunięcie osi czasu przy odtwarzaniu logu wzrostu
+    TIMELINE_KEYS = {"Left": -1, "Right": 1, "PageDown": -50, "PageUp": 50, "Home": 0, "End": 0}
+
+    def __init__(self, forest, terrain, sun, debug=False, worker=None, show=True, size=(900, 700)):
+        # show=False: tryb bez okna (visualization.headless) – bez timerów
+        # i bez startu workera, klatki renderuje render_frame
         super().__init__(
             keys="interactive",
-            size=(900, 700),
-            show=True,
+            size=size,
+            show=show,
             bgcolor="black"
         )
 
@@ -28,14 +36,19 @@ class TreeScene(scene.SceneCanvas):
         # ---- FLAGS ----
         self.show_growth_sphere = False
         self.show_attraction_points = False
+        self.show_lod = False
+        self.show_inspector = False
         self.paused = False
 
-        self.visible_tree_id: int | None = None
+        # maska widoczności drzew (izolacja = zmiana maski, nie geometrii)
+        self.visibility = TreeVisibility()
+        self._visibility_version = None
 
-        # scena zmienia się tylko gdy rośnie drzewo lub zmieniamy widoczność
+        # scena zmienia się tylko gdy rośnie drzewo lub zmieniamy widoczność;
+        # ruch kamery to samo przerysowanie (dane na GPU się nie zmieniają)
         self.scene_dirty = True
-        # kamera zmienia się gdy ruszamy myszką
-        self.camera_dirty = True
+        # w trybie LOD ruch kamery może zmienić poziomy szczegółowości drzew
+        self.lod_dirty = False
 
         # ---- VIEW ----
         self.view = self.central_widget.add_view()
@@ -53,18 +66,55 @@ class TreeScene(scene.SceneCanvas):
         self.view.events.mouse_press.connect(self._on_camera_change)
 
         # ---- VISUALS ----
-        self.attraction_visual = visuals.Markers(parent=self.view.scene)
-        self.node_visual = visuals.Markers(parent=self.view.scene)
-        self.edge_visual = visuals.Line(parent=self.view.scene)
+        # nakładka AP (klawisz H) – bufor na GPU tworzony przy pierwszym włączeniu
+        self.attraction_visual = None
+        # bufory append-only: na GPU trafiają tylko nowe node'y i krawędzie
+        self.buffer_sync = ForestBufferSync()
+        self.node_visual = GrowingGeometry(mode="points", size=8, parent=self.view.scene)
+        self.edge_visual = GrowingGeometry(
+            mode="lines",
+            colormap=False,
+            color=(0.6, 0.3, 0.1, 1.0),
+            width=2,
+            parent=self.view.scene,
+        )
 
-        # growth spheres przechowujemy, nie tworzymy co klatkę
-        self.growth_spheres = []
+        # LOD (klawisz L): rurki blisko kamery, zdecymowane linie dalej
+        self.lod = ForestLOD()
+        self.lod_lines = GrowingGeometry(
+            mode="lines",
+            colormap=False,
+            color=(0.6, 0.3, 0.1, 1.0),
+            width=2,
+            parent=self.view.scene,
+        )
+        self.branch_tubes = BranchTubes(parent=self.view.scene)
+        self.lod_lines.visible = False
+        self.branch_tubes.visible = False
+
+        # jedna instancjonowana siatka sfer, tworzona przy pierwszym włączeniu
+        self.growth_spheres = None
+
+        # inspekcja (klawisz I): node / AP pod kursorem + panel z opisem;
+        # Picker (scipy) tworzony przy pierwszym włączeniu
+        self.picker = None
+        self.hover_marker = visuals.Markers(parent=self.view.scene)
+        self.hover_marker.visible = False
+        self.hover_text = visuals.Text(
+            "",
+            color="white",
+            font_size=9,
+            anchor_x="left",
+            anchor_y="bottom",
+            pos=(10, 10),
+            parent=self.scene,
+        )
 
         # ---- TERRAIN ----
         self.terrain_visual = TerrainVisual(
             parent=self.view.scene,
             terrain=terrain,
-            texture_path="assets/terrain_texture.png",
+            texture_path=resource_path("assets", "terrain_texture.png"),
             size=20,
             resolution=120
         )
@@ -72,130 +122,190 @@ class TreeScene(scene.SceneCanvas):
         # ---- SUN ----
         self.sun_visual = SunVisual(self.view.scene, self.sun)
 
-        # ---- TIMERS ----
-        self.grow_timer = app.Timer(
-            interval=0.1,
-            connect=self._grow_event,
-            start=True
-        )
+        # ---- SIMULATION ----
+        # wzrost w wątku w tle; scena czyta tylko opublikowane snapshoty
+        self.worker = worker or SimulationWorker(forest)
+        self.snapshot = None
 
+        # ---- TIMERS ----
         self.render_timer = app.Timer(
             interval=0.016,
             connect=self._render_event,
-            start=True
+            start=show
         )
 
         self.freeze()
 
+        if show:
+            self.worker.start()
+
+    def on_close(self, event):
+        super().on_close(event)
+        self.worker.stop()
+
     # ---------------------------------------------------------
     # CAMERA CHANGE
     # ---------------------------------------------------------
     def _on_camera_change(self, event):
-        if not self.paused:
-            self.camera_dirty = True
-        else:
-            # W pauzie renderuj od razu na zmianę kamery
-            self.update()
-
-    # ---------------------------------------------------------
-    # GROWTH UPDATE (wyłączany w pauzie)
-    # ---------------------------------------------------------
-    def _grow_event(self, event):
-        if self.paused:
-            return
-
-        before = sum(len(t.nodes) for t in self.forest.trees)
-        self.forest.grow(steps_per_tick=1)
-        after = sum(len(t.nodes) for t in self.forest.trees)
-
-        if after > before:
-            self.scene_dirty = True
+        if self.show_lod:
+            self.lod_dirty = True
+        self.update()
 
     # ---------------------------------------------------------
     # RENDER UPDATE
     # ---------------------------------------------------------
     def _render_event(self, event):
-        if self.paused:
-            return
+        snapshot = self.worker.latest()
+        if snapshot is not self.snapshot:
+            self.snapshot = snapshot
+            self.scene_dirty = True
 
-        if self.scene_dirty or self.camera_dirty:
+        if self.scene_dirty:
             self.update_scene()
             self.scene_dirty = False
-            self.camera_dirty = False
+        elif self.lod_dirty:
+            self.update_lod()
 
     # ---------------------------------------------------------
     # FULL SCENE UPDATE (tylko gdy scena się zmieniła)
     # ---------------------------------------------------------
     def update_scene(self):
+        snap = self.snapshot or self.worker.latest()
+
         # ---- ATTRACTION POINTS (tylko w debug mode) ----
-        if self.debug and self.show_attraction_points:
-            aps = np.array([ap.position() for ap in self.forest.attraction_points])
-            colors = [
-                (1.0, 0.8, 0.2, 0.4) if ap.claimed_by is None else (0.5, 0.5, 0.5, 0.2)
-                for ap in self.forest.attraction_points
-            ]
-            self.attraction_visual.set_data(aps, face_color=np.array(colors), size=6)
-        else:
-            self.attraction_visual.set_data(np.empty((0, 3)))
-
-        # ---- TREES ----
-        all_nodes = []
-        all_edges = []
-
-        for tree in self.forest.trees:
-            if self.visible_tree_id is not None and tree.tree_id != self.visible_tree_id:
-                continue
-
-            all_nodes.extend([n.position() for n in tree.nodes])
-            for i, j in tree.edges:
-                all_edges.append(tree.nodes[i].position())
-                all_edges.append(tree.nodes[j].position())
-
-        if all_nodes:
-            nodes = np.array(all_nodes)
-            zs = nodes[:, 2]
-            znorm = (zs - zs.min()) / (zs.max() - zs.min() + 1e-6)
-            colors = cm.viridis(znorm)
-            self.node_visual.set_data(nodes, face_color=colors, size=8)
-        else:
-            self.node_visual.set_data(np.empty((0, 3)))
-
-        if all_edges:
-            self.edge_visual.set_data(
-                np.array(all_edges),
-                color=(0.6, 0.3, 0.1, 1.0),
-                width=2,
-                connect="segments"
-            )
-        else:
-            self.edge_visual.set_data(np.empty((0, 3)))
+        show_aps = self.debug and self.show_attraction_points
+        if show_aps and self.attraction_visual is None:
+            self.attraction_visual = AttractionPoints(parent=self.view.scene)
+
+        if self.attraction_visual is not None:
+            self.attraction_visual.visible = show_aps
+            if show_aps:
+                # wysyłane są tylko flagi AP zajętych od poprzedniej klatki
+                self.attraction_visual.set_points(snap.ap_positions, snap.ap_claims)
+
+        # ---- TREES (tylko nowe node'y i krawędzie) ----
+        if self.buffer_sync.rewound(snap.nodes):
+            # cofnięcie osi czasu w odtwarzaniu logu – bufory od zera
+            self.buffer_sync = ForestBufferSync()
+            for visual in (self.node_visual, self.edge_visual):
+                visual.replace(np.empty((0, 3)), np.empty(0))
+
+        delta = self.buffer_sync.sync(snap.nodes, snap.parents)
+        self.node_visual.append(delta.nodes, delta.node_tree)
+        self.edge_visual.append(delta.segments, delta.segment_tree)
+
+        self.visibility.resize(len(snap.tree_ids))
+        if self.visibility.version != self._visibility_version:
+            self.node_visual.set_visibility(self.visibility)
+            self.edge_visual.set_visibility(self.visibility)
+            self._visibility_version = self.visibility.version
+
+        self.node_visual.set_z_range(*self.buffer_sync.z_range(self.visibility.indices()))
+
+        self.node_visual.visible = not self.show_lod
+        self.edge_visual.visible = not self.show_lod
+        self.lod_lines.visible = self.show_lod
+        self.branch_tubes.visible = self.show_lod
+        if self.show_lod:
+            self.update_lod()
 
         # ---- GROWTH SPHERES (tylko w debug mode) ----
-        for sphere in self.growth_spheres:
-            sphere.parent = None
-        self.growth_spheres.clear()
-
-        if self.debug and self.show_growth_sphere:
-            for tree in self.forest.trees:
-                if not tree.trunk_done:
-                    continue
-                if self.visible_tree_id is not None and tree.tree_id != self.visible_tree_id:
-                    continue
-
-                center = tree.trunk_end.position()
-                radius = tree.growth_radius()
-
-                meshdata = create_sphere(radius=radius, rows=16, cols=16)
-                sphere = Mesh(
-                    meshdata=meshdata,
-                    color=(0.2, 0.4, 1.0, 0.15),
-                    parent=self.view.scene
-                )
-                sphere.transform = scene.transforms.STTransform(translate=center)
-                self.growth_spheres.append(sphere)
+        show_spheres = self.debug and self.show_growth_sphere
+        if show_spheres and self.growth_spheres is None:
+            self.growth_spheres = GrowthSpheres(len(snap.tree_ids), parent=self.view.scene)
+
+        if self.growth_spheres is not None:
+            self.growth_spheres.visible = show_spheres
+            if show_spheres:
+                radii = np.where(self.visibility.visible, snap.growth_radius, 0.0)
+                # wysyłane są tylko instancje drzew, których pień/promień się zmienił
+                self.growth_spheres.set_spheres(snap.trunk_end, radii)
+
+        self.update()
+
+    def update_lod(self):
+        """Przebudowuje bufory LOD tylko gdy zmienił się poziom drzewa lub drzewo urosło."""
+        self.lod_dirty = False
+        snap = self.snapshot or self.worker.latest()
+
+        eye = self.view.camera.transform.map((0.0, 0.0, 0.0))[:3]
+        data = self.lod.build(snap.nodes, snap.parents, eye, self.visibility.visible)
+        if data is None:
+            return
 
+        self.lod_lines.replace(data["lines"], data["line_tree"])
+        self.branch_tubes.set_tubes(data["tube_starts"], data["tube_transforms"])
         self.update()
 
+    def render_frame(self, snapshot=None) -> np.ndarray:
+        """Klatka (H, W, 4) uint8 dla snapshotu (domyślnie worker.latest()), bez pętli zdarzeń."""
+        self.snapshot = snapshot or self.worker.latest()
+        self.update_scene()
+        return self.render()
+
+    # ---------------------------------------------------------
+    # INSPEKCJA (picking pod kursorem)
+    # ---------------------------------------------------------
+    def _cursor_ray(self, pos):
+        """(początek, kierunek) promienia z kamery przez piksel pos w układzie sceny."""
+        tr = self.scene.node_transform(self.view.scene)
+        near = tr.map([pos[0], pos[1], -1.0, 1.0])
+        far = tr.map([pos[0], pos[1], 1.0, 1.0])
+        near, far = near[:3] / near[3], far[:3] / far[3]
+        return near, far - near
+
+    def inspect_at(self, pos):
+        snap = self.snapshot or self.worker.latest()
+        self.visibility.resize(len(snap.tree_ids))
+
+        origin, direction = self._cursor_ray(pos)
+        hit = self.picker.pick(
+            snap,
+            origin,
+            direction,
+            visible=self.visibility.visible,
+            include_aps=self.debug and self.show_attraction_points,
+        )
+
+        if hit is None:
+            self.hover_marker.visible = False
+            self.hover_text.text = ""
+        elif hit.kind == "node":
+            t = hit.tree
+            lod = self.lod.tree_lod(t, snap.nodes[t], snap.parents[t])
+            crown = self.picker.crown(t, snap.nodes[t])
+            self.hover_text.text = (
+                f"drzewo {snap.tree_ids[t]}, node {hit.index}\n"
+                f"głębokość {lod.depth[hit.index]}, poddrzewo {lod.subtree[hit.index]}\n"
+                f"wysokość {crown.height:.2f}, objętość korony {crown.crown_volume:.2f}, "
+                f"promień korony {crown.crown_radius:.2f}"
+            )
+        else:
+            owner = "wolny" if hit.tree < 0 else f"zajęty przez drzewo {snap.tree_ids[hit.tree]}"
+            self.hover_text.text = f"AP {hit.index}: {owner}"
+
+        if hit is not None:
+            self.hover_marker.set_data(hit.position[None, :], face_color="red", size=12)
+            self.hover_marker.visible = True
+        self.update()
+
+    def on_mouse_move(self, event):
+        # przy obracaniu kamery nie szukamy (kursor i tak "ucieka")
+        if self.show_inspector and not event.is_dragging:
+            self.inspect_at(event.pos)
+
+    def isolate_tree(self, tree_id):
+        """Pokazuje tylko drzewo tree_id (None = wszystkie drzewa)."""
+        tree_ids = (self.snapshot or self.worker.latest()).tree_ids
+        self.visibility.resize(len(tree_ids))
+
+        if tree_id is None:
+            self.visibility.show_all()
+        else:
+            # nieistniejące drzewo – nic nie pokazujemy
+            self.visibility.isolate(tree_ids.index(tree_id) if tree_id in tree_ids else None)
+        self.scene_dirty = True
+
     # ---------------------------------------------------------
     # KEYBOARD
     # ---------------------------------------------------------
@@ -204,29 +314,53 @@ class TreeScene(scene.SceneCanvas):
             if self.debug:
                 self.show_attraction_points = not self.show_attraction_points
                 self.scene_dirty = True
-                if self.paused:
-                    self.update_scene()
 
         elif event.key == "G":
             if self.debug:
                 self.show_growth_sphere = not self.show_growth_sphere
                 self.scene_dirty = True
-                if self.paused:
-                    self.update_scene()
+
+        elif event.key == "L":
+            self.show_lod = not self.show_lod
+            self.lod.invalidate()
+            self.scene_dirty = True
+
+        elif event.key == "I":
+            self.show_inspector = not self.show_inspector
+            if self.picker is None:
+                from visualization.picking import Picker
+                self.picker = Picker()
+            if not self.show_inspector:
+                self.hover_marker.visible = False
+                self.hover_text.text = ""
+                self.update()
 
         elif event.key == "SPACE":
             self.paused = not self.paused
             if self.paused:
-                self.grow_timer.stop()
+                self.worker.pause()
                 print("PAUSE — wzrost zatrzymany, możesz swobodnie oglądać")
             else:
-                self.grow_timer.start()
-                self.scene_dirty = True
+                self.worker.resume()
                 print("WZNOWIONO wzrost")
 
+        elif event.key in self.TIMELINE_KEYS and isinstance(self.worker, GrowthLogPlayer):
+            # przewijanie logu wzrostu
+            delta = self.TIMELINE_KEYS[event.key]
+            if event.key == "Home":
+                self.worker.seek(0)
+            elif event.key == "End":
+                self.worker.seek(self.worker.log.n_steps)
+            else:
+                self.worker.step_by(delta)
+            print(f"Krok {self.worker.step}/{self.worker.log.n_steps}")
+
+        elif event.text in ("[", "]"):
+            # przełączanie po kolei przez wszystkie drzewa (nie tylko 1-9)
+            self.visibility.resize(len((self.snapshot or self.worker.latest()).tree_ids))
+            self.visibility.cycle(1 if event.text == "]" else -1)
+            self.scene_dirty = True
+
         elif event.text.isdigit():
             value = int(event.text)
-            self.visible_tree_id = None if value == 0 else value - 1
-            self.scene_dirty = True
-            if self.paused:
-                self.update_scene()
\ No newline at end of file
+            self.isolate_tree(None if value == 0 else value - 1)
\ No newline at end of file